@@ -1,8 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import os
 
+from config.locations import DEFAULT_LOCATION
+from data_pipeline.aqi import aqi_category, concentration_to_aqi, overall_aqi
+from inference.forecast_runs import current_run_id, latest_hour, read_daily, read_hourly, read_run
+
 # ---------------------------------------------------------
 # LOAD ENV
 # ---------------------------------------------------------
@@ -16,8 +20,6 @@ if not MONGO_URI:
 client = MongoClient(MONGO_URI)
 db = client["aqi_project"]
 
-hourly_collection = db["forecast_hourly"]
-daily_collection = db["forecast_daily"]
 registry_collection = db["model_registry"]
 features_collection = db["features"]
 
@@ -32,34 +34,60 @@ def root():
     return {"message": "AQI Forecast API is running"}
 
 
+# ---------------------------------------------------------
+# FORECAST RUNS
+# ---------------------------------------------------------
+# Every forecast endpoint serves a location's current run as a whole and tags
+# the response with its run id, so clients can cache on it (ETag / If-None-Match)
+def _current_run(request, response, location):
+    run_id = current_run_id(db, location)
+    if run_id is None:
+        return None, False
+    etag = f'"{run_id}"'
+    response.headers["ETag"] = etag
+    response.headers["X-Forecast-Run"] = run_id
+    return run_id, request.headers.get("if-none-match") == etag
+
+
+@app.get("/forecast/run")
+def get_forecast_run(request: Request, response: Response, location: str = DEFAULT_LOCATION):
+    run_id, unchanged = _current_run(request, response, location)
+    if unchanged:
+        return Response(status_code=304, headers=dict(response.headers))
+    return read_run(db, run_id) or {"error": "No forecast run published"}
+
+
 # ---------------------------------------------------------
 # HOURLY FORECAST
 # ---------------------------------------------------------
 @app.get("/forecast/hourly")
-def get_hourly_forecast():
-    data = list(hourly_collection.find({}, {"_id": 0}))
-    return data
+def get_hourly_forecast(request: Request, response: Response, location: str = DEFAULT_LOCATION):
+    run_id, unchanged = _current_run(request, response, location)
+    if unchanged:
+        return Response(status_code=304, headers=dict(response.headers))
+    return read_hourly(db, run_id)
 
 
 # ---------------------------------------------------------
 # DAILY FORECAST
 # ---------------------------------------------------------
 @app.get("/forecast/daily")
-def get_daily_forecast():
-    data = list(daily_collection.find({}, {"_id": 0}))
-    return data
+def get_daily_forecast(request: Request, response: Response, location: str = DEFAULT_LOCATION):
+    run_id, unchanged = _current_run(request, response, location)
+    if unchanged:
+        return Response(status_code=304, headers=dict(response.headers))
+    return read_daily(db, run_id)
 
 
 # ---------------------------------------------------------
 # LATEST FORECAST
 # ---------------------------------------------------------
 @app.get("/forecast/latest")
-def get_latest_forecast():
-    latest = hourly_collection.find_one(
-        sort=[("timestamp", -1)],
-        projection={"_id": 0}
-    )
-    return latest
+def get_latest_forecast(request: Request, response: Response, location: str = DEFAULT_LOCATION):
+    run_id, unchanged = _current_run(request, response, location)
+    if unchanged:
+        return Response(status_code=304, headers=dict(response.headers))
+    return latest_hour(db, run_id)
 
 
 # ---------------------------------------------------------
@@ -87,12 +115,64 @@ def get_current_weather():
     }
 
 
+# ---------------------------------------------------------
+# CURRENT OBSERVED AQI
+# ---------------------------------------------------------
+@app.get("/aqi/current")
+def get_current_aqi(location: str = DEFAULT_LOCATION):
+    latest = features_collection.find_one(
+        {"location": location},
+        sort=[("timestamp", -1)],
+        projection={"_id": 0, "timestamp": 1, "pm2_5": 1, "pm10": 1}
+    )
+
+    if not latest:
+        return {"error": "No observations found"}
+
+    # Pollutants missing from the row are left out, not rated as zero
+    concentrations = {
+        name: [latest[name]] for name in ("pm2_5", "pm10") if latest.get(name) is not None
+    }
+    if not concentrations:
+        return {"error": "No pollutant readings in the latest observation"}
+
+    aqi, dominant = overall_aqi(concentrations)
+    category, color = aqi_category(aqi)
+    sub_indices = {
+        name: round(float(concentration_to_aqi(values, name)[0]), 2)
+        for name, values in concentrations.items()
+    }
+
+    return {
+        "timestamp": latest["timestamp"],
+        "aqi": round(float(aqi[0]), 2),
+        "category": category[0],
+        "color": color[0],
+        "dominant_pollutant": dominant[0],
+        "sub_indices": sub_indices,
+    }
+
+
 # ---------------------------------------------------------
 # SHAP FEATURE IMPORTANCE
 # ---------------------------------------------------------
 @app.get("/model/shap")
 def get_shap():
-    shap_data = list(db["model_shap"].find({}, {"_id": 0}))
+    shap_collection = db["model_shap"]
+    production_model = registry_collection.find_one(
+        {"is_production": True},
+        sort=[("version", -1)]
+    )
+
+    # SHAP is stored per registry version; fall back to the newest one computed
+    shap_doc = None
+    if production_model:
+        shap_doc = shap_collection.find_one({"version": production_model["version"]})
+    shap_doc = shap_doc or shap_collection.find_one(sort=[("version", -1)])
+    if not shap_doc:
+        return []
+
+    shap_data = list(shap_collection.find({"version": shap_doc["version"]}, {"_id": 0}))
     shap_data = sorted(shap_data, key=lambda x: x["importance"], reverse=True)
     return shap_data
 
@@ -113,7 +193,8 @@ def get_model_info():
     return {
         "model_name": production_model["model_name"],
         "metrics": production_model["metrics"],
-        "version": production_model["version"]
+        "version": production_model["version"],
+        "strategy": production_model.get("strategy", "recursive")
     }
 
 
@@ -0,0 +1,85 @@
+"""
+AQI for historical backfills: the scalar pm25_to_aqi / aqi_category pair
+the forecast script used to call per row, against the searchsorted engine
+in data_pipeline.aqi, on millions of concentrations.
+
+    python -m benchmarks.bench_aqi [--values 5000000] [--legacy 500000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline.aqi import add_aqi_columns, aqi_category, category_index, concentration_to_aqi
+
+
+def legacy_pm25_to_aqi(pm25):
+    breakpoints = [
+        (0.0, 12.0, 0, 50),
+        (12.1, 35.4, 51, 100),
+        (35.5, 55.4, 101, 150),
+        (55.5, 150.4, 151, 200),
+        (150.5, 250.4, 201, 300),
+    ]
+    for pm_low, pm_high, aqi_low, aqi_high in breakpoints:
+        if pm_low <= pm25 <= pm_high:
+            return ((aqi_high - aqi_low) / (pm_high - pm_low)) * (pm25 - pm_low) + aqi_low
+    return 300
+
+
+def legacy_aqi_category(aqi):
+    if aqi <= 50:
+        return "Good", "#00E400"
+    elif aqi <= 100:
+        return "Moderate", "#FFFF00"
+    elif aqi <= 150:
+        return "Unhealthy for Sensitive Groups", "#FF7E00"
+    elif aqi <= 200:
+        return "Unhealthy", "#FF0000"
+    else:
+        return "Very Unhealthy", "#8F3F97"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--values", type=int, default=5_000_000)
+    parser.add_argument("--legacy", type=int, default=500_000,
+                        help="values run through the scalar loop (it is slow)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Skewed like real PM2.5: mostly low, a long tail past the old table
+    pm2_5 = rng.lognormal(mean=3.2, sigma=0.8, size=args.values).astype(np.float32)
+    pm10 = (pm2_5 * rng.uniform(1.2, 2.5, size=args.values)).astype(np.float32)
+
+    def legacy():
+        for value in pm2_5[:args.legacy].tolist():
+            legacy_aqi_category(legacy_pm25_to_aqi(value))
+
+    def vectorized():
+        aqi_category(concentration_to_aqi(pm2_5, "pm2_5"))
+
+    def codes():
+        category_index(concentration_to_aqi(pm2_5, "pm2_5"))
+
+    legacy_s = timed(legacy) * args.values / args.legacy
+    print(f"{args.values:,} PM2.5 values -> AQI + category + color")
+    print(f"{'scalar loop (extrapolated)':<30} {legacy_s:>8.2f} s")
+    for label, fn in (("searchsorted engine", vectorized), ("  category codes only", codes)):
+        seconds = timed(fn)
+        print(f"{label:<30} {seconds:>8.2f} s   ({legacy_s / seconds:,.0f}x)")
+
+    frame = pd.DataFrame({"pm2_5": pm2_5, "pm10": pm10})
+    seconds = timed(lambda: add_aqi_columns(frame))
+    print(f"{'add_aqi_columns, PM2.5 + PM10':<30} {seconds:>8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Backtesting a year of hourly origins: Forecaster.forecast from one origin
+at a time (evaluate_forecaster, timed on a sample and extrapolated)
+against forecast_origins advancing every trajectory together, for the
+sklearn forest and its compiled form. Speedups are against the faster,
+compiled per-origin loop.
+
+    python -m benchmarks.bench_backtest [--days 365] [--trees 400] [--processes 1]
+"""
+import argparse
+import time
+
+from sklearn.ensemble import RandomForestRegressor
+
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from inference.forecaster import HORIZON, Forecaster
+from inference.tree_engine import compile_model
+from training.backtest import backtest_origins, run_backtest
+from training.evaluate_models import evaluate_forecaster
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--trees", type=int, default=400)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--sample", type=int, default=20,
+                        help="origins run one at a time through the compiled loop")
+    args = parser.parse_args()
+
+    features = engineer_features(make_raw_frame(24 * args.days)).reset_index(drop=True)
+    model = RandomForestRegressor(
+        n_estimators=args.trees, max_depth=15, min_samples_leaf=2, random_state=42, n_jobs=-1,
+    ).fit(features[DEFAULT_FEATURE_COLUMNS], features["target_pm2_5"])
+    compiled = compile_model(model)
+    origins = backtest_origins(features, HORIZON)
+    print(f"{len(origins):,} origins x {HORIZON}h, RandomForest({args.trees})")
+
+    for label, predictor, sample in (("per-origin loop, sklearn", model, 3),
+                                     ("per-origin loop, compiled", compiled, args.sample)):
+        forecaster = Forecaster(predictor, DEFAULT_FEATURE_COLUMNS, quantiles=())
+        _, per_origin = evaluate_forecaster(forecaster, features, origins[:sample], HORIZON)
+        loop_s = per_origin * len(origins)
+        print(f"{label + ' (extrapolated)':<44} {loop_s:>8.1f} s")
+
+    for label, predictor in (("batched, sklearn", model), ("batched, compiled", compiled)):
+        start = time.perf_counter()
+        result = run_backtest(Forecaster(predictor, DEFAULT_FEATURE_COLUMNS, quantiles=()),
+                              features, origins, HORIZON, processes=args.processes)
+        seconds = time.perf_counter() - start
+        print(f"{label + f', {args.processes} process(es)':<44} {seconds:>8.1f} s"
+              f"   ({loop_s / seconds:,.0f}x)   mean RMSE {result['RMSE']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Writing a large feature backfill to Mongo: one insert_many over
+df.to_dict("records") vs the chunked streaming writer in
+data_pipeline.bulk_writer.
+
+Each case runs in a fresh process so peak RSS growth is not polluted by the
+previous one. Runs against mongomock by default, which keeps every
+document in this process so its RSS includes the stored data; --null
+discards the documents to show the writer's own footprint, and --uri
+points at a local mongod:
+
+    python -m benchmarks.bench_bulk_write [--cities 5] [--years 2] [--null | --uri ...]
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_raw_frame
+from data_pipeline.bulk_writer import mongo_client, write_frame
+from data_pipeline.feature_engineering import engineer_features
+from training.memory import PeakRSS
+
+
+def make_features(cities, years):
+    hours = years * 365 * 24
+    raw = pd.concat(
+        [make_raw_frame(hours, seed=i).assign(location=f"city_{i}") for i in range(cities)],
+        ignore_index=True,
+    )
+    return engineer_features(raw)
+
+
+class NullCollection:
+    """Accepts writes and drops them, leaving only the writer's own memory."""
+
+    def drop(self):
+        pass
+
+    def insert_many(self, documents, ordered=True):
+        self.count = len(documents)
+
+    def bulk_write(self, operations, ordered=True):
+        self.count = len(operations)
+
+
+def get_collection(uri, null=False):
+    if null:
+        return NullCollection()
+    if uri:
+        collection = mongo_client(uri)["aqi_benchmark"]["features_backfill"]
+    else:
+        import mongomock
+        collection = mongomock.MongoClient()["aqi_benchmark"]["features_backfill"]
+    collection.drop()
+    return collection
+
+
+def run_case(chunk_size, cities, years, uri, null, queue):
+    features = make_features(cities, years)
+    collection = get_collection(uri, null)
+
+    with PeakRSS() as mem:
+        start = time.perf_counter()
+        if chunk_size is None:
+            collection.insert_many(features.to_dict("records"))
+        else:
+            write_frame(collection, features, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+
+    queue.put((len(features), elapsed, mem.growth_mb))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=5)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--uri", default=None, help="local mongod URI (default: mongomock)")
+    parser.add_argument("--null", action="store_true", help="discard documents instead of storing them")
+    args = parser.parse_args()
+
+    cases = [
+        ("insert_many(to_dict)", None),
+        ("write_frame chunk=1000", 1000),
+        ("write_frame chunk=5000", 5000),
+        ("write_frame chunk=20000", 20000),
+    ]
+
+    ctx = mp.get_context("spawn")
+    print(f"{args.cities} cities x {args.years} years")
+    print(f"{'case':<26} {'docs':>9} {'seconds':>8} {'docs/s':>9} {'peak RSS +MB':>13}")
+    for label, chunk_size in cases:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_case, args=(chunk_size, args.cities, args.years, args.uri, args.null, queue))
+        proc.start()
+        docs, elapsed, growth = queue.get()
+        proc.join()
+        print(f"{label:<26} {docs:>9,} {elapsed:>8.2f} {docs / elapsed:>9,.0f} {growth:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+What model selection by rolling-origin CV costs next to the single
+80/20 holdout fit train_models used to select on: the candidates on a
+year of hourly features, CV_FOLDS expanding-window folds.
+
+    python -m benchmarks.bench_cross_validation [--days 365] [--folds 5] [--cpus N]
+"""
+import argparse
+import tempfile
+import time
+
+from sklearn.base import clone
+
+from benchmarks.bench_train_candidates import MODELS
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from training.cross_validation import CV_FOLDS, cross_validate, rolling_origin_folds
+from training.orchestrator import TRAIN_CPUS, fit_candidates
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--cpus", type=int, default=TRAIN_CPUS)
+    args = parser.parse_args()
+
+    features = engineer_features(make_raw_frame(24 * args.days))
+    X, y = features[DEFAULT_FEATURE_COLUMNS], features["target_pm2_5"]
+    split = int(len(X) * 0.8)
+    print(f"{len(X):,} rows, {len(MODELS)} candidates, {args.cpus} CPU(s)")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        models = {name: clone(model) for name, model in MODELS.items()}
+        start = time.perf_counter()
+        fit_candidates(models, X.iloc[:split], y.iloc[:split], X.iloc[split:], y.iloc[split:],
+                       model_dir, cpus=args.cpus)
+        holdout_s = time.perf_counter() - start
+    print(f"{'80/20 holdout':<28} {holdout_s:>7.1f} s")
+
+    folds = rolling_origin_folds(len(X), args.folds)
+    start = time.perf_counter()
+    results = cross_validate(MODELS, X, y, folds, cpus=args.cpus)
+    cv_s = time.perf_counter() - start
+    print(f"{f'{args.folds}-fold rolling origin':<28} {cv_s:>7.1f} s   ({cv_s / holdout_s:.1f}x the holdout)")
+
+    print(f"\n{'candidate':<22} {'CV RMSE':>8} {'± std':>7}")
+    for name, cv in sorted(results.items(), key=lambda item: item[1]["RMSE"]):
+        print(f"{name:<22} {cv['RMSE']:>8.3f} {cv['RMSE_std']:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Recursive vs direct 72-hour forecasting on synthetic data: latency per
+forecast and RMSE per horizon, from the same origins in a held-out period.
+
+    python -m benchmarks.bench_direct_forecast [--days 365] [--origins 60]
+"""
+import argparse
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from data_pipeline.feature_spec import lead_targets
+from inference.forecaster import HORIZON, DirectForecaster, Forecaster
+from training.evaluate_models import evaluate_forecaster, evaluation_origins
+
+REPORT_HORIZONS = (1, 6, 12, 24, 48, 72)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--origins", type=int, default=60)
+    args = parser.parse_args()
+
+    feature_columns = list(DEFAULT_FEATURE_COLUMNS)
+    features = engineer_features(make_raw_frame(args.days * 24)).reset_index(drop=True)
+    split = int(len(features) * 0.8)
+    train, test = features.iloc[:split - HORIZON], features.iloc[split:].reset_index(drop=True)
+
+    horizons = list(range(1, HORIZON + 1))
+    Y = lead_targets(train, horizons)
+    complete = ~np.isnan(Y).any(axis=1)
+    X = train[feature_columns]
+
+    forecasters = {
+        "recursive Ridge": Forecaster(Ridge().fit(X, train["target_pm2_5"]), feature_columns),
+        "recursive GradientBoosting": Forecaster(
+            GradientBoostingRegressor(n_estimators=200, max_depth=4, random_state=0)
+            .fit(X, train["target_pm2_5"]),
+            feature_columns,
+        ),
+        "direct Ridge": DirectForecaster(Ridge().fit(X[complete], Y[complete]), feature_columns, horizons),
+        "direct RandomForest": DirectForecaster(
+            RandomForestRegressor(n_estimators=100, max_depth=12, min_samples_leaf=2, n_jobs=1, random_state=0)
+            .fit(X[complete], Y[complete]),
+            feature_columns,
+            horizons,
+        ),
+    }
+
+    origins = evaluation_origins(test, args.origins, HORIZON)
+    print(f"{args.days} days, {len(origins)} origins in the last 20%")
+    print(f"{'strategy / model':<28} {'ms/forecast':>11}  " + "  ".join(f"h={h:<4}" for h in REPORT_HORIZONS))
+    for label, forecaster in forecasters.items():
+        rmse, seconds = evaluate_forecaster(forecaster, test, origins, HORIZON)
+        cells = "  ".join(f"{rmse[h - 1]:<6.2f}" for h in REPORT_HORIZONS)
+        print(f"{label:<28} {seconds * 1e3:>11.2f}  {cells}")
+
+
+if __name__ == "__main__":
+    main()
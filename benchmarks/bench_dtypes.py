@@ -0,0 +1,68 @@
+"""
+Peak RSS of the fetch -> features -> model input path for a multi-city,
+multi-year run, with the old wide dtypes (float64 everywhere, object
+location) against the compact dtype policy in data_pipeline.dtypes.
+
+Each case runs in a fresh process so peak RSS growth is not polluted by the
+previous one:
+
+    python -m benchmarks.bench_dtypes [--cities 10] [--years 3]
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.dtypes import compact_frame
+from data_pipeline.feature_engineering import engineer_features
+from training.memory import PeakRSS
+
+
+def make_raw(cities, years, compact):
+    hours = years * 365 * 24
+    frames = [make_raw_frame(hours, seed=i).assign(location=f"city_{i}") for i in range(cities)]
+    raw = pd.concat(frames, ignore_index=True)
+    if compact:
+        return compact_frame(raw)
+    # What the pipeline used to hold: float64 measurements, str locations
+    floats = raw.select_dtypes("float32").columns
+    return raw.astype({column: np.float64 for column in floats}).astype({"location": object})
+
+
+def run_case(compact, cities, years, queue):
+    with PeakRSS() as mem:
+        start = time.perf_counter()
+        raw = make_raw(cities, years, compact)
+        features = engineer_features(raw, compact=compact)
+        del raw
+        X = features[DEFAULT_FEATURE_COLUMNS].to_numpy()
+        elapsed = time.perf_counter() - start
+
+    frame_mb = features.memory_usage(deep=True).sum() / 1e6
+    queue.put((elapsed, mem.growth_mb, frame_mb, X.nbytes / 1e6, features.shape))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=10)
+    parser.add_argument("--years", type=int, default=3)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    print(f"{args.cities} cities x {args.years} years")
+    print(f"{'dtypes':<22} {'seconds':>8} {'peak RSS +MB':>13} {'frame MB':>9} {'X MB':>7} {'shape':>14}")
+    for label, compact in (("float64 / object", False), ("float32 / category", True)):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=run_case, args=(compact, args.cities, args.years, queue))
+        proc.start()
+        elapsed, growth, frame_mb, x_mb, shape = queue.get()
+        proc.join()
+        print(f"{label:<22} {elapsed:>8.3f} {growth:>13.1f} {frame_mb:>9.1f} {x_mb:>7.1f} {str(shape):>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Mongo vs Parquet feature store: loading the training columns for a year of
+hourly data across many cities.
+
+Each case runs in a fresh process so peak RSS growth is not polluted by the
+previous one. The Mongo backend runs against mongomock by default (pass
+--uri for a local mongod):
+
+    python -m benchmarks.bench_feature_store [--cities 10] [--uri ...]
+"""
+import argparse
+import multiprocessing as mp
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from data_pipeline.feature_store import MongoFeatureStore, ParquetFeatureStore
+from training.memory import PeakRSS
+
+HOURS = 365 * 24
+
+TRAINING_COLUMNS = ["timestamp", *DEFAULT_FEATURE_COLUMNS, "target_pm2_5"]
+
+
+def make_features(cities):
+    frames = []
+    for i in range(cities):
+        df = engineer_features(make_raw_frame(HOURS, seed=i))
+        df["location"] = f"city_{i}"
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def get_collection(uri):
+    if uri:
+        from pymongo import MongoClient
+        return MongoClient(uri)["aqi_benchmark"]["features_store"]
+    import mongomock
+    return mongomock.MongoClient()["aqi_benchmark"]["features_store"]
+
+
+def run_case(case, cities, uri, root, queue):
+    features = make_features(cities)
+
+    if case.startswith("mongo"):
+        collection = get_collection(uri)
+        collection.drop()
+        collection.insert_many(features.to_dict("records"))
+        store = MongoFeatureStore(collection)
+    else:
+        import pyarrow.dataset  # noqa: F401 -- keep import cost out of the measurement
+        store = ParquetFeatureStore(root)
+    del features
+
+    last_90_days = pd.Timestamp("2024-01-01", tz="UTC") + pd.Timedelta(days=365 - 90)
+
+    with PeakRSS() as mem:
+        start = time.perf_counter()
+        if case == "mongo full docs (legacy)":
+            df = pd.DataFrame(list(collection.find()))
+        elif case.endswith("last 90 days"):
+            df = store.read(columns=TRAINING_COLUMNS, start=last_90_days)
+        else:
+            df = store.read(columns=TRAINING_COLUMNS)
+        elapsed = time.perf_counter() - start
+
+    queue.put((case, elapsed, mem.growth_mb, df.shape))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cities", type=int, default=10)
+    parser.add_argument("--uri", default=None, help="local mongod URI (default: mongomock)")
+    args = parser.parse_args()
+
+    cases = [
+        "mongo full docs (legacy)",
+        "mongo projected",
+        "parquet projected",
+        "parquet last 90 days",
+    ]
+
+    with tempfile.TemporaryDirectory() as root:
+        ParquetFeatureStore(root).write(make_features(args.cities))
+
+        ctx = mp.get_context("spawn")
+        print(f"{args.cities} cities x {HOURS} hours")
+        print(f"{'case':<26} {'seconds':>9} {'peak RSS +MB':>13} {'shape':>14}")
+        for case in cases:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=run_case, args=(case, args.cities, args.uri, root, queue))
+            proc.start()
+            name, elapsed, growth, shape = queue.get()
+            proc.join()
+            print(f"{name:<26} {elapsed:>9.3f} {growth:>13.1f} {str(shape):>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Per-step latency of the recursive forecast: the original pandas loop from
+predict_next_3_days vs inference.forecaster.Forecaster, for each candidate
+model family trained on synthetic features, at the 72-hour and 7-day
+horizons. The Forecaster recomputes every lag and rolling window per step
+(the legacy loop only shifted a few lags), so outputs are not compared.
+
+    python -m benchmarks.bench_forecaster [--repeat 5]
+"""
+import argparse
+import time
+import warnings
+from datetime import timedelta
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from inference.forecaster import HORIZON, Forecaster
+
+import pandas as pd
+
+
+def legacy_forecast(model, feature_columns, last_row, horizon=HORIZON):
+    """The per-step pandas loop predict_next_3_days used to run."""
+    predictions = []
+    current_row = last_row.copy()
+
+    for _ in range(horizon):
+        X_input = current_row[feature_columns]
+        predicted_pm25 = model.predict(X_input)[0]
+
+        if "pm2_5_lag24" in current_row.columns:
+            current_row["pm2_5_lag24"] = current_row.get("pm2_5_lag12", current_row["pm2_5_lag24"])
+        if "pm2_5_lag12" in current_row.columns:
+            current_row["pm2_5_lag12"] = current_row.get("pm2_5_lag6", current_row["pm2_5_lag12"])
+        if "pm2_5_lag6" in current_row.columns:
+            current_row["pm2_5_lag6"] = current_row.get("pm2_5_lag3", current_row["pm2_5_lag6"])
+        if "pm2_5_lag3" in current_row.columns:
+            current_row["pm2_5_lag3"] = current_row.get("pm2_5_lag1", current_row["pm2_5_lag3"])
+        if "pm2_5_lag1" in current_row.columns:
+            current_row["pm2_5_lag1"] = predicted_pm25
+
+        current_row["pm2_5"] = predicted_pm25
+        current_row["timestamp"] = pd.to_datetime(current_row["timestamp"]) + timedelta(hours=1)
+        if "hour" in current_row.columns:
+            current_row["hour"] = current_row["timestamp"].dt.hour
+        if "day_of_week" in current_row.columns:
+            current_row["day_of_week"] = current_row["timestamp"].dt.dayofweek
+
+        predictions.append(float(predicted_pm25))
+
+    return np.array(predictions)
+
+
+def train_models(features, feature_columns):
+    X, y = features[feature_columns], features["target_pm2_5"]
+    models = {
+        "Ridge": Ridge(),
+        "RandomForest": RandomForestRegressor(n_estimators=100, max_depth=12, n_jobs=1, random_state=0),
+        "GradientBoosting": GradientBoostingRegressor(n_estimators=200, max_depth=4, random_state=0),
+    }
+    for model in models.values():
+        model.fit(X, y)
+    return models
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    feature_columns = list(DEFAULT_FEATURE_COLUMNS)
+    features = engineer_features(make_raw_frame(24 * 120))
+    models = train_models(features, feature_columns)
+
+    history = features.tail(25).reset_index(drop=True)
+    last_row = history.tail(1).reset_index(drop=True)
+
+    print(f"ms per step, best of {args.repeat}")
+    print(f"{'model':<18} {'horizon':>8} {'legacy':>8} {'Forecaster':>11} {'speedup':>8}")
+    for name, model in models.items():
+        forecaster = Forecaster(model, feature_columns)
+        for horizon in (HORIZON, 7 * 24):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                legacy_s, _ = best_of(
+                    args.repeat, lambda: legacy_forecast(model, feature_columns, last_row, horizon)
+                )
+            fast_s, _ = best_of(args.repeat, lambda: forecaster.forecast(history, horizon))
+            print(
+                f"{name:<18} {horizon:>8} {legacy_s / horizon * 1e3:>8.3f} "
+                f"{fast_s / horizon * 1e3:>11.3f} {legacy_s / fast_s:>7.1f}x"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Daily retraining cost as the history grows: a full refit on one and two
+years of features against the incremental update from the newest two
+weeks (forest refresh for RandomForest, warm start for the boosters).
+
+    python -m benchmarks.bench_incremental [--years 1 2]
+"""
+import argparse
+import time
+
+from sklearn.base import clone
+
+from benchmarks.bench_train_candidates import MODELS
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from training.incremental import RETRAIN_WINDOW_HOURS, TARGET_COLUMN, update_model
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--models", nargs="+", default=["RandomForest", "GradientBoosting", "HistGradientBoosting"])
+    args = parser.parse_args()
+
+    print(f"{'model':<22} {'history':>8} {'full refit s':>13} {'incremental s':>14}  mode")
+    for years in args.years:
+        features = engineer_features(make_raw_frame(24 * 365 * years)).reset_index(drop=True)
+        X, y = features[DEFAULT_FEATURE_COLUMNS], features[TARGET_COLUMN]
+        window = slice(len(X) - RETRAIN_WINDOW_HOURS, None)
+
+        for name in args.models:
+            full_s, model = timed(lambda: clone(MODELS[name]).fit(X, y))
+            update_s, (_, mode) = timed(lambda: update_model(model, X[window], y[window]))
+            print(f"{name:<22} {f'{years}y':>8} {full_s:>13.1f} {update_s:>14.2f}  {mode}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Full (wipe-and-reload) vs incremental (upsert) feature ingestion.
+
+Seeds a Mongo store with the history, then times one hourly run that adds a
+single new hour. Runs against mongomock by default; pass --uri to point it
+at a local mongod instead. mongomock has no real indexes, so the
+incremental run's high-water-mark lookup is still a scan there; against
+mongod it is a single index seek.
+
+    python -m benchmarks.bench_ingest [--uri mongodb://localhost:27017]
+"""
+import argparse
+import time
+
+from benchmarks.synthetic import make_raw_frame
+from data_pipeline.ingest_features import (
+    ensure_indexes,
+    ingest_full,
+    ingest_incremental,
+)
+
+HISTORIES = {"90 days": 90 * 24, "2 years": 730 * 24}
+
+
+def get_collection(uri, name):
+    if uri:
+        from pymongo import MongoClient
+        collection = MongoClient(uri)["aqi_benchmark"][name]
+    else:
+        import mongomock
+        collection = mongomock.MongoClient()["aqi_benchmark"][name]
+    collection.drop()
+    return collection
+
+
+def time_hourly_run(uri, mode, hours):
+    raw_df = make_raw_frame(hours + 1)
+    collection = get_collection(uri, f"features_{mode}")
+
+    # Seed the store with everything but the newest hour
+    ingest_full(collection, raw_df.iloc[:-1])
+    if mode == "incremental":
+        ensure_indexes(collection)
+
+    start = time.perf_counter()
+    if mode == "full":
+        written = ingest_full(collection, raw_df)
+    else:
+        written = ingest_incremental(collection, raw_df)
+    elapsed = time.perf_counter() - start
+
+    return elapsed, written, collection.count_documents({})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", default=None, help="local mongod URI (default: mongomock)")
+    args = parser.parse_args()
+
+    print(f"{'history':<10} {'mode':<12} {'seconds':>9} {'docs written':>13} {'docs stored':>12}")
+    for label, hours in HISTORIES.items():
+        for mode in ("full", "incremental"):
+            elapsed, written, stored = time_hourly_run(args.uri, mode, hours)
+            print(f"{label:<10} {mode:<12} {elapsed:>9.3f} {written:>13} {stored:>12}")
+
+
+if __name__ == "__main__":
+    main()
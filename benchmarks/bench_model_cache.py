@@ -0,0 +1,71 @@
+"""
+Cost of getting the production model in hand: the old path (joblib.load of
+the pickle on every call) against ModelCache, cold (compile + save), from
+the memory-mapped compiled arrays another worker already wrote, and warm.
+
+    python -m benchmarks.bench_model_cache [--trees 400]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import joblib
+import mongomock
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from inference.load_best_model import ModelCache, artifact_checksum
+from training.memory import PeakRSS
+from training.register_models import register_model
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trees", type=int, default=400)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(24 * 365, 19))
+    y = X[:, 0] * 3 + rng.normal(size=len(X))
+    model = RandomForestRegressor(
+        n_estimators=args.trees, max_depth=15, min_samples_leaf=2, random_state=42, n_jobs=-1,
+    ).fit(X, y)
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        os.makedirs(os.path.join(base_dir, "models"))
+        path = os.path.join(base_dir, "models", "RandomForest.pkl")
+        joblib.dump(model, path)
+        registry = mongomock.MongoClient()["bench"]["model_registry"]
+        register_model(registry, "RandomForest", {}, [], "models/RandomForest.pkl",
+                       checksum=artifact_checksum(path))
+        print(f"RandomForest({args.trees}, depth 15): {os.path.getsize(path) / 1e6:.0f} MB pickle")
+
+        print(f"{'load':<34} {'ms':>9} {'RSS +MB':>8}")
+        with PeakRSS() as mem:
+            _, seconds = timed(lambda: joblib.load(path))
+        print(f"{'joblib.load (every call, before)':<34} {seconds * 1e3:>9.1f} {mem.growth_mb:>8.1f}")
+
+        with PeakRSS() as mem:
+            _, seconds = timed(lambda: ModelCache(registry, base_dir=base_dir).current())
+        print(f"{'cache, cold (compile + save)':<34} {seconds * 1e3:>9.1f} {mem.growth_mb:>8.1f}")
+
+        cache = ModelCache(registry, base_dir=base_dir)
+        with PeakRSS() as mem:
+            _, seconds = timed(cache.current)
+        print(f"{'cache, compiled arrays mmapped':<34} {seconds * 1e3:>9.1f} {mem.growth_mb:>8.1f}")
+
+        _, seconds = timed(cache.current)
+        print(f"{'cache, warm':<34} {seconds * 1e3:>9.3f}")
+        _, seconds = timed(cache.refresh)
+        print(f"{'cache, refresh with no change':<34} {seconds * 1e3:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
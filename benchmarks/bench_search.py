@@ -0,0 +1,50 @@
+"""
+Successive-halving search over the train_models candidates: a cold
+search, the same search again (every trial cached), and the next day's
+search with 24 new rows (only the finalists on the full data run).
+
+    python -m benchmarks.bench_search [--days 292] [--cpus N]
+"""
+import argparse
+import time
+
+import mongomock
+from sklearn.model_selection import ParameterGrid
+
+from benchmarks.bench_train_candidates import MODELS
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from training.orchestrator import TRAIN_CPUS
+from training.search import SEARCH_SPACES, rung_sizes, successive_halving
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    # The 80% training period of a year
+    parser.add_argument("--days", type=int, default=292)
+    parser.add_argument("--cpus", type=int, default=TRAIN_CPUS)
+    args = parser.parse_args()
+
+    features = engineer_features(make_raw_frame(24 * (args.days + 1)))
+    X, y = features[DEFAULT_FEATURE_COLUMNS], features["target_pm2_5"]
+    today = len(X) - 24
+    trials = mongomock.MongoClient()["bench"]["model_trials"]
+
+    configs = sum(len(ParameterGrid(SEARCH_SPACES[name])) for name in MODELS)
+    print(f"{today:,} rows, {configs} configurations, rungs {rung_sizes(today)}, {args.cpus} CPU(s)")
+    for label, rows in (("cold", today), ("same data again", today), ("next day, +24 rows", len(X))):
+        start = time.perf_counter()
+        found = successive_halving(MODELS, X.iloc[:rows], y.iloc[:rows], trials=trials, cpus=args.cpus)
+        seconds = time.perf_counter() - start
+        evaluated = sum(f["evaluated"] for f in found.values())
+        cached = sum(f["cached"] for f in found.values())
+        print(f"{label:<20} {seconds:>7.1f} s   {evaluated:>3} trials run, {cached:>3} cached")
+
+    print()
+    for name, result in found.items():
+        print(f"{name:<22} CV RMSE {result['RMSE']:.3f}  {result['params']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+SHAP importance as train_models used to compute it (TreeExplainer over
+all of X_train; timed on a few rows and extrapolated) against
+training.explain: a stratified sample split across processes for
+forests, the closed form for Ridge (where TreeExplainer used to fail).
+
+    python -m benchmarks.bench_shap [--days 365] [--trees 400] [--sample 1000] [--processes N]
+"""
+import argparse
+import time
+
+import numpy as np
+import shap
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from training.explain import SHAP_PROCESSES, shap_importance
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--trees", type=int, default=400)
+    parser.add_argument("--sample", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=SHAP_PROCESSES)
+    args = parser.parse_args()
+
+    features = engineer_features(make_raw_frame(24 * args.days))
+    X = features[DEFAULT_FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = features["target_pm2_5"].to_numpy()
+    X_train, y_train = X[:int(len(X) * 0.8)], y[:int(len(X) * 0.8)]
+    forest = RandomForestRegressor(
+        n_estimators=args.trees, max_depth=15, min_samples_leaf=2, random_state=42, n_jobs=-1,
+    ).fit(X_train, y_train)
+    print(f"RandomForest({args.trees}), {len(X_train):,} training rows, {args.processes} process(es)")
+
+    start = time.perf_counter()
+    shap.TreeExplainer(forest).shap_values(X_train[:20], check_additivity=False)
+    legacy_s = (time.perf_counter() - start) * len(X_train) / 20
+    print(f"{'all rows, one process (extrapolated)':<40} {legacy_s:>8.0f} s")
+
+    importance, info = shap_importance(forest, X_train, y_train, args.sample, args.processes)
+    label = f"{info['sample_rows']} stratified rows"
+    print(f"{label:<40} {info['seconds']:>8.0f} s   "
+          f"({legacy_s / info['seconds']:.0f}x)")
+    top = np.argsort(-importance)[:5]
+    print("  top features:", ", ".join(DEFAULT_FEATURE_COLUMNS[i] for i in top))
+
+    ridge = Ridge().fit(X_train, y_train)
+    try:
+        shap.TreeExplainer(ridge)
+        legacy = "ran"
+    except Exception as exc:    # what the old SHAP step hit when Ridge won
+        legacy = f"fails ({type(exc).__name__})"
+    _, info = shap_importance(ridge, X_train, y_train)
+    print(f"\nRidge: TreeExplainer {legacy}; closed form on all {info['sample_rows']:,} rows "
+          f"in {info['seconds'] * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Training the candidate models on a year of hourly features: the old
+one-after-another loop against fit_candidates under a CPU budget, plus
+what each candidate costs on its own (histogram boosting against the
+classic GradientBoostingRegressor in particular).
+
+    python -m benchmarks.bench_train_candidates [--days 365] [--cpus N]
+"""
+import argparse
+import tempfile
+import time
+
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from training.orchestrator import TRAIN_CPUS, fit_candidates
+
+# The candidates train_models fits
+MODELS = {
+    "RandomForest": RandomForestRegressor(
+        n_estimators=400, max_depth=15, min_samples_split=4, min_samples_leaf=2,
+        random_state=42, n_jobs=-1,
+    ),
+    "Ridge": Ridge(),
+    "GradientBoosting": GradientBoostingRegressor(
+        n_estimators=500, learning_rate=0.03, max_depth=4, min_samples_split=5,
+        min_samples_leaf=2, subsample=0.8, random_state=42,
+    ),
+    "HistGradientBoosting": HistGradientBoostingRegressor(
+        max_iter=500, learning_rate=0.05, max_leaf_nodes=31, min_samples_leaf=20,
+        early_stopping=False, random_state=42,
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--cpus", type=int, default=TRAIN_CPUS)
+    args = parser.parse_args()
+
+    features = engineer_features(make_raw_frame(24 * args.days))
+    X, y = features[DEFAULT_FEATURE_COLUMNS], features["target_pm2_5"]
+    split = int(len(X) * 0.8)
+    data = (X.iloc[:split], y.iloc[:split], X.iloc[split:], y.iloc[split:])
+    print(f"{len(X):,} rows x {X.shape[1]} features, {args.cpus} CPU(s)")
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        start = time.perf_counter()
+        for model in MODELS.values():
+            clone(model).fit(data[0], data[1]).predict(data[2])
+        loop_s = time.perf_counter() - start
+        print(f"{'sequential loop':<26} {loop_s:>7.1f} s")
+
+        models = {name: clone(model) for name, model in MODELS.items()}
+        start = time.perf_counter()
+        fitted = fit_candidates(models, *data, model_dir, cpus=args.cpus)
+        seconds = time.perf_counter() - start
+        print(f"{'fit_candidates':<26} {seconds:>7.1f} s   ({loop_s / seconds:.1f}x)")
+
+    print(f"\n{'candidate':<22} {'threads':>7} {'fit s':>7} {'predict s':>9} {'peak MB':>8} {'RMSE':>7}")
+    for name, fit in fitted.items():
+        print(f"{name:<22} {fit['threads']:>7} {fit['fit_seconds']:>7.1f} "
+              f"{fit['predict_seconds']:>9.2f} {fit['peak_memory_mb']:>8.0f} {fit['RMSE']:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+sklearn predict vs the flattened tree engine (inference.tree_engine) for the
+production model shapes, single row and batched, plus a 72-step recursive
+forecast with each, point only and with P10/P50/P90 bands (forests).
+
+    python -m benchmarks.bench_tree_engine [--repeat 20]
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from inference.forecaster import Forecaster
+from inference.tree_engine import compile_model
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    feature_columns = list(DEFAULT_FEATURE_COLUMNS)
+    features = engineer_features(make_raw_frame(24 * 365)).reset_index(drop=True)
+    X, y = features[feature_columns], features["target_pm2_5"]
+    row = X.to_numpy()[-1:]
+    batch = X.to_numpy()[:10_000]
+    history = features.tail(25)
+
+    models = {
+        "RandomForest(400, depth 15)": RandomForestRegressor(
+            n_estimators=400, max_depth=15, min_samples_split=4, min_samples_leaf=2,
+            random_state=42, n_jobs=-1,
+        ),
+        "GradientBoosting(500, depth 4)": GradientBoostingRegressor(
+            n_estimators=500, learning_rate=0.03, max_depth=4, subsample=0.8, random_state=42,
+        ),
+    }
+
+    print(f"best of {args.repeat}; batch = {len(batch):,} rows")
+    print(
+        f"{'model':<32} {'path':<9} {'1 row ms':>9} {'batch ms':>9} {'72h ms':>8} "
+        f"{'+bands ms':>10} {'max |diff|':>11}"
+    )
+    for name, model in models.items():
+        model.fit(X, y)
+        compiled = compile_model(model)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            diff = float(np.max(np.abs(model.predict(batch) - compiled.predict(batch))))
+            for label, predictor in (("sklearn", model), ("compiled", compiled)):
+                single = best_of(args.repeat, lambda: predictor.predict(row))
+                batched = best_of(max(args.repeat // 5, 1), lambda: predictor.predict(batch))
+                point = Forecaster(predictor, feature_columns, quantiles=())
+                forecast = best_of(max(args.repeat // 5, 1), lambda: point.forecast(history))
+                banded = Forecaster(predictor, feature_columns)
+                if banded.quantiles:
+                    with_bands = best_of(max(args.repeat // 5, 1), lambda: banded.forecast(history))
+                    bands = f"{with_bands * 1e3:>10.1f}"
+                else:
+                    bands = f"{'-':>10}"
+                print(
+                    f"{name:<32} {label:<9} {single * 1e3:>9.3f} {batched * 1e3:>9.1f} "
+                    f"{forecast * 1e3:>8.1f} {bands} {diff if label == 'compiled' else 0:>11.2e}"
+                )
+
+
+if __name__ == "__main__":
+    main()
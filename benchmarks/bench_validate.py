@@ -0,0 +1,72 @@
+"""
+Columnar validate_frame vs a per-row dict loop over the same schema.
+
+The row loop is timed on a slice and extrapolated to the full frame:
+
+    python -m benchmarks.bench_validate [--rows 1000000]
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_raw_frame
+from config.feature_schema import FEATURE_SCHEMA
+from data_pipeline.feature_engineering import engineer_features
+from data_pipeline.validate_schema import validate_frame
+
+ROW_LOOP_SAMPLE = 20_000
+
+
+def make_features(rows, cities=20):
+    hours = rows // cities + 26
+    frames = []
+    for i in range(cities):
+        df = engineer_features(make_raw_frame(hours, seed=i))
+        df["location"] = f"city_{i}"
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True).iloc[:rows]
+
+
+def validate_rows(records):
+    """What a per-document validator has to do for the same checks."""
+    errors = 0
+    for doc in records:
+        for key, spec in FEATURE_SCHEMA.items():
+            value = doc.get(key)
+            if value is None or value != value:
+                errors += 1
+                continue
+            if "min" in spec and value < spec["min"]:
+                errors += 1
+            if "max" in spec and value > spec["max"]:
+                errors += 1
+        for key in doc:
+            if key not in FEATURE_SCHEMA:
+                errors += 1
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_features(args.rows)
+
+    start = time.perf_counter()
+    report = validate_frame(df)
+    columnar = time.perf_counter() - start
+
+    sample = df.iloc[:ROW_LOOP_SAMPLE]
+    start = time.perf_counter()
+    validate_rows(sample.to_dict("records"))
+    row_loop = (time.perf_counter() - start) * len(df) / len(sample)
+
+    print(f"rows: {len(df):,}  ok: {report.ok}")
+    print(f"validate_frame:     {columnar * 1000:10.1f} ms")
+    print(f"per-row dict loop:  {row_loop * 1000:10.1f} ms (extrapolated, incl. to_dict)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+
+def make_raw_frame(hours, start="2024-01-01", seed=0):
+    """
+    Synthetic hourly frame with the same columns fetch_openmeteo_data returns.
+    """
+    rng = np.random.default_rng(seed)
+    timestamp = pd.date_range(start=start, periods=hours, freq="h", tz="UTC")
+    t = np.arange(hours)
+    daily = np.sin(2 * np.pi * t / 24)
+
+    pm2_5 = np.clip(40 + 15 * daily + rng.normal(0, 5, hours).cumsum() * 0.1, 1, None)
+
+    return pd.DataFrame({
+        "timestamp": timestamp,
+        "pm2_5": pm2_5.astype("float32"),
+        "pm10": (pm2_5 * 1.8 + rng.normal(0, 4, hours)).clip(1).astype("float32"),
+        "temperature": (28 + 5 * daily + rng.normal(0, 1, hours)).astype("float32"),
+        "humidity": (60 - 15 * daily + rng.normal(0, 3, hours)).clip(0, 100).astype("float32"),
+        "wind_speed": rng.gamma(2.0, 4.0, hours).astype("float32"),
+        "wind_direction": rng.uniform(0, 360, hours).astype("float32"),
+        "pressure": (1008 + rng.normal(0, 2, hours)).astype("float32"),
+    })
@@ -1,17 +1,67 @@
-FEATURE_SCHEMA = {
-    "city": str,
-    "timestamp": str,
-    "aqi": int,
-    "pm25": float,
-    "pm10": float,
-    "no2": float,
-    "so2": float,
+# Columns of the `features` collection, as produced by
+# data_pipeline.feature_engineering.engineer_features plus the location key.
+#
+# dtype is a broad kind ("float", "int", "datetime", "string");
+# min / max are inclusive bounds, nullable defaults to False.
+
+MEASUREMENTS = {
+    "pm2_5": {"dtype": "float", "min": 0},
+    "pm10": {"dtype": "float", "min": 0},
+    "temperature": {"dtype": "float", "min": -90, "max": 60},
+    "humidity": {"dtype": "float", "min": 0, "max": 100},
+    "wind_speed": {"dtype": "float", "min": 0},
+    "wind_direction": {"dtype": "float", "min": 0, "max": 360},
+    "pressure": {"dtype": "float", "min": 300, "max": 1100},
+}
+
+CALENDAR = {
+    "hour": {"dtype": "int", "min": 0, "max": 23},
+    "day": {"dtype": "int", "min": 1, "max": 31},
+    "month": {"dtype": "int", "min": 1, "max": 12},
+    "day_of_week": {"dtype": "int", "min": 0, "max": 6},
+}
 
-    "hour": int,
-    "day_of_week": int,
-    "is_weekend": bool,
+PM2_5_LAGS = (1, 2, 3, 6, 12, 24)
+PM10_LAGS = (1, 2, 6, 12, 24)
+ROLL_MEAN_WINDOWS = (3, 6, 12, 24)
+ROLL_STD_WINDOWS = (3, 6, 12)
 
-    "aqi_change_1h": float,
+DERIVED = {}
+for k in PM2_5_LAGS:
+    DERIVED[f"pm2_5_lag{k}"] = {"dtype": "float", "min": 0}
+for k in PM10_LAGS:
+    DERIVED[f"pm10_lag{k}"] = {"dtype": "float", "min": 0}
+for w in ROLL_MEAN_WINDOWS:
+    DERIVED[f"pm2_5_roll_mean_{w}"] = {"dtype": "float", "min": 0}
+for w in ROLL_STD_WINDOWS:
+    DERIVED[f"pm2_5_roll_std_{w}"] = {"dtype": "float", "min": 0}
 
-    "feature_version": str
+# Gap masks (see data_pipeline.feature_spec.GAP_COLUMNS): hours missing
+# just before the row, and hours imputed inside the trailing 24 hours.
+GAP_MASKS = {
+    "gap_hours": {"dtype": "int", "min": 0},
+    "imputed_hours_24": {"dtype": "int", "min": 0, "max": 24},
 }
+
+FEATURE_SCHEMA = {
+    "location": {"dtype": "string"},
+    "timestamp": {"dtype": "datetime"},
+    **MEASUREMENTS,
+    **CALENDAR,
+    **DERIVED,
+    **GAP_MASKS,
+    "target_pm2_5": {"dtype": "float", "min": 0},
+}
+
+# Inputs the candidate models are trained on (recorded per version in the
+# model registry as feature_columns).
+DEFAULT_FEATURE_COLUMNS = [
+    "pm2_5", "pm10",
+    "temperature", "humidity", "wind_speed", "pressure",
+    "hour", "day_of_week",
+    "pm2_5_lag1", "pm2_5_lag3", "pm2_5_lag6",
+    "pm2_5_lag12", "pm2_5_lag24",
+    "pm2_5_roll_mean_3", "pm2_5_roll_mean_6",
+    "pm2_5_roll_mean_12", "pm2_5_roll_mean_24",
+    "pm2_5_roll_std_3", "pm2_5_roll_std_6",
+]
@@ -0,0 +1,10 @@
+# Stations covered by the feature pipeline.
+# name is the `location` key stored with every feature / forecast row.
+LOCATIONS = [
+    {"name": "karachi", "latitude": 24.8607, "longitude": 67.0011},
+]
+
+# The station the pipeline covered before there were locations: rows written
+# without a location key belong to it. Named outright, not LOCATIONS[0],
+# so reordering or adding stations does not change it.
+DEFAULT_LOCATION = "karachi"
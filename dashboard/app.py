@@ -1,4 +1,5 @@
-
+import sys
+from pathlib import Path
 
 import streamlit as st
 import pandas as pd
@@ -6,6 +7,12 @@ import plotly.graph_objects as go
 from pymongo import MongoClient
 from streamlit_autorefresh import st_autorefresh
 
+# streamlit runs this file as a script; make the project packages importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from data_pipeline.aqi import AQI_MAX, CATEGORIES  # noqa: E402
+from inference.forecast_runs import read_daily, read_hourly  # noqa: E402
+
 # --------------------------------------------------
 # PAGE CONFIG
 # --------------------------------------------------
@@ -63,8 +70,6 @@ MONGO_URI = st.secrets["MONGO_URI"]
 client = MongoClient(MONGO_URI)
 db = client["aqi_project"]
 
-hourly_collection = db["forecast_hourly"]
-daily_collection = db["forecast_daily"]
 registry_collection = db["model_registry"]
 features_collection = db["features"]
 shap_collection = db["model_shap"]
@@ -72,11 +77,16 @@ shap_collection = db["model_shap"]
 # --------------------------------------------------
 # FETCH DATA
 # --------------------------------------------------
-hourly = list(hourly_collection.find({}, {"_id": 0}))
-daily = list(daily_collection.find({}, {"_id": 0}))
+# Only ever show one complete forecast run: the one the location's pointer names
+hourly = read_hourly(db)
+daily = read_daily(db)
 model_info = registry_collection.find_one({"is_production": True})
 current_weather = features_collection.find_one(sort=[("timestamp", -1)])
-shap_data = list(shap_collection.find({}, {"_id": 0}))
+# SHAP is stored per registry version; fall back to the newest one computed
+shap_doc = shap_collection.find_one({"version": model_info["version"]}) if model_info else None
+shap_doc = shap_doc or shap_collection.find_one(sort=[("version", -1)])
+shap_query = {"version": shap_doc.get("version")} if shap_doc else {}
+shap_data = list(shap_collection.find(shap_query, {"_id": 0}))
 
 hourly_df = pd.DataFrame(hourly)
 daily_df = pd.DataFrame(daily)
@@ -104,14 +114,13 @@ if not hourly_df.empty:
             value=latest["predicted_aqi"],
             title={'text': "Current AQI"},
             gauge={
-                'axis': {'range': [0, 300]},
+                'axis': {'range': [0, AQI_MAX]},
                 'bar': {'color': "#1f77b4"},
                 'steps': [
-                    {'range': [0, 50], 'color': "#00e400"},
-                    {'range': [50, 100], 'color': "#ffff00"},
-                    {'range': [100, 150], 'color': "#ff7e00"},
-                    {'range': [150, 200], 'color': "#ff0000"},
-                    {'range': [200, 300], 'color': "#8f3f97"},
+                    {'range': [low, top], 'color': color}
+                    for low, (_, top, color) in zip(
+                        [0] + [top for _, top, _ in CATEGORIES[:-1]], CATEGORIES
+                    )
                 ],
             }
         ))
@@ -141,8 +150,10 @@ if not hourly_df.empty:
             return "Sensitive groups should reduce prolonged outdoor activity."
         elif category == "Unhealthy":
             return "Everyone should limit outdoor activity."
-        else:
+        elif category == "Very Unhealthy":
             return "Avoid outdoor exposure. Stay indoors if possible."
+        else:
+            return "Health emergency. Everyone should stay indoors and keep activity low."
 
     st.info(f"Health Recommendation: {recommendation(latest['category'])}")
 
@@ -155,6 +166,26 @@ st.subheader("72-Hour Forecast")
 if not hourly_df.empty:
     fig = go.Figure()
 
+    # P10-P90 band, stored when the production model is a forest
+    if {"predicted_pm2_5_p10", "predicted_pm2_5_p90"} <= set(hourly_df.columns):
+        fig.add_trace(go.Scatter(
+            x=hourly_df["timestamp"],
+            y=hourly_df["predicted_pm2_5_p90"],
+            mode="lines",
+            line=dict(width=0),
+            showlegend=False,
+            hoverinfo="skip"
+        ))
+        fig.add_trace(go.Scatter(
+            x=hourly_df["timestamp"],
+            y=hourly_df["predicted_pm2_5_p10"],
+            mode="lines",
+            line=dict(width=0),
+            fill="tonexty",
+            fillcolor="rgba(31, 119, 180, 0.2)",
+            name="PM2.5 P10-P90"
+        ))
+
     fig.add_trace(go.Scatter(
         x=hourly_df["timestamp"],
         y=hourly_df["predicted_pm2_5"],
@@ -262,3 +293,8 @@ if not shap_df.empty:
     )
 
     st.plotly_chart(fig, use_container_width=True)
+
+    if "sample_rows" in shap_df.columns:
+        info = shap_df.iloc[0]
+        st.caption(f"Model version {info['version']} · {info['method']} SHAP on "
+                   f"{info['sample_rows']} rows · {info['seconds']:.1f}s")
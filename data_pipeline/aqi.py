@@ -0,0 +1,137 @@
+"""
+US EPA Air Quality Index, vectorized.
+
+Concentrations are converted with the EPA breakpoint tables: truncate to
+the table's precision, find the breakpoint row with one searchsorted over
+the whole array, interpolate linearly within it. Values past the top of a
+table continue along its last row ("beyond the AQI"), negatives count as
+zero and NaN stays NaN. Category and color come from a second searchsorted
+on the AQI itself, so a float AQI of 50.4 (a daily mean, say) is Moderate.
+
+Shared by the forecast writer, the API and the dashboard.
+"""
+import numpy as np
+import pandas as pd
+
+# (concentration low, concentration high, AQI low, AQI high) per row
+BREAKPOINTS = {
+    # µg/m³, 24-hour, truncated to 0.1; the 2024 revision of the standard
+    "pm2_5": [
+        (0.0, 9.0, 0, 50),
+        (9.1, 35.4, 51, 100),
+        (35.5, 55.4, 101, 150),
+        (55.5, 125.4, 151, 200),
+        (125.5, 225.4, 201, 300),
+        (225.5, 325.4, 301, 500),
+    ],
+    # µg/m³, 24-hour, truncated to integers
+    "pm10": [
+        (0, 54, 0, 50),
+        (55, 154, 51, 100),
+        (155, 254, 101, 150),
+        (255, 354, 151, 200),
+        (355, 424, 201, 300),
+        (425, 604, 301, 500),
+    ],
+}
+DECIMALS = {"pm2_5": 1, "pm10": 0}
+POLLUTANTS = tuple(BREAKPOINTS)
+
+# (name, highest AQI in the category, color)
+CATEGORIES = [
+    ("Good", 50, "#00E400"),
+    ("Moderate", 100, "#FFFF00"),
+    ("Unhealthy for Sensitive Groups", 150, "#FF7E00"),
+    ("Unhealthy", 200, "#FF0000"),
+    ("Very Unhealthy", 300, "#8F3F97"),
+    ("Hazardous", 500, "#7E0023"),
+]
+AQI_MAX = CATEGORIES[-1][1]
+
+# float32 feature values sit up to ~1e-4 below their decimal; don't truncate those down
+_TRUNCATE_SLACK = 1e-3
+
+
+def _line_segments(rows):
+    """Per table row: upper concentration, and the row's line as slope / intercept."""
+    c_low, c_high, i_low, i_high = (np.array(column, dtype=np.float64) for column in zip(*rows))
+    slope = (i_high - i_low) / (c_high - c_low)
+    return c_high, slope, i_low - slope * c_low
+
+
+_TABLES = {name: _line_segments(rows) for name, rows in BREAKPOINTS.items()}
+_CATEGORY_TOPS = np.array([top for _, top, _ in CATEGORIES[:-1]], dtype=np.float64)
+# Index len(CATEGORIES) is for NaN
+_NAMES = np.array([name for name, _, _ in CATEGORIES] + [None], dtype=object)
+_COLORS = np.array([color for _, _, color in CATEGORIES] + [None], dtype=object)
+
+
+def concentration_to_aqi(values, pollutant="pm2_5"):
+    """AQI (float, not rounded) for an array of concentrations of one pollutant."""
+    c_high, slope, intercept = _TABLES[pollutant]
+    scale = 10.0 ** DECIMALS[pollutant]
+
+    c = np.asarray(values, dtype=np.float64)
+    c = np.floor(np.maximum(c, 0.0) * scale + _TRUNCATE_SLACK) / scale
+    row = np.minimum(np.searchsorted(c_high, c, side="left"), len(c_high) - 1)
+    return slope[row] * c + intercept[row]
+
+
+def category_index(aqi):
+    """Index into CATEGORIES per AQI value; len(CATEGORIES) where the AQI is NaN."""
+    aqi = np.asarray(aqi, dtype=np.float64)
+    index = np.searchsorted(_CATEGORY_TOPS, aqi, side="left")
+    return np.where(np.isnan(aqi), len(CATEGORIES), index)
+
+
+def aqi_category(aqi):
+    """(category names, colors) as object arrays for an array of AQI values."""
+    index = category_index(aqi)
+    return _NAMES[index], _COLORS[index]
+
+
+def _worst(sub_indices):
+    """(overall AQI, index of the pollutant it came from or -1) from stacked sub-indices."""
+    sub = np.stack(sub_indices)
+    top = np.where(np.isnan(sub), -np.inf, sub).argmax(axis=0)
+    # All-NaN columns pick row 0, which is NaN
+    aqi = np.take_along_axis(sub, top[None], axis=0)[0]
+    return aqi, np.where(np.isnan(aqi), -1, top)
+
+
+def overall_aqi(concentrations):
+    """
+    Overall AQI from several pollutants: the highest sub-index, and which
+    pollutant it came from. concentrations maps pollutant -> array; NaN
+    sub-indices are ignored unless all of them are NaN.
+    """
+    names = list(concentrations)
+    aqi, top = _worst([concentration_to_aqi(concentrations[name], name) for name in names])
+    return aqi, np.array(names + [None], dtype=object)[top]
+
+
+def add_aqi_columns(df):
+    """
+    Copy of df with aqi_<pollutant> per pollutant column present, plus the
+    overall aqi, dominant_pollutant, aqi_category and aqi_color. Meant for
+    whole-history frames: everything is a handful of array passes.
+    """
+    present = [name for name in POLLUTANTS if name in df.columns]
+    if not present:
+        raise ValueError(f"No pollutant columns to rate (expected any of {POLLUTANTS})")
+
+    out = df.copy()
+    sub_indices = []
+    for name in present:
+        out[f"aqi_{name}"] = sub = concentration_to_aqi(df[name].to_numpy(), name)
+        sub_indices.append(sub)
+    aqi, top = _worst(sub_indices)
+
+    # Categoricals straight from integer codes; -1 (NaN) becomes missing
+    codes = category_index(aqi)
+    codes[codes == len(CATEGORIES)] = -1
+    out["aqi"] = aqi
+    out["dominant_pollutant"] = pd.Categorical.from_codes(top, categories=present)
+    out["aqi_category"] = pd.Categorical.from_codes(codes, categories=[c[0] for c in CATEGORIES])
+    out["aqi_color"] = pd.Categorical.from_codes(codes, categories=[c[2] for c in CATEGORIES])
+    return out
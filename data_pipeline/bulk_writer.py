@@ -0,0 +1,155 @@
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from pymongo import InsertOne, MongoClient, UpdateOne
+from pymongo.errors import AutoReconnect, BulkWriteError, NetworkTimeout
+
+load_dotenv()
+
+
+def _default_compressors():
+    """Wire compressors offered to the server, best first; zlib is always available."""
+    names = ["zlib"]
+    try:
+        import zstandard  # noqa: F401
+        names.insert(0, "zstd")
+    except ImportError:
+        pass
+    return ",".join(names)
+
+
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", _default_compressors())
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+
+DUPLICATE_KEY = 11000
+
+
+def mongo_client(uri=None, compressors=MONGO_COMPRESSORS, **kwargs):
+    """MongoClient for MONGO_URI with wire compression turned on."""
+    uri = uri or os.getenv("MONGO_URI")
+    if compressors:
+        kwargs.setdefault("compressors", compressors)
+    return MongoClient(uri, **kwargs)
+
+
+@dataclass
+class WriteStats:
+    docs: int = 0
+    chunks: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def docs_per_second(self):
+        return self.docs / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.docs} docs in {self.chunks} chunks, {self.seconds:.2f}s "
+            f"({self.docs_per_second:,.0f} docs/s, {self.retries} retries)"
+        )
+
+
+def _native(series):
+    """Column values as plain Python objects BSON can encode."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        # Timestamps are datetime subclasses, BSON takes them as is
+        return list(series)
+    values = series.to_numpy()
+    if values.dtype.kind in "fiub":
+        return values.tolist()
+    return [
+        None if v is pd.NA else v.item() if isinstance(v, np.generic) else v
+        for v in values
+    ]
+
+
+def iter_frame_chunks(df, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield lists of at most chunk_size documents built straight from the
+    frame's columns. Only one chunk of dicts exists at a time, unlike
+    df.to_dict("records") for the whole frame.
+    """
+    columns = list(df.columns)
+    for start in range(0, len(df), chunk_size):
+        part = df.iloc[start:start + chunk_size]
+        values = [_native(part[column]) for column in columns]
+        yield [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def iter_chunks(documents, chunk_size=DEFAULT_CHUNK_SIZE):
+    chunk = []
+    for doc in documents:
+        chunk.append(doc)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _operations(chunk, key):
+    if key is None:
+        return [InsertOne(doc) for doc in chunk]
+    return [
+        UpdateOne({k: doc[k] for k in key}, {"$set": doc}, upsert=True)
+        for doc in chunk
+    ]
+
+
+def _write_chunk(collection, operations, retries, backoff):
+    """One unordered bulk write; returns how many retries it took."""
+    for attempt in range(retries + 1):
+        try:
+            collection.bulk_write(operations, ordered=False)
+            return attempt
+        except BulkWriteError as exc:
+            # A retried insert can run into its own documents from the
+            # attempt that lost the connection (InsertOne keeps its _id)
+            errors = exc.details.get("writeErrors", [])
+            if attempt and errors and all(e.get("code") == DUPLICATE_KEY for e in errors):
+                return attempt
+            raise
+        except (AutoReconnect, NetworkTimeout):
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def write_chunks(collection, chunks, key=None, retries=MAX_RETRIES, backoff=RETRY_BACKOFF):
+    """
+    Write an iterable of document lists with unordered bulk writes.
+
+    key=None inserts; a list of field names upserts on those fields, which
+    also makes retries idempotent. Transient network errors are retried
+    with exponential backoff.
+    """
+    stats = WriteStats()
+    start = time.perf_counter()
+    for chunk in chunks:
+        if not chunk:
+            continue
+        stats.retries += _write_chunk(collection, _operations(chunk, key), retries, backoff)
+        stats.docs += len(chunk)
+        stats.chunks += 1
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def write_frame(collection, df, key=None, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """Stream a DataFrame into Mongo chunk by chunk (see write_chunks)."""
+    return write_chunks(collection, iter_frame_chunks(df, chunk_size), key=key, **kwargs)
+
+
+def write_documents(collection, documents, key=None, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """Stream any iterable of dicts into Mongo chunk by chunk (see write_chunks)."""
+    return write_chunks(collection, iter_chunks(documents, chunk_size), key=key, **kwargs)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from config.feature_schema import FEATURE_SCHEMA
+
+# Pipeline-wide in-memory dtypes, derived from the schema kinds:
+#   float   -> float32 (Open-Meteo already sends float32)
+#   int     -> the smallest signed int that holds the column's min..max
+#   string  -> category (a handful of locations / AQI categories)
+#   datetime is left as datetime64[ns, UTC]
+FLOAT_DTYPE = np.float32
+INT_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def compact_dtype(spec):
+    """In-memory dtype for one schema spec, or None to leave the column alone."""
+    kind = spec["dtype"]
+    if kind == "float":
+        return FLOAT_DTYPE
+    if kind == "string":
+        return "category"
+    if kind == "int":
+        low, high = spec.get("min"), spec.get("max")
+        if low is None or high is None:
+            return np.int32
+        for dtype in INT_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return dtype
+    return None
+
+
+def compact_series(series, spec):
+    dtype = compact_dtype(spec)
+    if dtype is None or series.dtype == dtype:
+        return series
+    # Nullable int columns stay float rather than fail the cast
+    if spec["dtype"] == "int" and series.isna().any():
+        return series.astype(FLOAT_DTYPE)
+    return series.astype(dtype)
+
+
+def compact_frame(df, schema=FEATURE_SCHEMA):
+    """
+    Cast every schema column of df to its compact dtype, column by column,
+    so only one column is ever held twice. Unknown columns pass through.
+    """
+    columns = {}
+    for name in df.columns:
+        spec = schema.get(name)
+        columns[name] = df[name] if spec is None else compact_series(df[name], spec)
+    return pd.DataFrame(columns, index=df.index, copy=False)
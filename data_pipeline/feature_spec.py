@@ -0,0 +1,378 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from config.feature_schema import (
+    FEATURE_SCHEMA,
+    PM2_5_LAGS,
+    PM10_LAGS,
+    ROLL_MEAN_WINDOWS,
+    ROLL_STD_WINDOWS,
+)
+from data_pipeline.dtypes import compact_dtype, compact_frame
+
+# kind: "calendar" (param = timestamp attribute), "lag" (param = hours back),
+# "roll_mean" / "roll_std" (param = window length, current hour included),
+# "lead" (param = hours ahead, used for the target)
+FeatureSpec = namedtuple("FeatureSpec", ["kind", "source", "param"])
+
+
+def _registry():
+    specs = {}
+    for attr in ("hour", "day", "month", "day_of_week"):
+        specs[attr] = FeatureSpec("calendar", "timestamp", attr)
+
+    # Column order matches what engineer_features has always produced
+    head_lags, tail_lags = [k for k in PM2_5_LAGS if k <= 3], [k for k in PM2_5_LAGS if k > 3]
+    for k in head_lags:
+        specs[f"pm2_5_lag{k}"] = FeatureSpec("lag", "pm2_5", k)
+    for k in [k for k in PM10_LAGS if k <= 3]:
+        specs[f"pm10_lag{k}"] = FeatureSpec("lag", "pm10", k)
+    for k in tail_lags:
+        specs[f"pm2_5_lag{k}"] = FeatureSpec("lag", "pm2_5", k)
+    for k in [k for k in PM10_LAGS if k > 3]:
+        specs[f"pm10_lag{k}"] = FeatureSpec("lag", "pm10", k)
+
+    specs["pm2_5_roll_mean_3"] = FeatureSpec("roll_mean", "pm2_5", 3)
+    specs["pm2_5_roll_std_3"] = FeatureSpec("roll_std", "pm2_5", 3)
+    for w in ROLL_MEAN_WINDOWS[1:]:
+        specs[f"pm2_5_roll_mean_{w}"] = FeatureSpec("roll_mean", "pm2_5", w)
+    for w in ROLL_STD_WINDOWS[1:]:
+        specs[f"pm2_5_roll_std_{w}"] = FeatureSpec("roll_std", "pm2_5", w)
+    return specs
+
+
+FEATURES = _registry()
+
+TARGET_COLUMN = "target_pm2_5"
+TARGET = FeatureSpec("lead", "pm2_5", 1)
+
+
+def required_features(feature_columns):
+    """Registered derived features a model's feature_columns depend on, in registry order."""
+    wanted = set(feature_columns)
+    return [name for name in FEATURES if name in wanted]
+
+
+HOUR_NS = 3_600_000_000_000
+
+# How missing hours inside a location's history are treated before lags
+# and windows are taken:
+#   "null"        leave them missing; any lag / window touching one is NaN
+#   "ffill"       carry the last observation forward up to `limit` hours
+#   "interpolate" fill gaps of at most `limit` hours linearly
+GAP_POLICIES = ("null", "ffill", "interpolate")
+DEFAULT_GAP_POLICY = "null"
+DEFAULT_GAP_LIMIT = 3
+
+# Explicit gap masks emitted with every feature row
+IMPUTED_WINDOW = 24
+GAP_COLUMNS = ["gap_hours", f"imputed_hours_{IMPUTED_WINDOW}"]
+
+
+def reach(spec):
+    """Hours of history a feature needs before the current one."""
+    if spec.kind == "lag":
+        return spec.param
+    if spec.kind in ("roll_mean", "roll_std"):
+        return spec.param - 1
+    return 0
+
+
+def _calendar(ns, attr):
+    """Calendar fields straight from UTC epoch nanoseconds."""
+    if attr == "hour":
+        return ((ns // HOUR_NS) % 24).astype(np.int32)
+    days = ns // (24 * HOUR_NS)
+    if attr == "day_of_week":
+        # 1970-01-01 was a Thursday
+        return ((days + 3) % 7).astype(np.int32)
+    as_days = days.astype("datetime64[D]")
+    as_months = as_days.astype("datetime64[M]")
+    if attr == "month":
+        return (as_months.astype(np.int64) % 12 + 1).astype(np.int32)
+    if attr == "day":
+        return ((as_days - as_months.astype("datetime64[D]")).astype(np.int64) + 1).astype(np.int32)
+    raise ValueError(f"Unknown calendar field: {attr}")
+
+
+def _epoch_ns(timestamps):
+    values = timestamps.to_numpy(dtype="datetime64[ns]")
+    return values.view(np.int64)
+
+
+class HourlyGrid:
+    """
+    Dense hourly time axis for a frame sorted by (location, timestamp).
+
+    Every location block gets a contiguous run of cells from its first to
+    its last observed hour, all blocks laid end to end in one array. Rows
+    are scattered into their cell, so "k hours ago" is always cell - k,
+    whatever rows are missing. Building it is O(rows + missing hours) with
+    no per-location reindexing.
+    """
+
+    def __init__(self, df):
+        n = len(df)
+        hours = _epoch_ns(df["timestamp"]) // HOUR_NS
+
+        if "location" in df.columns and n:
+            codes = pd.factorize(df["location"], sort=False)[0]
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        else:
+            starts = np.zeros(min(n, 1), dtype=np.int64)
+        lengths = np.diff(np.r_[starts, n])
+        block_of_row = np.repeat(np.arange(len(starts)), lengths)
+
+        first_hour = hours[starts]
+        spans = hours[starts + lengths - 1] - first_hour + 1 if n else np.zeros(0, dtype=np.int64)
+        grid_starts = (np.cumsum(spans) - spans).astype(np.int64)
+
+        self.size = int(spans.sum())
+        self.offset = hours - first_hour[block_of_row]
+        self.slot = grid_starts[block_of_row] + self.offset
+        self.span = spans[block_of_row]
+
+        self.cell_offset = np.arange(self.size) - np.repeat(grid_starts, spans)
+        self.cell_span = np.repeat(spans, spans)
+        self.observed = np.zeros(self.size, dtype=bool)
+        self.observed[self.slot] = True
+
+        is_first = np.zeros(n, dtype=bool)
+        is_first[starts] = True
+        prev_offset = np.r_[0, self.offset[:-1]]
+        self.gap_hours = np.where(is_first, 0, self.offset - prev_offset - 1)
+
+        self._fill_plan = {}
+
+    def scatter(self, x):
+        dense = np.full(self.size, np.nan)
+        dense[self.slot] = x
+        return dense
+
+    def _neighbours(self):
+        """Index of the last observed cell at or before, and the next at or after, every cell."""
+        cells = np.arange(self.size)
+        last = np.maximum.accumulate(np.where(self.observed, cells, -1))
+        nxt = np.minimum.accumulate(np.where(self.observed, cells, self.size)[::-1])[::-1]
+        # Neighbours must sit in the same location block
+        last_ok = (last >= 0) & (cells - last <= self.cell_offset)
+        next_ok = (nxt < self.size) & (nxt - cells < self.cell_span - self.cell_offset)
+        return cells, last, nxt, last_ok, next_ok
+
+    def fill_plan(self, policy, limit):
+        """Cells a policy can fill (observed ones included) plus the gather recipe."""
+        key = (policy, limit)
+        if key in self._fill_plan:
+            return self._fill_plan[key]
+
+        if policy == "null":
+            plan = (self.observed, None)
+        else:
+            cells, last, nxt, last_ok, next_ok = self._neighbours()
+            if policy == "ffill":
+                ok = last_ok & (cells - last <= limit)
+                plan = (ok, (np.where(ok, last, 0),))
+            elif policy == "interpolate":
+                gap = nxt - last - 1
+                ok = self.observed | (last_ok & next_ok & (gap <= limit))
+                lo, hi = np.where(ok, last, 0), np.where(ok, nxt, 0)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    weight = np.where(hi > lo, (cells - lo) / np.maximum(hi - lo, 1), 0.0)
+                plan = (ok, (lo, hi, weight))
+            else:
+                raise ValueError(f"Unknown gap policy: {policy} (expected one of {GAP_POLICIES})")
+
+        self._fill_plan[key] = plan
+        return plan
+
+    def fill(self, dense, policy, limit):
+        ok, recipe = self.fill_plan(policy, limit)
+        if recipe is None:
+            return dense
+        if len(recipe) == 1:
+            filled = dense[recipe[0]]
+        else:
+            lo, hi, weight = recipe
+            filled = dense[lo] + (dense[hi] - dense[lo]) * weight
+        filled[~ok] = np.nan
+        return filled
+
+
+def compile_features(df, names, target=True, rows=None, grid=None,
+                     gap_policy=DEFAULT_GAP_POLICY, gap_limit=DEFAULT_GAP_LIMIT, compact=True):
+    """
+    Compute the named registry features for a frame sorted by
+    (location, timestamp) in one vectorized pass per source column.
+
+    Each source is scattered onto the HourlyGrid once and gap-filled per
+    gap_policy; lags are then takes at cell - k and rolling means / stds
+    are differences of one cumulative sum (and sum of squares) shared by
+    all windows. A window only counts if all of its hours are present
+    after filling. rows selects the output rows (positions into df); the
+    target is always the observed next hour, never an imputed one.
+
+    Sums run in float64; with compact each column is cast to its schema
+    dtype (see data_pipeline.dtypes) as soon as it is produced.
+    """
+    grid = grid if grid is not None else HourlyGrid(df)
+    if rows is None:
+        rows = np.arange(len(df))
+    slot = grid.slot[rows]
+    offset = grid.offset[rows]
+
+    specs = [(name, FEATURES[name]) for name in names]
+    if target:
+        specs.append((TARGET_COLUMN, TARGET))
+
+    out = {}
+
+    def emit(name, values):
+        dtype = compact_dtype(FEATURE_SCHEMA[name]) if compact else None
+        out[name] = values if dtype is None else values.astype(dtype, copy=False)
+
+    ns = None
+    sources = {}
+    for name, spec in specs:
+        if spec.kind == "calendar":
+            if ns is None:
+                ns = _epoch_ns(df["timestamp"])[rows]
+            emit(name, _calendar(ns, spec.param))
+            continue
+
+        if spec.source not in sources:
+            x = df[spec.source].to_numpy(dtype=np.float64)
+            dense = grid.scatter(x)
+            sources[spec.source] = {"dense": dense, "filled": grid.fill(dense, gap_policy, gap_limit)}
+        source = sources[spec.source]
+        k = spec.param
+
+        if spec.kind == "lag":
+            col = source["filled"][np.maximum(slot - k, 0)]
+            col[offset < k] = np.nan
+        elif spec.kind == "lead":
+            end = np.minimum(slot + k, grid.size - 1)
+            col = source["dense"][end]
+            col[offset + k >= grid.span[rows]] = np.nan
+        elif spec.kind in ("roll_mean", "roll_std"):
+            if "csum" not in source:
+                filled = source["filled"]
+                present = ~np.isnan(filled)
+                # Centre first so the running sums stay small and precise
+                mean = filled[present].mean() if present.any() else 0.0
+                centred = np.where(present, filled - mean, 0.0)
+                source["mean"] = mean
+                source["count"] = np.r_[0, np.cumsum(present)]
+                source["csum"] = np.r_[0.0, np.cumsum(centred)]
+                source["csum2"] = np.r_[0.0, np.cumsum(centred * centred)]
+            lo = np.maximum(slot + 1 - k, 0)
+            hi = slot + 1
+            s = source["csum"][hi] - source["csum"][lo]
+            if spec.kind == "roll_mean":
+                col = s / k + source["mean"]
+            else:
+                ss = source["csum2"][hi] - source["csum2"][lo]
+                col = np.sqrt(np.maximum((ss - s * s / k) / (k - 1), 0.0))
+            complete = (offset >= k - 1) & (source["count"][hi] - source["count"][lo] == k)
+            col[~complete] = np.nan
+        else:
+            raise ValueError(f"Unknown feature kind: {spec.kind}")
+
+        emit(name, col)
+
+    emit("gap_hours", grid.gap_hours[rows].astype(np.int32))
+    ok, _ = grid.fill_plan(gap_policy, gap_limit)
+    imputed = np.r_[0, np.cumsum(ok & ~grid.observed)]
+    lo = np.maximum(slot + 1 - np.minimum(IMPUTED_WINDOW, offset + 1), 0)
+    emit(GAP_COLUMNS[1], (imputed[slot + 1] - imputed[lo]).astype(np.int32))
+
+    # Keep the target as the last column
+    if target:
+        out[TARGET_COLUMN] = out.pop(TARGET_COLUMN)
+    return out
+
+
+def lead_targets(df, horizons, source="pm2_5"):
+    """
+    (rows, len(horizons)) matrix of `source` observed h hours after each
+    row of df, for direct multi-horizon training. Looked up on the hourly
+    grid per location, so a missing hour is NaN rather than a later one.
+    Rows keep df's order.
+    """
+    order = np.arange(len(df))
+    if len(df):
+        keys = [_epoch_ns(df["timestamp"])]
+        if "location" in df.columns:
+            keys.append(pd.factorize(df["location"])[0])
+        order = np.lexsort(keys)
+    ordered = df.iloc[order]
+
+    grid = HourlyGrid(ordered)
+    dense = grid.scatter(ordered[source].to_numpy(dtype=np.float64))
+    leads = np.full((len(df), len(horizons)), np.nan)
+    for j, h in enumerate(horizons):
+        ok = grid.offset + h < grid.span
+        leads[order[ok], j] = dense[grid.slot[ok] + h]
+    return leads
+
+
+def build_features(df, feature_columns=None, target=True, dropna=True,
+                   gap_policy=DEFAULT_GAP_POLICY, gap_limit=DEFAULT_GAP_LIMIT, compact=True):
+    """
+    Raw Open-Meteo frame -> feature frame.
+
+    Lags and windows are taken against the real hourly time index (see
+    HourlyGrid), so "lag24" is always 24 hours ago even when hours are
+    missing; gap_policy / gap_limit decide how missing hours are treated.
+    feature_columns limits the derived features to the ones a model needs
+    (see required_features); None computes the whole registry.
+
+    Rows missing any raw value are dropped first and become gaps. With
+    dropna, only rows whose features are complete are returned: warm-up
+    rows of each location, rows the gap policy could not cover and the
+    newest row (no target yet) are dropped.
+
+    compact returns every column in the pipeline dtype policy (float32,
+    small ints, categorical location); compact=False keeps float64.
+    """
+    if gap_policy not in GAP_POLICIES:
+        raise ValueError(f"Unknown gap policy: {gap_policy} (expected one of {GAP_POLICIES})")
+
+    df = df.dropna()
+    keys = ["location", "timestamp"] if "location" in df.columns else ["timestamp"]
+    if not (keys == ["timestamp"] and df["timestamp"].is_monotonic_increasing):
+        df = df.sort_values(keys, kind="stable")
+
+    names = list(FEATURES) if feature_columns is None else required_features(feature_columns)
+    grid = HourlyGrid(df)
+
+    rows = None
+    if dropna:
+        warmup = max((reach(FEATURES[name]) for name in names), default=0)
+        keep = grid.offset >= warmup
+        if target:
+            keep &= grid.offset + TARGET.param < grid.span
+        rows = np.flatnonzero(keep)
+
+    computed = compile_features(
+        df, names, target=target, rows=rows, grid=grid,
+        gap_policy=gap_policy, gap_limit=gap_limit, compact=compact,
+    )
+
+    if rows is not None:
+        complete = np.ones(len(rows), dtype=bool)
+        for col in computed.values():
+            if col.dtype.kind == "f":
+                complete &= ~np.isnan(col)
+        rows = rows[complete]
+        computed = {name: col[complete] for name, col in computed.items()}
+        df = df.iloc[rows]
+    if compact:
+        df = compact_frame(df)
+
+    # Assemble column by column without consolidating into one 2D block,
+    # so the computed arrays are not copied again
+    columns = {column: df[column] for column in df.columns}
+    columns.update({name: pd.Series(col, index=df.index, copy=False) for name, col in computed.items()})
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,256 @@
+import os
+
+import pandas as pd
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING
+
+from data_pipeline.bulk_writer import mongo_client, write_frame
+from data_pipeline.dtypes import compact_frame
+
+load_dotenv()
+
+FEATURE_STORE_BACKEND = os.getenv("FEATURE_STORE_BACKEND", "mongo")
+FEATURE_STORE_PATH = os.getenv("FEATURE_STORE_PATH", "feature_store")
+
+
+# -----------------------------
+# Mongo helpers (shared with ingest_features)
+# -----------------------------
+def ensure_indexes(collection):
+    collection.create_index(
+        [("location", ASCENDING), ("timestamp", ASCENDING)],
+        unique=True,
+        name="location_timestamp_unique",
+    )
+
+
+def _as_utc(ts):
+    ts = pd.Timestamp(ts)
+    # Mongo hands datetimes back as naive UTC
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts
+
+
+def get_high_water_mark(collection, location):
+    """Timestamp of the newest stored feature row for a location (or None)."""
+    latest = collection.find_one(
+        {"location": location},
+        sort=[("timestamp", DESCENDING)],
+        projection={"timestamp": 1, "_id": 0},
+    )
+    if not latest:
+        return None
+    return _as_utc(latest["timestamp"])
+
+
+def write_incremental(collection, features_df):
+    """Upsert rows keyed on (location, timestamp) in chunked unordered bulk writes."""
+    if features_df.empty:
+        return 0
+
+    stats = write_frame(collection, features_df, key=["location", "timestamp"])
+    print(f"✅ Upserted {stats}")
+    return stats.docs
+
+
+# -----------------------------
+# Feature store interface
+# -----------------------------
+class FeatureStore:
+    """
+    Read/write access to engineered feature rows keyed by (location, timestamp).
+
+    read() takes the columns to load and an optional [start, end) time range
+    and location filter, so backends can push both down to storage. The
+    (location, timestamp) key is always returned, sorted, ahead of the
+    requested columns. Frames come back in the compact dtype policy
+    (see data_pipeline.dtypes) whatever the storage format holds.
+    """
+
+    def write(self, features_df):
+        raise NotImplementedError
+
+    def read(self, columns=None, start=None, end=None, locations=None):
+        raise NotImplementedError
+
+    def high_water_mark(self, location):
+        raise NotImplementedError
+
+    def latest_rows(self, location, n=1, columns=None):
+        """The newest n rows for a location, oldest first."""
+        hwm = self.high_water_mark(location)
+        if hwm is None:
+            return _empty_frame(columns)
+        # Rows are hourly, so n rows fit in the last n hours (fewer if gappy)
+        start = hwm - pd.Timedelta(hours=n - 1)
+        df = self.read(columns=columns, start=start, locations=[location])
+        return df.tail(n).reset_index(drop=True)
+
+
+class MongoFeatureStore(FeatureStore):
+    def __init__(self, collection):
+        self.collection = collection
+
+    def write(self, features_df):
+        ensure_indexes(self.collection)
+        return write_incremental(self.collection, features_df)
+
+    def read(self, columns=None, start=None, end=None, locations=None):
+        query = {}
+        if start is not None or end is not None:
+            query["timestamp"] = {}
+            if start is not None:
+                query["timestamp"]["$gte"] = _as_utc(start).to_pydatetime()
+            if end is not None:
+                query["timestamp"]["$lt"] = _as_utc(end).to_pydatetime()
+        if locations is not None:
+            query["location"] = {"$in": list(locations)}
+
+        projection = {"_id": 0}
+        if columns is not None:
+            projection.update({c: 1 for c in _with_keys(columns)})
+
+        cursor = self.collection.find(query, projection).sort(
+            [("location", ASCENDING), ("timestamp", ASCENDING)]
+        )
+        df = pd.DataFrame(list(cursor))
+        if df.empty:
+            return _empty_frame(columns)
+
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+        if columns is not None:
+            df = df[_with_keys(columns)]
+        # BSON only has doubles and int64
+        return compact_frame(df)
+
+    def high_water_mark(self, location):
+        return get_high_water_mark(self.collection, location)
+
+
+class ParquetFeatureStore(FeatureStore):
+    """
+    Local Parquet dataset, hive-partitioned as location=<name>/year_month=<YYYY-MM>.
+
+    Reads prune partitions on location and year_month, push the timestamp range
+    into the Parquet row-group statistics and only decode the requested
+    columns. Monthly files (~720 rows per station) keep file counts low;
+    day-sized files are too small for Parquet to pay off.
+    """
+
+    def __init__(self, root=FEATURE_STORE_PATH):
+        self.root = root
+
+    @staticmethod
+    def _partitioning():
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        return ds.partitioning(
+            pa.schema([("location", pa.string()), ("year_month", pa.string())]),
+            flavor="hive",
+        )
+
+    def _partition_dir(self, location, month):
+        return os.path.join(self.root, f"location={location}", f"year_month={month}")
+
+    def _dataset(self):
+        import pyarrow.dataset as ds
+
+        if not os.path.isdir(self.root):
+            return None
+        return ds.dataset(self.root, format="parquet", partitioning=self._partitioning())
+
+    def write(self, features_df):
+        """Upsert rows: each touched (location, month) partition is merged and rewritten."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if features_df.empty:
+            return 0
+
+        features_df = features_df.copy()
+        features_df["timestamp"] = pd.to_datetime(features_df["timestamp"], utc=True)
+        months = features_df["timestamp"].dt.strftime("%Y-%m")
+
+        for (location, month), part in features_df.groupby([features_df["location"], months]):
+            part_dir = self._partition_dir(location, month)
+            part_file = os.path.join(part_dir, "part-0.parquet")
+            part = part.drop(columns=["location"])
+
+            if os.path.exists(part_file):
+                existing = pq.read_table(part_file).to_pandas()
+                part = pd.concat([existing, part], ignore_index=True)
+                part = part.drop_duplicates("timestamp", keep="last")
+
+            part = part.sort_values("timestamp")
+            os.makedirs(part_dir, exist_ok=True)
+            tmp_file = part_file + ".tmp"
+            pq.write_table(pa.Table.from_pandas(part, preserve_index=False), tmp_file)
+            os.replace(tmp_file, part_file)
+
+        return len(features_df)
+
+    def read(self, columns=None, start=None, end=None, locations=None):
+        import pyarrow.dataset as ds
+
+        dataset = self._dataset()
+        if dataset is None:
+            return _empty_frame(columns)
+
+        predicate = None
+
+        def _and(expr):
+            return expr if predicate is None else predicate & expr
+
+        if locations is not None:
+            predicate = _and(ds.field("location").isin(list(locations)))
+        if start is not None:
+            start = _as_utc(start)
+            predicate = _and(ds.field("year_month") >= start.strftime("%Y-%m"))
+            predicate = _and(ds.field("timestamp") >= start)
+        if end is not None:
+            end = _as_utc(end)
+            predicate = _and(ds.field("year_month") <= end.strftime("%Y-%m"))
+            predicate = _and(ds.field("timestamp") < end)
+
+        load_columns = None if columns is None else _with_keys(columns)
+        table = dataset.to_table(columns=load_columns, filter=predicate)
+        df = table.to_pandas()
+        if "year_month" in df.columns:
+            df = df.drop(columns=["year_month"])
+
+        df = df.sort_values(["location", "timestamp"], ignore_index=True)
+        if columns is not None:
+            df = df[_with_keys(columns)]
+        return compact_frame(df)
+
+    def high_water_mark(self, location):
+        location_dir = os.path.join(self.root, f"location={location}")
+        if not os.path.isdir(location_dir):
+            return None
+
+        months = sorted(d for d in os.listdir(location_dir) if d.startswith("year_month="))
+        if not months:
+            return None
+        start = months[-1][len("year_month="):] + "-01"
+        latest = self.read(columns=["timestamp"], start=start, locations=[location])
+        return latest["timestamp"].max() if not latest.empty else None
+
+
+def _empty_frame(columns):
+    return pd.DataFrame(columns=None if columns is None else _with_keys(columns))
+
+
+def _with_keys(columns):
+    """Requested columns plus the (location, timestamp) key, order preserved."""
+    return list(dict.fromkeys(["location", "timestamp", *columns]))
+
+
+def get_feature_store(backend=FEATURE_STORE_BACKEND, collection=None, path=FEATURE_STORE_PATH):
+    if backend == "mongo":
+        if collection is None:
+            client = mongo_client()
+            collection = client["aqi_project"]["features"]
+        return MongoFeatureStore(collection)
+    if backend == "parquet":
+        return ParquetFeatureStore(path)
+    raise ValueError(f"Unknown feature store backend: {backend}")
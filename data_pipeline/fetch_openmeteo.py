@@ -2,96 +2,161 @@ import openmeteo_requests
 import pandas as pd
 import requests_cache
 from retry_requests import retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+from config.locations import LOCATIONS
+from data_pipeline.dtypes import compact_frame
+
 LAT = 24.8607
 LON = 67.0011
 
+AIR_QUALITY_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+WEATHER_URL = "https://api.open-meteo.com/v1/forecast"
 
-def fetch_openmeteo_data():
-    # -----------------------------
-    # Date range (last 90 days)
-    # -----------------------------
-    end_date = datetime.utcnow().date()
-    start_date = end_date - timedelta(days=90)
+AIR_VARIABLES = {
+    "pm2_5": "pm2_5",
+    "pm10": "pm10",
+}
 
-    start_date_str = start_date.strftime("%Y-%m-%d")
-    end_date_str = end_date.strftime("%Y-%m-%d")
+WEATHER_VARIABLES = {
+    "temperature_2m": "temperature",
+    "relative_humidity_2m": "humidity",
+    "wind_speed_10m": "wind_speed",
+    "wind_direction_10m": "wind_direction",
+    "surface_pressure": "pressure",
+}
 
-    # -----------------------------
-    # Setup Open-Meteo client
-    # -----------------------------
-    cache_session = requests_cache.CachedSession(".cache", expire_after=3600)
+# Coordinates sent in one multi-location request, and requests in flight
+MAX_COORDINATES_PER_REQUEST = 50
+MAX_WORKERS = 8
+
+# History is requested one UTC day at a time. Closed days have a stable
+# URL and are kept in the local cache forever; the open days at the end
+# of the window (today, plus yesterday while late data settles) are
+# always refetched.
+CACHE_NAME = ".cache"
+OPEN_DAYS = 2
+
+
+def make_client(cache_name=CACHE_NAME, backend="sqlite"):
+    cache_session = requests_cache.CachedSession(
+        cache_name, backend=backend, expire_after=requests_cache.NEVER_EXPIRE
+    )
     retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-    openmeteo = openmeteo_requests.Client(session=retry_session)
+    return openmeteo_requests.Client(session=retry_session)
+
+
+def _history_days(days=90, open_days=OPEN_DAYS):
+    """(YYYY-MM-DD, expire_after) for each day of the window, oldest first."""
+    end_date = datetime.utcnow().date()
+    history = []
+    for offset in range(days, -1, -1):
+        day = end_date - timedelta(days=offset)
+        if offset < open_days:
+            expire_after = requests_cache.DO_NOT_CACHE
+        else:
+            expire_after = requests_cache.NEVER_EXPIRE
+        history.append((day.strftime("%Y-%m-%d"), expire_after))
+    return history
 
-    # -----------------------------
-    # AIR QUALITY API
-    # -----------------------------
-    air_quality_url = "https://air-quality-api.open-meteo.com/v1/air-quality"
-    air_params = {
-        "latitude": LAT,
-        "longitude": LON,
-        "hourly": ["pm2_5", "pm10"],
-        "start_date": start_date_str,
-        "end_date": end_date_str,
-    }
 
-    air_response = openmeteo.weather_api(air_quality_url, params=air_params)[0]
-    air_hourly = air_response.Hourly()
+def _hourly_frame(response, variables):
+    """Turn one Open-Meteo response into a timestamp-indexed frame."""
+    hourly = response.Hourly()
 
-    air_df = pd.DataFrame({
+    data = {
         "timestamp": pd.date_range(
-            start=pd.to_datetime(air_hourly.Time(), unit="s", utc=True),
-            end=pd.to_datetime(air_hourly.TimeEnd(), unit="s", utc=True),
-            freq=pd.Timedelta(seconds=air_hourly.Interval()),
+            start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
+            end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
+            freq=pd.Timedelta(seconds=hourly.Interval()),
             inclusive="left"
-        ),
-        "pm2_5": air_hourly.Variables(0).ValuesAsNumpy(),
-        "pm10": air_hourly.Variables(1).ValuesAsNumpy(),
-    })
+        )
+    }
+    for i, column in enumerate(variables.values()):
+        data[column] = hourly.Variables(i).ValuesAsNumpy()
 
-    # -----------------------------
-    # WEATHER API
-    # -----------------------------
-    weather_url = "https://api.open-meteo.com/v1/forecast"
-    weather_params = {
-        "latitude": LAT,
-        "longitude": LON,
-        "hourly": [
-            "temperature_2m",
-            "relative_humidity_2m",
-            "wind_speed_10m",
-            "wind_direction_10m",
-            "surface_pressure"
-        ],
-        "start_date": start_date_str,
-        "end_date": end_date_str,
+    return pd.DataFrame(data)
+
+
+def _fetch_batch(client, url, variables, batch, day, expire_after):
+    """One multi-coordinate request for one day; returns a long frame keyed by location."""
+    params = {
+        "latitude": ",".join(str(loc["latitude"]) for loc in batch),
+        "longitude": ",".join(str(loc["longitude"]) for loc in batch),
+        "hourly": list(variables),
+        "start_date": day,
+        "end_date": day,
     }
+    responses = client.weather_api(url, params=params, expire_after=expire_after)
 
-    weather_response = openmeteo.weather_api(weather_url, params=weather_params)[0]
-    weather_hourly = weather_response.Hourly()
+    # Responses come back in the order the coordinates were sent
+    frames = []
+    for loc, response in zip(batch, responses):
+        frame = _hourly_frame(response, variables)
+        frame.insert(0, "location", loc["name"])
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True)
 
-    weather_df = pd.DataFrame({
-        "timestamp": pd.date_range(
-            start=pd.to_datetime(weather_hourly.Time(), unit="s", utc=True),
-            end=pd.to_datetime(weather_hourly.TimeEnd(), unit="s", utc=True),
-            freq=pd.Timedelta(seconds=weather_hourly.Interval()),
-            inclusive="left"
-        ),
-        "temperature": weather_hourly.Variables(0).ValuesAsNumpy(),
-        "humidity": weather_hourly.Variables(1).ValuesAsNumpy(),
-        "wind_speed": weather_hourly.Variables(2).ValuesAsNumpy(),
-        "wind_direction": weather_hourly.Variables(3).ValuesAsNumpy(),
-        "pressure": weather_hourly.Variables(4).ValuesAsNumpy(),
-    })
+
+def fetch_openmeteo_locations(
+    locations=LOCATIONS,
+    days=90,
+    open_days=OPEN_DAYS,
+    client=None,
+    batch_size=MAX_COORDINATES_PER_REQUEST,
+    max_workers=MAX_WORKERS,
+    air_quality_url=AIR_QUALITY_URL,
+    weather_url=WEATHER_URL,
+):
+    """
+    Fetch air quality + weather history for many stations.
+
+    Coordinates are grouped into multi-location requests of batch_size,
+    and history is requested per UTC day so closed days are served from the
+    local cache (see _history_days). The air and weather requests for every
+    (day, batch) run concurrently on at most max_workers threads. Returns
+    one long frame with a `location` column, inner-joined on
+    (location, timestamp), in the compact dtype policy (float32
+    measurements as sent by the API, categorical location).
+
+    client must wrap a requests_cache session (see make_client), since the
+    per-day expiry is passed through to it.
+    """
+    if client is None:
+        client = make_client()
+
+    history = _history_days(days, open_days)
+    batches = [locations[i:i + batch_size] for i in range(0, len(locations), batch_size)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        air_futures = [
+            pool.submit(_fetch_batch, client, air_quality_url, AIR_VARIABLES, batch, day, expire_after)
+            for day, expire_after in history
+            for batch in batches
+        ]
+        weather_futures = [
+            pool.submit(_fetch_batch, client, weather_url, WEATHER_VARIABLES, batch, day, expire_after)
+            for day, expire_after in history
+            for batch in batches
+        ]
+        air_df = pd.concat([f.result() for f in air_futures], ignore_index=True)
+        weather_df = pd.concat([f.result() for f in weather_futures], ignore_index=True)
 
     # -----------------------------
     # Merge Air + Weather
     # -----------------------------
-    df = pd.merge(air_df, weather_df, on="timestamp", how="inner")
+    df = pd.merge(air_df, weather_df, on=["location", "timestamp"], how="inner")
+    df = df.sort_values(["location", "timestamp"], ignore_index=True)
+    return compact_frame(df)
+
 
-    return df
+def fetch_openmeteo_data():
+    """Single-station (Karachi) history, without the location column."""
+    location = {"name": "karachi", "latitude": LAT, "longitude": LON}
+    df = fetch_openmeteo_locations([location])
+    return df.drop(columns=["location"])
 
 
 if __name__ == "__main__":
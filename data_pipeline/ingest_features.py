@@ -1,32 +1,221 @@
-from pymongo import MongoClient
-from pymongo.server_api import ServerApi
-from data_pipeline.fetch_openmeteo import fetch_openmeteo_data
-from data_pipeline.feature_engineering import engineer_features
+import argparse
 import os
+
+import pandas as pd
 from dotenv import load_dotenv
+from pymongo.server_api import ServerApi
+
+from config.locations import DEFAULT_LOCATION, LOCATIONS
+from data_pipeline.bulk_writer import mongo_client, write_frame
+from data_pipeline.dtypes import compact_frame
+from data_pipeline.fetch_openmeteo import fetch_openmeteo_locations
+from data_pipeline.feature_engineering import engineer_features
+from data_pipeline.feature_spec import DEFAULT_GAP_LIMIT, TARGET
+from data_pipeline.validate_schema import validate_frame
+from data_pipeline.feature_store import (
+    FEATURE_STORE_BACKEND,
+    ensure_indexes,
+    get_feature_store,
+    get_high_water_mark,
+    write_incremental,
+)
+from data_pipeline.streaming_features import load_engine, save_engine
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 
-client = MongoClient(MONGO_URI, server_api=ServerApi("1"))
+client = mongo_client(MONGO_URI, server_api=ServerApi("1"))
 db = client["aqi_project"]
 collection = db["features"]
+# Streaming feature engine state per location, carried between hourly runs
+state_collection = db["feature_state"]
+
+LOCATION = DEFAULT_LOCATION
+
+# Hours of raw history engineer_features needs before a row to fill its
+# longest lag / rolling window (pm2_5_lag24, pm2_5_roll_mean_24), plus the
+# longest gap a filling policy may bridge at the far end.
+LOOKBACK_HOURS = 24 + DEFAULT_GAP_LIMIT
+
+
+# -----------------------------
+# Legacy rows
+# -----------------------------
+def adopt_legacy_rows(collection):
+    """
+    Tag rows written before the location key existed with DEFAULT_LOCATION,
+    the only station there was then, so they are not duplicated.
+    """
+    collection.update_many(
+        {"location": {"$exists": False}},
+        {"$set": {"location": DEFAULT_LOCATION}},
+    )
 
 
-def run_pipeline():
-    print("Fetching raw data...")
-    raw_df = fetch_openmeteo_data()
+# -----------------------------
+# Feature computation
+# -----------------------------
+def compute_new_features(raw_df, location, hwm=None):
+    """
+    Engineer only the feature rows newer than the high-water mark.
+
+    The raw frame is cut down to the new hours plus LOOKBACK_HOURS of
+    history, so the work done scales with the new hours rather than the
+    length of the fetched window. The cut is by time, not rows, so missing
+    hours cannot pull older rows into a lag.
+    """
+    raw_df = raw_df.dropna().sort_values("timestamp").reset_index(drop=True)
+
+    if hwm is not None:
+        cutoff = hwm - pd.Timedelta(hours=LOOKBACK_HOURS)
+        raw_df = raw_df[raw_df["timestamp"] > cutoff]
 
-    print("Engineering features...")
     features_df = engineer_features(raw_df)
 
-    print("Storing in MongoDB...")
-    collection.delete_many({})  # avoid duplication
-    collection.insert_many(features_df.to_dict("records"))
+    if hwm is not None:
+        features_df = features_df[features_df["timestamp"] > hwm]
+
+    features_df = features_df.copy()
+    features_df["location"] = location
+    return check_features(features_df)
+
+
+def stream_new_features(raw_df, location, engine, hwm=None):
+    """
+    The feature rows newer than the high-water mark from a location's
+    StreamingFeatureEngine, which carries the last 24 hours between runs:
+    only observations it has not seen yet are fed to it, O(1) each. Rows
+    come out one hour late, once their target is observed, like the batch
+    path.
+
+    The engine only resumes when it stopped exactly one hour past the mark,
+    i.e. its last row is the newest one in this store. Otherwise (an empty
+    or rebuilt store, another backend, a write that failed after the state
+    was saved, hours that produced no row) it is reset and warmed up on
+    LOOKBACK_HOURS before the mark, or on the whole window when there is
+    no mark, so the store gets exactly what the batch path would write.
+    """
+    raw_df = raw_df.sort_values("timestamp")
+    resumable = hwm is not None and engine.last_timestamp == hwm + TARGET.param * pd.Timedelta(hours=1)
+    if resumable:
+        raw_df = raw_df[raw_df["timestamp"] > engine.last_timestamp]
+    else:
+        engine.reset()
+        if hwm is not None:
+            raw_df = raw_df[raw_df["timestamp"] > hwm - pd.Timedelta(hours=LOOKBACK_HOURS)]
+
+    features_df = engine.update_frame(raw_df, labeled=True)
+    if features_df.empty:
+        return features_df
+    if hwm is not None:
+        features_df = features_df[features_df["timestamp"] > hwm]
+
+    features_df = compact_frame(features_df)
+    features_df["location"] = location
+    return check_features(features_df)
+
+
+def check_features(features_df):
+    """Columnar schema validation; nothing is written if it fails."""
+    report = validate_frame(features_df)
+    for warning in report.warnings:
+        print(f"⚠ {warning['column']}: {warning['check']} ({warning['detail']})")
+    report.raise_if_invalid()
+    return features_df
+
+
+# -----------------------------
+# Writers
+# -----------------------------
+def write_full(collection, features_df):
+    """
+    Legacy mode: replace the collection with the whole frame.
+
+    The frame is loaded into a staging collection which is then renamed
+    over the live one, so readers see either the old rows or the new
+    ones, never an empty or half-written collection.
+    """
+    staging = collection.database[f"{collection.name}_staging"]
+    staging.drop()
+    ensure_indexes(staging)
+    if not features_df.empty:
+        stats = write_frame(staging, features_df)
+        print(f"✅ Inserted {stats}")
+    staging.rename(collection.name, dropTarget=True)
+    return len(features_df)
+
+
+def ingest_full(collection, raw_df, location=LOCATION):
+    features_df = engineer_features(raw_df)
+    features_df["location"] = location
+    return write_full(collection, check_features(features_df))
+
+
+def ingest_full_locations(collection, raw_df):
+    """Full reload of a long multi-location frame from fetch_openmeteo_locations."""
+    features_df = engineer_features(raw_df)
+    return write_full(collection, check_features(features_df))
+
+
+def _new_features(raw_df, location, hwm, engine):
+    if engine is None:
+        return compute_new_features(raw_df, location, hwm)
+    return stream_new_features(raw_df, location, engine, hwm)
+
+
+def ingest_incremental(collection, raw_df, location=LOCATION, engine=None):
+    """Upsert the new feature rows; with engine, computed by streaming instead of batch."""
+    ensure_indexes(collection)
+    adopt_legacy_rows(collection)
+    hwm = get_high_water_mark(collection, location)
+    features_df = _new_features(raw_df, location, hwm, engine)
+    return write_incremental(collection, features_df)
+
+
+def ingest_into_store(store, raw_df, location=LOCATION, engine=None):
+    """Incremental ingestion into any FeatureStore backend."""
+    hwm = store.high_water_mark(location)
+    features_df = _new_features(raw_df, location, hwm, engine)
+    return store.write(features_df)
+
+
+def run_pipeline(mode="incremental", locations=LOCATIONS, backend=FEATURE_STORE_BACKEND):
+    if mode not in ("full", "incremental"):
+        raise ValueError(f"Unknown ingest mode: {mode}")
+    if mode == "full" and backend != "mongo":
+        raise ValueError("Full reloads are only supported for the mongo backend")
+
+    print(f"Fetching raw data for {len(locations)} location(s)...")
+    raw_df = fetch_openmeteo_locations(locations)
+
+    print(f"Engineering features and storing in the {backend} feature store ({mode})...")
+    if mode == "full":
+        written = ingest_full_locations(collection, raw_df)
+    else:
+        written = 0
+        for location, location_df in raw_df.groupby("location", sort=False):
+            location_df = location_df.drop(columns=["location"])
+            engine = load_engine(state_collection, location)
+            if backend == "mongo":
+                written += ingest_incremental(collection, location_df, location, engine)
+            else:
+                store = get_feature_store(backend)
+                written += ingest_into_store(store, location_df, location, engine)
+            # Only once the rows are stored, so a failed write is streamed again
+            save_engine(state_collection, location, engine)
 
+    print(f"Rows written: {written}")
     print("✅ Feature pipeline completed successfully")
 
 
 if __name__ == "__main__":
-    run_pipeline()
+    parser = argparse.ArgumentParser(description="Hourly feature ingestion")
+    parser.add_argument(
+        "--mode",
+        choices=["incremental", "full"],
+        default="incremental",
+        help="incremental upserts new hours only; full wipes and reloads",
+    )
+    args = parser.parse_args()
+    run_pipeline(mode=args.mode)
@@ -0,0 +1,320 @@
+import math
+
+import pandas as pd
+
+from data_pipeline.feature_spec import FEATURES, GAP_COLUMNS, TARGET, TARGET_COLUMN, reach
+
+
+def _source_windows():
+    """
+    {source: windows summed over it} for every source a lag or window of
+    the feature registry reads. The registry is built from
+    config.feature_schema, so the engine emits exactly the columns
+    engineer_features does, in the same order.
+    """
+    windows = {}
+    for spec in FEATURES.values():
+        if spec.kind == "calendar":
+            continue
+        windows.setdefault(spec.source, set())
+        if spec.kind in ("roll_mean", "roll_std"):
+            windows[spec.source].add(spec.param)
+    return {source: tuple(sorted(w)) for source, w in windows.items()}
+
+
+SOURCE_WINDOWS = _source_windows()
+ROLL_WINDOWS = SOURCE_WINDOWS.get("pm2_5", ())
+
+# The current value plus the longest lookback of any feature
+CAPACITY = max(reach(spec) for spec in FEATURES.values()) + 1
+HOUR = pd.Timedelta(hours=1)
+
+# Running sums are rebuilt from the ring buffer this often to stop
+# floating-point drift from accumulating over months of updates.
+RESYNC_EVERY = 1024
+
+# 2: buffer layout and the row waiting for its target are stored too
+STATE_VERSION = 2
+
+
+class RingBuffer:
+    """
+    Fixed-size history of one series with running sums per window.
+
+    Missing hours are pushed as NaN; they are left out of the sums and
+    counted per window instead, so a window touching one reads as NaN.
+    """
+
+    def __init__(self, capacity=CAPACITY, windows=ROLL_WINDOWS):
+        self.capacity = capacity
+        self.windows = tuple(windows)
+        self.values = [0.0] * capacity
+        self.head = -1          # slot of the newest value
+        self.count = 0          # values seen, capped at capacity
+        self.sums = {w: 0.0 for w in self.windows}
+        self.sumsqs = {w: 0.0 for w in self.windows}
+        self.missing = {w: 0 for w in self.windows}
+
+    def lag(self, k):
+        """Value k steps before the newest one (0 = newest), or NaN."""
+        if k >= self.count:
+            return math.nan
+        return self.values[(self.head - k) % self.capacity]
+
+    def push(self, value):
+        for w in self.windows:
+            # Value leaving the window once the new one is in
+            if w - 1 < self.count:
+                leaving = self.lag(w - 1)
+                if math.isnan(leaving):
+                    self.missing[w] -= 1
+                else:
+                    self.sums[w] -= leaving
+                    self.sumsqs[w] -= leaving * leaving
+            if math.isnan(value):
+                self.missing[w] += 1
+            else:
+                self.sums[w] += value
+                self.sumsqs[w] += value * value
+
+        self.head = (self.head + 1) % self.capacity
+        self.values[self.head] = value
+        self.count = min(self.count + 1, self.capacity)
+
+    def resync(self):
+        for w in self.windows:
+            window = [self.lag(k) for k in range(min(w, self.count))]
+            present = [v for v in window if not math.isnan(v)]
+            self.sums[w] = math.fsum(present)
+            self.sumsqs[w] = math.fsum(v * v for v in present)
+            self.missing[w] = len(window) - len(present)
+
+    def mean(self, w):
+        if self.count < w or self.missing[w]:
+            return math.nan
+        return self.sums[w] / w
+
+    def std(self, w):
+        """Sample standard deviation (ddof=1), like pandas rolling().std()."""
+        if self.count < w or self.missing[w]:
+            return math.nan
+        var = (self.sumsqs[w] - self.sums[w] * self.sums[w] / w) / (w - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+    def to_state(self):
+        return {
+            "values": [self.lag(k) for k in range(self.count)][::-1],
+            "sums": {str(w): s for w, s in self.sums.items()},
+            "sumsqs": {str(w): s for w, s in self.sumsqs.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state, capacity=CAPACITY, windows=ROLL_WINDOWS):
+        buf = cls(capacity, windows)
+        values = state["values"][-capacity:]
+        for i, value in enumerate(values):
+            buf.values[i] = float(value)
+        buf.count = len(values)
+        buf.head = buf.count - 1
+        buf.sums = {w: float(state["sums"][str(w)]) for w in buf.windows}
+        buf.sumsqs = {w: float(state["sumsqs"][str(w)]) for w in buf.windows}
+        buf.missing = {
+            w: sum(math.isnan(buf.lag(k)) for k in range(min(w, buf.count))) for w in buf.windows
+        }
+        return buf
+
+
+class StreamingFeatureEngine:
+    """
+    Incremental counterpart of engineer_features.
+
+    Feed observations one hour at a time with update(); each call returns
+    the feature row for that hour in O(1), or None when engineer_features
+    would drop it: during the first 24 hours, and while a lag or window
+    still reaches into a missing hour. Skipped hours are detected from the
+    timestamps and treated like the "null" gap policy. The target column
+    is not produced since it needs the next observation; update_labeled()
+    returns each row one hour late, with its target, as engineer_features
+    (and so the features collection) has it.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget everything seen so far."""
+        self.buffers = {source: RingBuffer(windows=windows) for source, windows in SOURCE_WINDOWS.items()}
+        self.last_timestamp = None
+        self.updates = 0
+        self.pending = None     # newest emitted row, waiting for the next hour's target
+
+    @property
+    def ready(self):
+        return all(buf.count >= CAPACITY for buf in self.buffers.values())
+
+    def update(self, observation):
+        """
+        observation: mapping with timestamp, pm2_5, pm10 and the weather
+        columns returned by fetch_openmeteo_data.
+        """
+        # engineer_features drops incomplete rows before shifting, so
+        # they turn into a missing hour
+        if any(_is_missing(v) for v in observation.values()):
+            return None
+
+        timestamp = pd.Timestamp(observation["timestamp"])
+        gap_hours = 0
+        if self.last_timestamp is not None:
+            gap_hours = int((timestamp - self.last_timestamp) // HOUR) - 1
+            if gap_hours < 0:
+                # Already seen (or out of order): nothing new to emit
+                return None
+            for _ in range(min(gap_hours, CAPACITY)):
+                for buf in self.buffers.values():
+                    buf.push(math.nan)
+
+        for source, buf in self.buffers.items():
+            buf.push(float(observation[source]))
+        self.last_timestamp = timestamp
+
+        self.updates += 1
+        if self.updates % RESYNC_EVERY == 0:
+            for buf in self.buffers.values():
+                buf.resync()
+
+        if not self.ready:
+            return None
+
+        row = self._feature_row(observation, timestamp, gap_hours)
+        if any(_is_missing(v) for v in row.values()):
+            return None
+        return row
+
+    def _feature_row(self, observation, timestamp, gap_hours=0):
+        row = dict(observation)
+        row["timestamp"] = timestamp
+
+        for name, spec in FEATURES.items():
+            if spec.kind == "calendar":
+                row[name] = getattr(timestamp, spec.param)
+            elif spec.kind == "lag":
+                row[name] = self.buffers[spec.source].lag(spec.param)
+            elif spec.kind == "roll_mean":
+                row[name] = self.buffers[spec.source].mean(spec.param)
+            elif spec.kind == "roll_std":
+                row[name] = self.buffers[spec.source].std(spec.param)
+            else:
+                raise ValueError(f"Unknown feature kind: {spec.kind}")
+
+        # Missing hours are never imputed here
+        row[GAP_COLUMNS[0]] = gap_hours
+        row[GAP_COLUMNS[1]] = 0
+        return row
+
+    def update_labeled(self, observation):
+        """
+        Feed one observation like update() and return the previous hour's
+        row completed with its target (this hour's value), or None: when
+        that row was not emitted, or this is not the very next hour.
+        """
+        previous, before = self.pending, self.last_timestamp
+        row = self.update(observation)
+        if self.last_timestamp == before:
+            # Incomplete or already seen: the hour did not happen
+            return None
+
+        self.pending = row
+        if previous is None or self.last_timestamp - previous["timestamp"] != TARGET.param * HOUR:
+            return None
+        return {**previous, TARGET_COLUMN: float(observation[TARGET.source])}
+
+    def update_frame(self, df, labeled=False):
+        """
+        Feed a raw frame in timestamp order and return the emitted rows
+        (with labeled, the rows update_labeled() completes).
+        """
+        update = self.update_labeled if labeled else self.update
+        rows = []
+        for observation in df.sort_values("timestamp").to_dict("records"):
+            row = update(observation)
+            if row is not None:
+                rows.append(row)
+        return pd.DataFrame(rows)
+
+    # -----------------------------
+    # State persistence
+    # -----------------------------
+    def to_state(self):
+        """JSON / BSON-ready state."""
+        pending = None
+        if self.pending is not None:
+            pending = {
+                name: value.isoformat() if name == "timestamp" else _native(value)
+                for name, value in self.pending.items()
+            }
+        return {
+            "version": STATE_VERSION,
+            "capacity": CAPACITY,
+            "windows": {source: list(windows) for source, windows in SOURCE_WINDOWS.items()},
+            **{source: buf.to_state() for source, buf in self.buffers.items()},
+            "last_timestamp": (
+                self.last_timestamp.isoformat() if self.last_timestamp is not None else None
+            ),
+            "updates": self.updates,
+            "pending": pending,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(f"Unsupported feature state version: {state.get('version')}")
+        layout = {source: tuple(windows) for source, windows in state["windows"].items()}
+        if state["capacity"] != CAPACITY or layout != SOURCE_WINDOWS:
+            raise ValueError("Feature state was saved for a different feature schema")
+
+        engine = cls()
+        engine.buffers = {
+            source: RingBuffer.from_state(state[source], windows=windows)
+            for source, windows in SOURCE_WINDOWS.items()
+        }
+        if state["last_timestamp"] is not None:
+            engine.last_timestamp = pd.Timestamp(state["last_timestamp"])
+        engine.updates = state["updates"]
+        if state["pending"] is not None:
+            engine.pending = {**state["pending"], "timestamp": pd.Timestamp(state["pending"]["timestamp"])}
+        return engine
+
+
+def save_engine(collection, location, engine):
+    collection.replace_one(
+        {"location": location},
+        {"location": location, "state": engine.to_state()},
+        upsert=True,
+    )
+
+
+def load_engine(collection, location):
+    """
+    Resume the stored engine for a location, or start a fresh one when
+    there is none or it no longer fits the feature schema.
+    """
+    doc = collection.find_one({"location": location})
+    if not doc:
+        return StreamingFeatureEngine()
+    try:
+        return StreamingFeatureEngine.from_state(doc["state"])
+    except (KeyError, ValueError) as exc:
+        print(f"⚠ Feature state for {location} discarded ({exc}); rebuilding it from raw history")
+        return StreamingFeatureEngine()
+
+
+def _native(value):
+    """Python scalar for numpy ones, which BSON cannot encode."""
+    return value.item() if hasattr(value, "item") else value
+
+
+def _is_missing(value):
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
@@ -1,12 +1,135 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
 from config.feature_schema import FEATURE_SCHEMA
 
+_DTYPE_KINDS = {
+    "float": "f",
+    "int": "iu",
+    "datetime": "M",
+}
+
+
+@dataclass
+class ValidationReport:
+    rows: int
+    errors: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+    null_counts: dict = field(default_factory=dict)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def add(self, level, column, check, detail):
+        issues = self.errors if level == "error" else self.warnings
+        issues.append({"column": column, "check": check, "detail": detail})
+
+    def raise_if_invalid(self):
+        if self.errors:
+            summary = "; ".join(
+                f"{e['column']}: {e['check']} ({e['detail']})" for e in self.errors
+            )
+            raise ValueError(f"Feature validation failed for {self.rows} rows: {summary}")
+
+
+def _dtype_ok(series, kind):
+    if kind == "string":
+        return (
+            pd.api.types.is_object_dtype(series)
+            or pd.api.types.is_string_dtype(series)
+            or isinstance(series.dtype, pd.CategoricalDtype)
+        )
+    if kind == "datetime":
+        return pd.api.types.is_datetime64_any_dtype(series)
+    return series.dtype.kind in _DTYPE_KINDS[kind]
+
+
+def _check_timestamps(df, report):
+    """Timestamps must be on the hour and strictly increasing per location."""
+    ts = df["timestamp"]
+    values = ts.to_numpy(dtype="datetime64[ns]").view("i8")
+
+    off_hour = int(np.count_nonzero(values % 3_600_000_000_000))
+    if off_hour:
+        report.add("error", "timestamp", "hourly", f"{off_hour} timestamps not on the hour")
+
+    if "location" in df.columns:
+        codes = pd.factorize(df["location"])[0]
+        order = np.argsort(codes, kind="stable")
+        codes, values = codes[order], values[order]
+        same_location = codes[1:] == codes[:-1]
+    else:
+        same_location = np.ones(len(values) - 1, dtype=bool)
+
+    step = np.diff(values)
+    not_increasing = int(np.count_nonzero(same_location & (step <= 0)))
+    if not_increasing:
+        report.add("error", "timestamp", "monotonic", f"{not_increasing} rows not after the previous row")
+
+    gaps = int(np.count_nonzero(same_location & (step > 3_600_000_000_000)))
+    if gaps:
+        report.add("warning", "timestamp", "gaps", f"{gaps} gaps longer than one hour")
+
+
+def validate_frame(df, schema=FEATURE_SCHEMA, allow_unexpected=False):
+    """
+    Validate a whole feature frame column by column.
+
+    Checks required / unexpected columns, dtypes, null counts, value ranges
+    and hourly timestamp monotonicity. Every check is a vectorized pass over
+    one column; nothing loops over rows.
+    """
+    report = ValidationReport(rows=len(df))
+
+    missing = [c for c in schema if c not in df.columns]
+    for column in missing:
+        report.add("error", column, "required", "column missing")
+
+    unexpected = [c for c in df.columns if c not in schema]
+    for column in unexpected:
+        report.add("warning" if allow_unexpected else "error", column, "unexpected", "column not in schema")
+
+    present = [c for c in schema if c in df.columns]
+    report.null_counts = {c: int(n) for c, n in df[present].isna().sum().items()}
+
+    for column in present:
+        spec = schema[column]
+        series = df[column]
+
+        if not _dtype_ok(series, spec["dtype"]):
+            report.add("error", column, "dtype", f"expected {spec['dtype']}, got {series.dtype}")
+            continue
+
+        nulls = report.null_counts[column]
+        if nulls and not spec.get("nullable", False):
+            report.add("error", column, "nulls", f"{nulls} null values")
+
+        if "min" in spec or "max" in spec:
+            values = series.to_numpy()
+            if "min" in spec:
+                below = int(np.count_nonzero(values < spec["min"]))
+                if below:
+                    report.add("error", column, "min", f"{below} values < {spec['min']}")
+            if "max" in spec:
+                above = int(np.count_nonzero(values > spec["max"]))
+                if above:
+                    report.add("error", column, "max", f"{above} values > {spec['max']}")
+
+    if "timestamp" in present and len(df) and not any(
+        e["column"] == "timestamp" for e in report.errors
+    ):
+        _check_timestamps(df, report)
+
+    return report
+
+
 def validate(features):
-    for key, dtype in FEATURE_SCHEMA.items():
-        if key not in features:
-            raise ValueError(f"Missing feature: {key}")
-        if not isinstance(features[key], dtype):
-            raise TypeError(f"{key} must be {dtype}")
-
-    for key in features:
-        if key not in FEATURE_SCHEMA:
-            raise ValueError(f"Unexpected feature: {key}")
+    """Validate a single feature document (dict) or a frame; raise on errors."""
+    if isinstance(features, dict):
+        features = pd.DataFrame([features])
+    report = validate_frame(features)
+    report.raise_if_invalid()
+    return report
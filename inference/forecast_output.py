@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from data_pipeline.aqi import aqi_category, concentration_to_aqi
+from inference.forecaster import band_columns
+
+
+# -----------------------------
+# Forecast documents
+# -----------------------------
+def hourly_frame(forecast_df):
+    """
+    forecast_hourly rows for a Forecaster output: predicted pm2_5, its
+    AQI, category and color, plus the P10 / P50 / P90 bands when the
+    model produced them.
+    """
+    bands = [column for column in band_columns() if column in forecast_df.columns]
+    predicted = forecast_df["predicted_pm2_5"].to_numpy(dtype=np.float64)
+    aqi = concentration_to_aqi(predicted, "pm2_5")
+    category, color = aqi_category(aqi)
+
+    return pd.DataFrame({
+        "timestamp": forecast_df["timestamp"].array,
+        "predicted_pm2_5": predicted,
+        "predicted_aqi": np.round(aqi, 2),
+        "category": category,
+        "color": color,
+        **{column: forecast_df[column].to_numpy(dtype=np.float64) for column in bands},
+    })
+
+
+def daily_rows(hourly_df):
+    """forecast_daily documents: per-day mean pm2_5 / AQI (and bands), AQI max and min."""
+    bands = [column for column in band_columns() if column in hourly_df.columns]
+    dates = hourly_df["timestamp"].dt.strftime("%Y-%m-%d").rename("date")
+
+    grouped = hourly_df.groupby(dates)
+    aqi = grouped["predicted_aqi"]
+    daily_df = pd.DataFrame({
+        "avg_pm2_5": grouped["predicted_pm2_5"].mean(),
+        "avg_aqi": aqi.mean().round(2),
+        "max_aqi": aqi.max().round(2),
+        "min_aqi": aqi.min().round(2),
+    })
+    daily_df["category"], daily_df["color"] = aqi_category(daily_df["avg_aqi"].to_numpy())
+    # predicted_pm2_5_p10 -> avg_pm2_5_p10
+    for column in bands:
+        daily_df[column.replace("predicted_", "avg_")] = grouped[column].mean()
+
+    return daily_df.reset_index().to_dict("records")
@@ -0,0 +1,158 @@
+"""
+Versioned forecast runs.
+
+Every run's hourly and daily documents are written under a fresh run_id,
+next to the previous runs, and only then does the location's pointer
+document in forecast_runs flip to the new id (one atomic single-document
+update). Each location has its own pointer, so workers forecasting
+different stations never replace each other's run.
+Readers resolve the pointer and fetch that run with one indexed query, so
+they always see a complete run and can use its id as a cache key.
+
+Documents are written without an expiry. Only when the pointer moves on do
+the location's runs before the new one (the previous run, and any that died
+before publishing) get expires_at, RUN_TTL_DAYS ahead, for the TTL indexes. The
+run readers are pointed at never expires, however long the next one takes.
+"""
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ASCENDING
+
+from config.locations import DEFAULT_LOCATION
+from data_pipeline.bulk_writer import write_documents, write_frame
+
+RUN_TTL_DAYS = float(os.getenv("FORECAST_RUN_TTL_DAYS", "7"))
+
+# Pointer of the single-location days, still read for DEFAULT_LOCATION
+LEGACY_POINTER_ID = "current"
+
+# Bookkeeping fields stored on every forecast document, not served
+RUN_FIELDS = ("run_id", "location", "created_at", "expires_at")
+FORECAST_COLLECTIONS = ("forecast_hourly", "forecast_daily")
+
+
+def ensure_run_indexes(db):
+    db["forecast_hourly"].create_index(
+        [("run_id", ASCENDING), ("timestamp", ASCENDING)], name="run_timestamp",
+    )
+    db["forecast_daily"].create_index(
+        [("run_id", ASCENDING), ("date", ASCENDING)], name="run_date",
+    )
+    for name in (*FORECAST_COLLECTIONS, "forecast_runs"):
+        # run_ttl used to expire every document by created_at, the live run's too
+        if db[name].index_information().get("run_ttl", {}).get("key") == [("created_at", 1)]:
+            db[name].drop_index("run_ttl")
+        db[name].create_index("expires_at", expireAfterSeconds=0, name="run_ttl")
+
+
+def new_run_id(now=None):
+    """Sortable and unique: UTC start time plus a random suffix."""
+    now = now or datetime.now(timezone.utc)
+    return f"{now:%Y%m%dT%H%M%SZ}-{uuid.uuid4().hex[:8]}"
+
+
+def pointer_id(location=DEFAULT_LOCATION):
+    return f"current:{location}"
+
+
+def _location_query(location):
+    # Runs from before per-location pointers carry no location; they were DEFAULT_LOCATION's
+    if location == DEFAULT_LOCATION:
+        return {"location": {"$in": [location, None]}}
+    return {"location": location}
+
+
+def retire_runs(db, run_id, created_at, location=DEFAULT_LOCATION, ttl_days=RUN_TTL_DAYS):
+    """
+    Schedule expiry of every run of location started before run_id
+    (created_at) that has none yet. Runs started later, still being
+    written, and other locations' runs are left alone.
+    """
+    expires_at = datetime.now(timezone.utc) + timedelta(days=ttl_days)
+    older = {
+        "created_at": {"$lt": created_at}, "expires_at": {"$exists": False},
+        **_location_query(location),
+    }
+    for name in FORECAST_COLLECTIONS:
+        db[name].update_many(
+            {"run_id": {"$ne": run_id}, **older}, {"$set": {"expires_at": expires_at}},
+        )
+    # Pointer documents have no created_at, so they never expire
+    db["forecast_runs"].update_many(
+        {"_id": {"$ne": run_id}, **older}, {"$set": {"expires_at": expires_at}},
+    )
+
+
+def publish_run(db, hourly_df, daily, location=DEFAULT_LOCATION, **meta):
+    """
+    Write one run's hourly frame and daily documents under a new run_id,
+    record it in forecast_runs with meta, then point the location's readers
+    at it and retire its runs before it. Returns the run_id.
+    """
+    ensure_run_indexes(db)
+    created_at = datetime.now(timezone.utc)
+    run_id = new_run_id(created_at)
+    run_fields = {"run_id": run_id, "location": location, "created_at": created_at}
+
+    write_frame(db["forecast_hourly"], hourly_df.assign(**run_fields))
+    write_documents(db["forecast_daily"], ({**doc, **run_fields} for doc in daily))
+    db["forecast_runs"].insert_one({
+        "_id": run_id, "location": location, "created_at": created_at, "hours": len(hourly_df), **meta,
+    })
+
+    # Readers switch over here, and only here
+    db["forecast_runs"].update_one(
+        {"_id": pointer_id(location)},
+        {"$set": {"run_id": run_id, "location": location, "published_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+    retire_runs(db, run_id, created_at, location)
+    return run_id
+
+
+def current_run_id(db, location=DEFAULT_LOCATION):
+    pointer = db["forecast_runs"].find_one({"_id": pointer_id(location)})
+    if pointer is None and location == DEFAULT_LOCATION:
+        pointer = db["forecast_runs"].find_one({"_id": LEGACY_POINTER_ID})
+    return pointer["run_id"] if pointer else None
+
+
+def _run_query(run_id):
+    # Documents from before versioned runs have no run_id at all
+    return {} if run_id is None else {"run_id": run_id}
+
+
+def _projection():
+    return {"_id": 0, **{field: 0 for field in RUN_FIELDS}}
+
+
+def read_hourly(db, run_id=None, location=DEFAULT_LOCATION):
+    """Hourly documents of a run (location's current one by default), by timestamp."""
+    run_id = run_id or current_run_id(db, location)
+    cursor = db["forecast_hourly"].find(_run_query(run_id), _projection())
+    return list(cursor.sort("timestamp", ASCENDING))
+
+
+def latest_hour(db, run_id=None, location=DEFAULT_LOCATION):
+    """The run's last forecast hour, from the (run_id, timestamp) index alone."""
+    run_id = run_id or current_run_id(db, location)
+    return db["forecast_hourly"].find_one(
+        _run_query(run_id), _projection(), sort=[("timestamp", -1)],
+    )
+
+
+def read_daily(db, run_id=None, location=DEFAULT_LOCATION):
+    run_id = run_id or current_run_id(db, location)
+    cursor = db["forecast_daily"].find(_run_query(run_id), _projection())
+    return list(cursor.sort("date", ASCENDING))
+
+
+def read_run(db, run_id=None, location=DEFAULT_LOCATION):
+    """The forecast_runs record of a run (model version, trigger, hours, ...), or None."""
+    run_id = run_id or current_run_id(db, location)
+    if run_id is None:
+        return None
+    run = db["forecast_runs"].find_one({"_id": run_id}, {"_id": 0})
+    return None if run is None else {"run_id": run_id, **run}
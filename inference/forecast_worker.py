@@ -0,0 +1,213 @@
+"""
+Resident forecast worker.
+
+Keeps the production model (via the process-wide ModelCache) and the last
+HISTORY_HOURS feature rows of its location in memory, and produces a new
+72-hour forecast whenever new feature rows land, the production model
+changes, or the schedule comes round:
+
+    python -m inference.forecast_worker           # run until interrupted
+    python -m inference.forecast_worker --once    # one forecast, then exit
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+from config.locations import DEFAULT_LOCATION
+from data_pipeline.bulk_writer import mongo_client
+from data_pipeline.feature_store import get_feature_store
+from inference.forecast_output import daily_rows, hourly_frame
+from inference.forecast_runs import publish_run
+from inference.forecaster import HISTORY_HOURS, HORIZON, make_forecaster
+from inference.load_best_model import model_cache
+
+load_dotenv()
+
+# How often to look for new feature rows / a new model, and the longest
+# the worker goes without forecasting even if nothing changed
+POLL_SECONDS = float(os.getenv("FORECAST_POLL_SECONDS", "30"))
+SCHEDULE_SECONDS = float(os.getenv("FORECAST_SCHEDULE_SECONDS", "3600"))
+
+TIMINGS_KEPT = 100
+
+
+class NoFeaturesError(LookupError):
+    """The feature store holds no rows for the worker's location yet."""
+
+
+@dataclass
+class RunTiming:
+    """Where one forecast run spent its time, in milliseconds."""
+
+    trigger: str
+    model_version: int
+    features_ms: float = 0.0
+    forecast_ms: float = 0.0
+    store_ms: float = 0.0
+    hours: int = 0
+    run_id: str = None
+
+    @property
+    def total_ms(self):
+        return self.features_ms + self.forecast_ms + self.store_ms
+
+    def __str__(self):
+        return (
+            f"{self.trigger} run {self.run_id}: model v{self.model_version}, "
+            f"{self.hours}h in {self.total_ms:.1f} ms "
+            f"(features {self.features_ms:.1f}, forecast {self.forecast_ms:.1f}, "
+            f"store {self.store_ms:.1f})"
+        )
+
+
+def _ms_since(start):
+    return (time.perf_counter() - start) * 1e3
+
+
+class ForecastWorker:
+    """
+    Long-lived forecaster for one location.
+
+    poll() is cheap: the feature store's high water mark plus the model
+    cache's current key. run_once() only re-reads the history rows when
+    the high water mark moved, and only rebuilds the Forecaster when the
+    production model changed. Every run's RunTiming is kept in timings.
+    """
+
+    def __init__(self, db=None, feature_store=None, cache=None, location=DEFAULT_LOCATION,
+                 horizon=HORIZON, poll_seconds=POLL_SECONDS, schedule_seconds=SCHEDULE_SECONDS):
+        if db is None:
+            db = mongo_client()["aqi_project"]
+        self.db = db
+        self.feature_store = feature_store or get_feature_store(collection=db["features"])
+        self.cache = cache or model_cache()
+        self.location = location
+        self.horizon = horizon
+        self.poll_seconds = poll_seconds
+        self.schedule_seconds = schedule_seconds
+
+        self.history = None
+        self._history_mark = None
+        self._forecaster = None
+        self._model_key = None
+        self._last_run = None
+        self.timings = deque(maxlen=TIMINGS_KEPT)
+        self._stop = threading.Event()
+
+    # -----------------------------
+    # Warm state
+    # -----------------------------
+    def _sync_history(self):
+        """Re-read the newest history rows if the store has moved on; True if it had."""
+        mark = self.feature_store.high_water_mark(self.location)
+        if mark is None:
+            raise NoFeaturesError(f"No feature rows for {self.location}")
+        if mark == self._history_mark:
+            return False
+        # A fresh read rather than an append: ingest rewrites its lookback hours
+        self.history = self.feature_store.latest_rows(self.location, n=HISTORY_HOURS)
+        self._history_mark = mark
+        return True
+
+    def _current_forecaster(self):
+        production = self.cache.current()
+        if production.key != self._model_key:
+            self._forecaster = make_forecaster(production.predictor, production.entry)
+            self._model_key = production.key
+        return self._forecaster
+
+    # -----------------------------
+    # One run
+    # -----------------------------
+    def store(self, hourly_df, daily, trigger):
+        """Publish as a new forecast run (see inference.forecast_runs); returns its run_id."""
+        return publish_run(
+            self.db, hourly_df, daily,
+            location=self.location, model_version=self._model_key[0], trigger=trigger,
+        )
+
+    def run_once(self, trigger="manual"):
+        """Forecast and publish; returns the RunTiming, or None if there is nothing to forecast from."""
+        start = time.perf_counter()
+        try:
+            self._sync_history()
+        except NoFeaturesError as exc:
+            # Not a failure: ingest has not reached this location yet
+            print(f"⚠️ Skipping this run: {exc}")
+            return None
+        features_ms = _ms_since(start)
+
+        start = time.perf_counter()
+        forecaster = self._current_forecaster()
+        hourly_df = hourly_frame(forecaster.forecast(self.history, horizon=self.horizon))
+        daily = daily_rows(hourly_df)
+        forecast_ms = _ms_since(start)
+
+        start = time.perf_counter()
+        run_id = self.store(hourly_df, daily, trigger)
+        store_ms = _ms_since(start)
+
+        timing = RunTiming(
+            trigger=trigger,
+            model_version=self._model_key[0],
+            features_ms=features_ms,
+            forecast_ms=forecast_ms,
+            store_ms=store_ms,
+            hours=len(hourly_df),
+            run_id=run_id,
+        )
+        self.timings.append(timing)
+        self._last_run = time.monotonic()
+        print(f"✅ Forecast stored — {timing}")
+        return timing
+
+    # -----------------------------
+    # Resident loop
+    # -----------------------------
+    def poll(self):
+        """Why a run is due now ("features", "model", "schedule"), or None."""
+        mark = self.feature_store.high_water_mark(self.location)
+        if mark is not None and mark != self._history_mark:
+            return "features"
+        if self.cache.current().key != self._model_key:
+            return "model"
+        if self._last_run is None or time.monotonic() - self._last_run >= self.schedule_seconds:
+            return "schedule"
+        return None
+
+    def serve_forever(self):
+        self.cache.start()
+        print(f"✅ Forecast worker for {self.location} (poll {self.poll_seconds:g}s)")
+        while not self._stop.is_set():
+            try:
+                trigger = self.poll()
+                if trigger:
+                    self.run_once(trigger)
+            except Exception as exc:
+                # Keep the worker alive; the next poll tries again
+                print(f"⚠️ Forecast run failed: {exc}")
+            self._stop.wait(self.poll_seconds)
+
+    def stop(self):
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true", help="forecast once and exit")
+    args = parser.parse_args()
+
+    worker = ForecastWorker()
+    if args.once:
+        worker.run_once()
+    else:
+        worker.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from data_pipeline.feature_spec import FEATURES, GAP_COLUMNS, reach
+from data_pipeline.streaming_features import RingBuffer
+from inference.tree_engine import maybe_compile
+
+HORIZON = 72
+
+# Series the recursive forecast carries history for. pm2_5 is the
+# predicted one; pm10 (like the weather columns) is held at its last
+# observed value, so its lags age with the forecast instead of freezing.
+HISTORY_SOURCES = ("pm2_5", "pm10")
+
+# Observed hours needed to seed every lag / window: the current hour plus 24
+HISTORY_HOURS = 1 + max(
+    reach(spec) for spec in FEATURES.values() if spec.source in HISTORY_SOURCES
+)
+
+CALENDAR_FIELDS = ("hour", "day", "month", "day_of_week")
+
+# Prediction bands stored next to predicted_pm2_5 when the model is a forest
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+def band_columns(quantiles=QUANTILES):
+    """Forecast column per quantile: 0.1 -> predicted_pm2_5_p10."""
+    return [f"predicted_pm2_5_p{round(q * 100)}" for q in quantiles]
+
+
+def _bands_of(model, quantiles):
+    """The quantiles to compute for model: empty unless it has per-tree spread."""
+    return tuple(quantiles) if getattr(model, "has_spread", False) else ()
+
+
+class Forecaster:
+    """
+    Recursive next-hour forecaster over a preallocated feature vector.
+
+    The last 24 hours of each source are kept in a RingBuffer (observed
+    hours first, then predictions) with running sums per window, so every
+    lag and rolling mean / std the model reads is recomputed exactly at
+    each step in O(1), whatever the horizon. Column positions are resolved
+    once from the registry's feature_columns; each step is a few array
+    writes plus one model.predict on a (1, n_features) array.
+
+    For a compiled forest the same call also returns quantiles of the
+    per-tree outputs, so every step gets a band around the point forecast
+    it feeds back.
+    """
+
+    def __init__(self, model, feature_columns, quantiles=QUANTILES):
+        self.model = model
+        self.feature_columns = list(feature_columns)
+        self.quantiles = _bands_of(model, quantiles)
+        self._x = np.zeros((1, len(self.feature_columns)))
+
+        position = {name: i for i, name in enumerate(self.feature_columns)}
+        self._pm2_5 = position.get("pm2_5")
+        self._calendar_slots = [
+            (field, position[field]) for field in CALENDAR_FIELDS if field in position
+        ]
+        self._gap_slots = [position[name] for name in GAP_COLUMNS if name in position]
+
+        # (slot in x, source, kind, param) for every history feature the model reads
+        self._history_slots = [
+            (position[name], spec.source, spec.kind, spec.param)
+            for name, spec in FEATURES.items()
+            if name in position and spec.source in HISTORY_SOURCES
+        ]
+        self.history_hours = HISTORY_HOURS
+        self._windows = {
+            source: sorted({
+                param for _, s, kind, param in self._history_slots
+                if s == source and kind in ("roll_mean", "roll_std")
+            })
+            for source in HISTORY_SOURCES
+        }
+
+    def _history(self, rows, end):
+        """
+        history_hours values per source ending at `end`, oldest first.
+
+        Hours missing from rows are taken from the newest row's lag columns
+        where possible, then carried forward from the hour before.
+        """
+        hours = pd.date_range(end=end, periods=self.history_hours, freq="h")
+        newest = rows.iloc[-1]
+        history = {}
+        for source in HISTORY_SOURCES:
+            if source in rows.columns:
+                values = rows.set_index("timestamp")[source].astype(np.float64).reindex(hours)
+            else:
+                values = pd.Series(np.nan, index=hours)
+            for k in range(1, self.history_hours):
+                lag = f"{source}_lag{k}"
+                if np.isnan(values.iloc[-1 - k]) and lag in rows.columns:
+                    values.iloc[-1 - k] = float(newest[lag])
+            history[source] = values.ffill().bfill().to_numpy()
+        return history
+
+    def _start(self, rows):
+        """Load the state from recent feature rows (newest last); one row is enough."""
+        if not isinstance(rows, pd.DataFrame):
+            rows = pd.DataFrame([rows])
+        rows = rows.sort_values("timestamp")
+        newest = rows.iloc[-1]
+        start = pd.Timestamp(newest["timestamp"])
+
+        self._x[0] = [float(newest[name]) for name in self.feature_columns]
+        self._buffers = {}
+        for source, values in self._history(rows, start).items():
+            buf = RingBuffer(capacity=self.history_hours, windows=self._windows[source])
+            for value in values:
+                buf.push(float(value))
+            self._buffers[source] = buf
+        self._held = {source: self._buffers[source].lag(0) for source in HISTORY_SOURCES}
+        return start
+
+    def _step(self, prediction, calendar, h):
+        for source, buf in self._buffers.items():
+            buf.push(prediction if source == "pm2_5" else self._held[source])
+
+        x = self._x[0]
+        for i, source, kind, param in self._history_slots:
+            buf = self._buffers[source]
+            if kind == "lag":
+                x[i] = buf.lag(param)
+            elif kind == "roll_mean":
+                x[i] = buf.mean(param)
+            else:
+                x[i] = buf.std(param)
+        if self._pm2_5 is not None:
+            x[self._pm2_5] = prediction
+        for field, i in self._calendar_slots:
+            x[i] = calendar[field][h]
+        for i in self._gap_slots:
+            x[i] = 0
+
+    def forecast(self, rows, horizon=HORIZON):
+        """
+        Predict pm2_5 for the horizon hours after the newest of rows (the
+        latest feature rows of one location, ideally history_hours of
+        them). Returns a frame with timestamp and predicted_pm2_5, plus
+        band_columns(quantiles) when the model is a forest.
+        """
+        start = self._start(rows)
+        timestamps = pd.date_range(start + pd.Timedelta(hours=1), periods=horizon, freq="h")
+        calendar = {
+            "hour": timestamps.hour.to_numpy(),
+            "day": timestamps.day.to_numpy(),
+            "month": timestamps.month.to_numpy(),
+            "day_of_week": timestamps.dayofweek.to_numpy(),
+        }
+
+        predictions = np.empty(horizon)
+        bands = np.empty((horizon, len(self.quantiles)))
+        with warnings.catch_warnings():
+            # Fitted on a DataFrame, fed the same columns as a bare array
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            for h in range(horizon):
+                if self.quantiles:
+                    point, band = self.model.predict_quantiles(self._x, self.quantiles)
+                    bands[h] = band[0]
+                else:
+                    point = self.model.predict(self._x)
+                prediction = float(point[0])
+                predictions[h] = prediction
+                self._step(prediction, calendar, h)
+
+        return _forecast_frame(timestamps, predictions, bands, self.quantiles)
+
+    # -----------------------------
+    # Many origins at once
+    # -----------------------------
+    def _origin_histories(self, features, origins):
+        """
+        (origins, history_hours) array per source, built like _history for
+        every origin in one pass over a dense hourly grid of the frame.
+        """
+        timestamps = pd.DatetimeIndex(features["timestamp"])
+        slots = ((timestamps - timestamps[0]) // pd.Timedelta(hours=1)).to_numpy()
+        window = slots[origins][:, None] + np.arange(1 - self.history_hours, 1)
+
+        history = {}
+        for source in HISTORY_SOURCES:
+            dense = np.full(slots[-1] + 1, np.nan)
+            if source in features.columns:
+                dense[slots] = features[source].to_numpy(dtype=np.float64)
+            values = np.where(window >= 0, dense[np.maximum(window, 0)], np.nan)
+            for k in range(1, self.history_hours):
+                lag = f"{source}_lag{k}"
+                if lag in features.columns:
+                    newest = features[lag].to_numpy(dtype=np.float64)[origins]
+                    values[:, -1 - k] = np.where(np.isnan(values[:, -1 - k]), newest, values[:, -1 - k])
+            history[source] = _bfill(_ffill(values))
+        return history
+
+    def forecast_origins(self, features, origins, horizon=HORIZON):
+        """
+        Recursive forecasts from many origins of one location's frame
+        (sorted by timestamp) at once, for backtests: every trajectory
+        advances together, so each step is one predict over all origins.
+        Returns an (origins, horizon) array; row i matches
+        forecast(features.iloc[:origins[i] + 1], horizon).
+        """
+        origins = np.asarray(origins)
+        n, hours = len(origins), self.history_hours
+        x = features[self.feature_columns].to_numpy(dtype=np.float64)[origins]
+
+        # Observed history followed by the trajectory, one row per origin
+        series = {}
+        for source, history in self._origin_histories(features, origins).items():
+            series[source] = np.empty((n, hours + horizon))
+            series[source][:, :hours] = history
+        held = {source: series[source][:, hours - 1].copy() for source in HISTORY_SOURCES}
+        start = pd.DatetimeIndex(features["timestamp"].to_numpy()[origins])
+
+        predictions = np.empty((n, horizon))
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            for h in range(horizon):
+                predictions[:, h] = prediction = np.asarray(self.model.predict(x), dtype=np.float64)
+                t = hours + h
+                series["pm2_5"][:, t] = prediction
+                series["pm10"][:, t] = held["pm10"]
+
+                for i, source, kind, param in self._history_slots:
+                    values = series[source]
+                    if kind == "lag":
+                        x[:, i] = values[:, t - param]
+                    elif kind == "roll_mean":
+                        x[:, i] = values[:, t + 1 - param:t + 1].mean(axis=1)
+                    else:
+                        x[:, i] = values[:, t + 1 - param:t + 1].std(axis=1, ddof=1)
+                if self._pm2_5 is not None:
+                    x[:, self._pm2_5] = prediction
+                if self._calendar_slots:
+                    stamps = start + pd.Timedelta(hours=h + 1)
+                    calendar = {
+                        "hour": stamps.hour, "day": stamps.day,
+                        "month": stamps.month, "day_of_week": stamps.dayofweek,
+                    }
+                    for field, i in self._calendar_slots:
+                        x[:, i] = calendar[field]
+                for i in self._gap_slots:
+                    x[:, i] = 0
+        return predictions
+
+
+def _ffill(values):
+    """Forward-fill NaN along each row."""
+    index = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+    np.maximum.accumulate(index, axis=1, out=index)
+    return np.take_along_axis(values, index, axis=1)
+
+
+def _bfill(values):
+    return _ffill(values[:, ::-1])[:, ::-1]
+
+
+class DirectForecaster:
+    """
+    Direct multi-horizon forecaster: one multi-output model maps the newest
+    feature row to the whole trajectory (column j predicts horizons[j]
+    hours ahead), so a forecast is a single predict call with no feedback
+    between steps. A compiled multi-output forest gives the bands for
+    every horizon from that same call.
+    """
+
+    def __init__(self, model, feature_columns, horizons, quantiles=QUANTILES):
+        self.model = model
+        self.feature_columns = list(feature_columns)
+        self.horizons = list(horizons)
+        self.quantiles = _bands_of(model, quantiles)
+
+    def forecast(self, rows, horizon=HORIZON):
+        if horizon > len(self.horizons) or self.horizons[:horizon] != list(range(1, horizon + 1)):
+            raise ValueError(f"Direct model covers horizons 1..{len(self.horizons)}, asked for {horizon}")
+
+        if not isinstance(rows, pd.DataFrame):
+            rows = pd.DataFrame([rows])
+        newest = rows.sort_values("timestamp").iloc[-1]
+        x = np.array([[float(newest[name]) for name in self.feature_columns]])
+
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            if self.quantiles:
+                point, band = self.model.predict_quantiles(x, self.quantiles)
+                bands = band.reshape(-1, len(self.quantiles))[:horizon]
+            else:
+                point, bands = self.model.predict(x), None
+            predictions = np.asarray(point, dtype=np.float64).reshape(-1)[:horizon]
+
+        start = pd.Timestamp(newest["timestamp"])
+        timestamps = pd.date_range(start + pd.Timedelta(hours=1), periods=horizon, freq="h")
+        return _forecast_frame(timestamps, predictions, bands, self.quantiles)
+
+    def forecast_origins(self, features, origins, horizon=HORIZON):
+        """(origins, horizon) point forecasts from many origin rows in one predict."""
+        if horizon > len(self.horizons) or self.horizons[:horizon] != list(range(1, horizon + 1)):
+            raise ValueError(f"Direct model covers horizons 1..{len(self.horizons)}, asked for {horizon}")
+        x = features[self.feature_columns].to_numpy(dtype=np.float64)[np.asarray(origins)]
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            predictions = np.asarray(self.model.predict(x), dtype=np.float64)
+        return predictions.reshape(len(x), -1)[:, :horizon]
+
+
+def _forecast_frame(timestamps, predictions, bands, quantiles):
+    frame = {"timestamp": timestamps, "predicted_pm2_5": predictions}
+    for j, column in enumerate(band_columns(quantiles)):
+        frame[column] = bands[:, j]
+    return pd.DataFrame(frame)
+
+
+STRATEGIES = ("recursive", "direct")
+
+
+def make_forecaster(model, entry, compile=True, quantiles=QUANTILES):
+    """
+    Forecaster for a model registry entry, dispatched on its strategy.
+
+    Tree ensembles are flattened into a CompiledEnsemble first (same
+    predictions, far less per-call overhead on the one-row predicts a
+    forecast makes, plus per-tree bands for forests); compile=False keeps
+    the sklearn model.
+    """
+    if compile:
+        model = maybe_compile(model)
+    strategy = entry.get("strategy", "recursive")
+    if strategy == "recursive":
+        return Forecaster(model, entry["feature_columns"], quantiles)
+    if strategy == "direct":
+        return DirectForecaster(model, entry["feature_columns"], entry["horizons"], quantiles)
+    raise ValueError(f"Unknown forecast strategy: {strategy} (expected one of {STRATEGIES})")
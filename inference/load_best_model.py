@@ -1,36 +1,228 @@
+import hashlib
 import os
+import shutil
+import tempfile
+import threading
+import time
+from functools import cached_property
+
 import joblib
-from pymongo import MongoClient
 from dotenv import load_dotenv
 
+from data_pipeline.bulk_writer import mongo_client
+from inference.tree_engine import CompiledEnsemble, compile_model
 
-def load_production_model():
-    load_dotenv()
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# How often a watching cache asks the registry for a new production version
+POLL_SECONDS = float(os.getenv("MODEL_POLL_SECONDS", "60"))
+
+PRODUCTION_QUERY = {"is_production": True}
+NEWEST_FIRST = [("version", -1)]
+
+
+def registry_collection():
+    return mongo_client()["aqi_project"]["model_registry"]
+
+
+# -----------------------------
+# Artifact checksums
+# -----------------------------
+_checksums = {}
+
+
+def artifact_checksum(path):
+    """
+    sha256 of a model artifact. Memoized on (path, size, mtime) so polling
+    only re-hashes a file that was actually rewritten.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _checksums:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _checksums[key] = digest.hexdigest()
+    return _checksums[key]
+
+
+def compiled_path(model_path, checksum):
+    """Where the CompiledEnsemble of one exact artifact is kept on disk."""
+    return f"{model_path}.{checksum[:16]}.compiled"
+
+
+def _load_compiled(model_path, checksum, model):
+    """
+    Memory-mapped CompiledEnsemble for a tree-ensemble artifact, compiling
+    and saving it on first use; None for models the engine does not cover.
+    Every process mapping the same files shares one set of pages.
+    """
+    path = compiled_path(model_path, checksum)
+    if not os.path.isdir(path):
+        try:
+            compiled = compile_model(model())
+        except TypeError:
+            return None
+        # Save next to the target and rename, so readers never see half a model
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=".compiling-")
+        try:
+            compiled.save(tmp)
+            os.replace(tmp, path)
+        except OSError:
+            # Another process got there first, or the directory is read-only
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(path):
+                return compiled
+    return CompiledEnsemble.load(path, mmap=True)
+
+
+class LoadedModel:
+    """
+    One production model as loaded from the registry.
+
+    predictor is what inference calls predict on: the memory-mapped
+    CompiledEnsemble for tree ensembles, the sklearn model otherwise. The
+    sklearn model itself is only unpickled when someone asks for .model.
+    """
 
-    MONGO_URI = os.getenv("MONGO_URI")
-    client = MongoClient(MONGO_URI)
-    db = client["aqi_project"]
+    def __init__(self, entry, path, checksum):
+        self.entry = entry
+        self.path = path
+        self.checksum = checksum
+        self.loaded_at = time.time()
+        self.predictor = _load_compiled(path, checksum, lambda: self.model) or self.model
 
-    registry_collection = db["model_registry"]
+    @property
+    def key(self):
+        return self.entry["version"], self.checksum
 
-    # Find production model
-    production_model = registry_collection.find_one(
-        {"is_production": True}
-    )
+    @cached_property
+    def model(self):
+        # Uncompressed joblib pickles map their arrays instead of copying them
+        return joblib.load(self.path, mmap_mode="r")
 
-    if not production_model:
-        raise Exception("No production model found in registry.")
 
-    model_path = production_model["model_path"]
-    feature_columns = production_model["feature_columns"]
+class ModelCache:
+    """
+    Process-wide production model, keyed by (registry version, artifact
+    checksum).
 
-    # Build absolute path
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    full_model_path = os.path.join(BASE_DIR, model_path)
+    current() returns the loaded model immediately once the first load is
+    done. refresh() costs one projected registry query and a stat of the
+    artifact; only a new key triggers a load, which happens off to the
+    side and is then swapped in with a single reference assignment, so
+    callers never see a half-loaded model. start() runs refresh() every
+    poll_seconds on a daemon thread for long-running consumers.
+    """
 
-    model = joblib.load(full_model_path)
+    def __init__(self, registry=None, poll_seconds=POLL_SECONDS, base_dir=BASE_DIR):
+        self._registry = registry
+        self.poll_seconds = poll_seconds
+        self.base_dir = base_dir
+        self._current = None
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
 
-    print(f"✅ Loaded Production Model: {production_model['model_name']}")
-    print(f"Version: {production_model['version']}")
+    @property
+    def registry(self):
+        if self._registry is None:
+            self._registry = registry_collection()
+        return self._registry
 
-    return model, feature_columns
+    def _production_entry(self, projection=None):
+        entry = self.registry.find_one(PRODUCTION_QUERY, projection=projection, sort=NEWEST_FIRST)
+        if not entry:
+            raise Exception("No production model found in registry.")
+        return entry
+
+    def _resolve(self, entry):
+        path = os.path.join(self.base_dir, entry["model_path"])
+        checksum = artifact_checksum(path)
+        expected = entry.get("checksum")
+        if expected and expected != checksum:
+            raise ValueError(f"{path} does not match the checksum registered for version {entry['version']}")
+        return path, checksum
+
+    def current(self):
+        loaded = self._current
+        if loaded is None:
+            with self._load_lock:
+                if self._current is None:
+                    self.refresh()
+                loaded = self._current
+        return loaded
+
+    def refresh(self):
+        """Load and swap in the production model if its key changed; True when it did."""
+        head = self._production_entry(projection={"version": 1, "model_path": 1, "checksum": 1})
+        path, checksum = self._resolve(head)
+        current = self._current
+        if current is not None and current.key == (head["version"], checksum):
+            return False
+
+        entry = self._production_entry()
+        path, checksum = self._resolve(entry)
+        loaded = LoadedModel(entry, path, checksum)
+        self._current = loaded
+
+        print(f"✅ Loaded Production Model: {entry['model_name']}")
+        print(f"Version: {entry['version']}")
+        print(f"Strategy: {entry.get('strategy', 'recursive')}")
+        return True
+
+    # -----------------------------
+    # Background hot swap
+    # -----------------------------
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as exc:
+                # Keep serving the model we have; try again next poll
+                self.last_error = exc
+                print(f"⚠️ Model refresh failed: {exc}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="model-cache", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def model_cache(watch=False):
+    """The process-wide ModelCache; watch=True also starts background polling."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ModelCache()
+    if watch:
+        _cache.start()
+    return _cache
+
+
+def load_production_entry():
+    """The production model and its registry entry (feature_columns, strategy, ...)."""
+    loaded = model_cache().current()
+    return loaded.model, loaded.entry
+
+
+def load_production_model():
+    model, production_model = load_production_entry()
+    return model, production_model["feature_columns"]
@@ -0,0 +1,234 @@
+import json
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# Rows traversed together; bounds the (rows, trees) node index matrix
+BATCH_ROWS = 4096
+
+_ARRAYS = ("feature", "threshold", "left", "value", "roots")
+
+
+class CompiledEnsemble:
+    """
+    A fitted tree ensemble flattened into packed, contiguous node arrays.
+
+    Every tree's nodes live in the same arrays (feature index, threshold,
+    left child, leaf value), addressed from roots[t]. Siblings are stored
+    next to each other, so the right child is left + 1 and one step down is
+    `left[node] + (x > threshold[node])`. Leaves have an infinite threshold
+    and point back at themselves, so traversal is a fixed max_depth rounds
+    of vectorized gathers over a (rows, trees) matrix of node indices: all
+    rows and all trees move one level per round, with no per-tree Python
+    or per-call validation.
+
+    Prediction mirrors sklearn: inputs are cast to float32 before the
+    split tests, and tree outputs are accumulated in tree order (a
+    cumulative sum, which adds sequentially), so results are bit-for-bit
+    equal to a single-threaded sklearn predict.
+    """
+
+    def __init__(self, feature, threshold, left, value, roots, max_depth,
+                 kind, scale=1.0, init=None, n_features=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.value = value            # (nodes, n_outputs)
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.kind = kind              # "mean" (forests) or "sum" (boosting)
+        self.scale = float(scale)
+        self.init = None if init is None else np.asarray(init, dtype=np.float64)
+        self.n_features = n_features
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_outputs(self):
+        return self.value.shape[1]
+
+    def leaves(self, X):
+        """(rows, trees) index of the leaf each row lands in, per tree."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_cols = X.shape
+        flat = X.ravel()
+        # Offset of each row's first feature in the flattened input
+        base = (np.arange(n_rows, dtype=np.intp) * n_cols)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            x = flat[base + self.feature[node]]
+            node = self.left[node] + (x > self.threshold[node])
+        return node
+
+    @property
+    def has_spread(self):
+        """Whether per-tree outputs are samples of the prediction (forests, not boosting)."""
+        return self.kind == "mean"
+
+    def _combine(self, leaf_values):
+        if self.kind == "mean":
+            out = np.cumsum(leaf_values, axis=1)[:, -1]
+            return out / self.n_trees
+        # init + scale * tree_0 + scale * tree_1 + ..., added in that order
+        terms = np.empty((len(leaf_values), self.n_trees + 1, self.n_outputs))
+        terms[:, 0] = self.init
+        np.multiply(self.scale, leaf_values, out=terms[:, 1:])
+        return np.cumsum(terms, axis=1)[:, -1]
+
+    def _batches(self, X):
+        if hasattr(X, "to_numpy"):
+            X = X.to_numpy()
+        X = np.atleast_2d(X)
+        # At least one (possibly empty) batch, so predict of no rows is empty
+        for start in range(0, max(len(X), 1), BATCH_ROWS):
+            yield self.value[self.leaves(X[start:start + BATCH_ROWS])]  # (rows, trees, outputs)
+
+    def predict(self, X):
+        """Same shape as the sklearn model's predict: (rows,) or (rows, outputs)."""
+        out = np.concatenate([self._combine(leaf_values) for leaf_values in self._batches(X)])
+        return out[:, 0] if self.n_outputs == 1 else out
+
+    def predict_quantiles(self, X, quantiles):
+        """
+        (prediction, bands) from a single traversal: prediction exactly as
+        predict() returns it, bands the given quantiles of the per-tree
+        outputs, shaped (rows, len(quantiles)) or (rows, outputs, len(quantiles)).
+        Forests only (see has_spread).
+        """
+        if not self.has_spread:
+            raise TypeError("Per-tree quantiles need a forest; boosted trees are not samples")
+        points, bands = [], []
+        for leaf_values in self._batches(X):
+            points.append(self._combine(leaf_values))
+            # (quantiles, rows, outputs) -> (rows, outputs, quantiles)
+            bands.append(np.moveaxis(np.quantile(leaf_values, quantiles, axis=1), 0, -1))
+        point, band = np.concatenate(points), np.concatenate(bands)
+        if self.n_outputs == 1:
+            return point[:, 0], band[:, 0]
+        return point, band
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, path):
+        """One .npy per array plus a small JSON header, so load() can mmap them."""
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        header = {
+            "version": FORMAT_VERSION,
+            "max_depth": self.max_depth,
+            "kind": self.kind,
+            "scale": self.scale,
+            "init": None if self.init is None else self.init.tolist(),
+            "n_features": self.n_features,
+        }
+        with open(os.path.join(path, "header.json"), "w") as f:
+            json.dump(header, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, "header.json")) as f:
+            header = json.load(f)
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model version: {header.get('version')}")
+
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in _ARRAYS
+        }
+        return cls(
+            **arrays,
+            max_depth=header["max_depth"],
+            kind=header["kind"],
+            scale=header["scale"],
+            init=header["init"],
+            n_features=header["n_features"],
+        )
+
+
+def _pack(trees):
+    """
+    Concatenate sklearn Tree objects into flat arrays with global node ids,
+    renumbered breadth-first so every split's children are adjacent.
+    """
+    features, thresholds, lefts, values, roots = [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        n = tree.node_count
+        left, right = tree.children_left, tree.children_right
+
+        # New position of each old node, level by level: root first, then
+        # each split's (left, right) pair in the order the splits are reached
+        levels = [np.zeros(1, dtype=np.intp)]
+        while len(levels[-1]):
+            splits = levels[-1][left[levels[-1]] != -1]
+            levels.append(np.column_stack([left[splits], right[splits]]).ravel())
+        order = np.concatenate(levels)
+        new_id = np.empty(n, dtype=np.int64)
+        new_id[order] = np.arange(n)
+
+        is_leaf = left[order] == -1
+        ids = np.arange(offset, offset + n)
+        features.append(np.where(is_leaf, 0, tree.feature[order]))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+        lefts.append(np.where(is_leaf, ids, new_id[left[order]] + offset))
+        values.append(tree.value[order, :, 0])
+        roots.append(offset)
+        offset += n
+
+    return dict(
+        feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+        threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+        left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+        value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        roots=np.asarray(roots, dtype=np.intp),
+        max_depth=max(tree.max_depth for tree in trees),
+    )
+
+
+def compile_model(model):
+    """
+    CompiledEnsemble for a fitted RandomForest / ExtraTrees / GradientBoosting
+    regressor (single or multi-output). Raises TypeError for anything else;
+    see maybe_compile for a fall-back.
+    """
+    from sklearn.ensemble import (
+        ExtraTreesRegressor,
+        GradientBoostingRegressor,
+        RandomForestRegressor,
+    )
+
+    n_features = getattr(model, "n_features_in_", None)
+
+    if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+        packed = _pack([est.tree_ for est in model.estimators_])
+        return CompiledEnsemble(**packed, kind="mean", n_features=n_features)
+
+    if isinstance(model, GradientBoostingRegressor):
+        init = model.init_
+        if init == "zero":
+            constant = np.zeros(1)
+        elif hasattr(init, "constant_"):
+            constant = np.asarray(init.constant_, dtype=np.float64).reshape(-1)
+        else:
+            raise TypeError(f"Unsupported GradientBoosting init estimator: {type(init).__name__}")
+        packed = _pack([est.tree_ for est in model.estimators_[:, 0]])
+        return CompiledEnsemble(
+            **packed, kind="sum", scale=model.learning_rate, init=constant, n_features=n_features,
+        )
+
+    raise TypeError(f"Cannot compile {type(model).__name__}")
+
+
+def maybe_compile(model):
+    """The compiled ensemble when the model is a supported tree ensemble, else the model itself."""
+    try:
+        return compile_model(model)
+    except TypeError:
+        return model
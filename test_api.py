@@ -0,0 +1,60 @@
+import os
+from unittest import mock
+
+import mongomock
+import pytest
+
+# The app connects lazily; a placeholder URI is enough to import it
+with mock.patch.dict(os.environ, {"MONGO_URI": os.getenv("MONGO_URI", "mongodb://localhost:27017")}):
+    import api.main as api
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = mongomock.MongoClient()["aqi_test"]
+    monkeypatch.setattr(api, "db", db)
+    monkeypatch.setattr(api, "registry_collection", db["model_registry"])
+    monkeypatch.setattr(api, "features_collection", db["features"])
+    return db
+
+
+def store_shap(db, version, importances):
+    db["model_shap"].insert_many([
+        {"version": version, "feature": feature, "importance": value}
+        for feature, value in importances.items()
+    ])
+
+
+def test_shap_serves_only_the_production_version(db):
+    db["model_registry"].insert_many([
+        {"version": 1, "model_name": "Ridge", "is_production": False},
+        {"version": 2, "model_name": "RandomForest", "is_production": True},
+    ])
+    store_shap(db, 1, {"pm2_5_lag_1": 9.0, "hour": 0.5})
+    store_shap(db, 2, {"pm2_5_lag_1": 3.0, "hour": 1.0})
+
+    rows = api.get_shap()
+    assert [(row["version"], row["feature"]) for row in rows] == [(2, "pm2_5_lag_1"), (2, "hour")]
+
+
+def test_shap_falls_back_to_the_newest_stored_version(db):
+    db["model_registry"].insert_one({"version": 3, "model_name": "RandomForest", "is_production": True})
+    store_shap(db, 1, {"pm2_5_lag_1": 9.0})
+    store_shap(db, 2, {"pm2_5_lag_1": 3.0, "hour": 1.0})
+
+    assert {row["version"] for row in api.get_shap()} == {2}
+    assert len(api.get_shap()) == 2
+
+
+def test_shap_without_stored_values(db):
+    assert api.get_shap() == []
+
+
+def test_current_aqi_is_per_location(db):
+    db["features"].insert_many([
+        {"location": "karachi", "timestamp": "2025-03-01T10:00:00", "pm2_5": 12.0},
+        {"location": "lahore", "timestamp": "2025-03-01T11:00:00", "pm2_5": 150.0},
+    ])
+    assert api.get_current_aqi()["timestamp"] == "2025-03-01T10:00:00"
+    assert api.get_current_aqi("lahore")["aqi"] > api.get_current_aqi("karachi")["aqi"]
+    assert "error" in api.get_current_aqi("quetta")
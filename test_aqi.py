@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_pipeline.aqi import (
+    BREAKPOINTS,
+    DECIMALS,
+    add_aqi_columns,
+    aqi_category,
+    concentration_to_aqi,
+    overall_aqi,
+)
+
+
+def scalar_aqi(c, pollutant):
+    """The EPA procedure one value at a time, straight from the table."""
+    scale = 10 ** DECIMALS[pollutant]
+    c = math.floor(max(c, 0) * scale + 1e-6) / scale
+    rows = BREAKPOINTS[pollutant]
+    for c_low, c_high, i_low, i_high in rows:
+        if c <= c_high:
+            break
+    return (i_high - i_low) / (c_high - c_low) * (c - c_low) + i_low
+
+
+@pytest.mark.parametrize("pollutant, concentration, expected", [
+    ("pm2_5", 0.0, 0),
+    ("pm2_5", 9.0, 50),
+    ("pm2_5", 9.09, 50),      # truncated to 9.0, not lost between rows
+    ("pm2_5", 35.4, 100),
+    ("pm2_5", 55.5, 151),
+    ("pm2_5", 225.4, 300),
+    ("pm2_5", 325.4, 500),
+    ("pm10", 54.9, 50),
+    ("pm10", 155, 101),
+    ("pm10", 604, 500),
+])
+def test_epa_breakpoints(pollutant, concentration, expected):
+    assert concentration_to_aqi([concentration], pollutant)[0] == pytest.approx(expected)
+
+
+def test_matches_scalar_reference():
+    rng = np.random.default_rng(0)
+    for pollutant in BREAKPOINTS:
+        values = np.round(rng.uniform(-5, 700, size=5000), 2)
+        expected = [scalar_aqi(v, pollutant) for v in values]
+        np.testing.assert_allclose(concentration_to_aqi(values, pollutant), expected)
+
+
+def test_edges_float32_and_missing():
+    # float32 35.4 is 35.3999996...; it must not truncate down to 35.3
+    assert concentration_to_aqi(np.float32([35.4]))[0] == pytest.approx(100)
+    above, negative, missing = concentration_to_aqi([400.0, -3.0, np.nan])
+    assert above > 500 and negative == 0 and np.isnan(missing)
+
+
+def test_categories():
+    names, colors = aqi_category([0, 50, 50.4, 101, 250, 301, 900, np.nan])
+    assert list(names) == [
+        "Good", "Good", "Moderate", "Unhealthy for Sensitive Groups",
+        "Very Unhealthy", "Hazardous", "Hazardous", None,
+    ]
+    assert colors[0] == "#00E400" and colors[-1] is None
+
+
+def test_overall_aqi_takes_the_worst_pollutant():
+    aqi, dominant = overall_aqi({"pm2_5": [10.0, np.nan, np.nan], "pm10": [200.0, 60.0, np.nan]})
+    assert list(dominant) == ["pm10", "pm10", None]
+    assert aqi[0] == pytest.approx(concentration_to_aqi([200.0], "pm10")[0])
+    assert np.isnan(aqi[2])
+
+    frame = add_aqi_columns(pd.DataFrame({"pm2_5": [5.0, 60.0], "pm10": [100.0, 20.0]}))
+    assert list(frame["dominant_pollutant"]) == ["pm10", "pm2_5"]
+    assert list(frame["aqi_category"]) == ["Moderate", "Unhealthy"]
+    with pytest.raises(ValueError):
+        add_aqi_columns(pd.DataFrame({"temperature": [20.0]}))
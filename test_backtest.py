@@ -0,0 +1,36 @@
+import numpy as np
+from sklearn.linear_model import Ridge
+
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from inference.forecaster import HISTORY_HOURS, Forecaster
+from tests.helpers import make_raw
+from training.backtest import backtest_origins, forecast_all, run_backtest
+from training.evaluate_models import evaluate_forecaster
+
+FEATURE_COLUMNS = list(DEFAULT_FEATURE_COLUMNS)
+
+
+def make_forecaster():
+    features = engineer_features(make_raw(24 * 30)).reset_index(drop=True)
+    model = Ridge().fit(features[FEATURE_COLUMNS], features["target_pm2_5"])
+    return Forecaster(model, FEATURE_COLUMNS), features
+
+
+def test_backtest_matches_per_origin_evaluation():
+    forecaster, features = make_forecaster()
+    origins = backtest_origins(features, horizon=24, every=7)
+    assert origins[0] == HISTORY_HOURS - 1 and origins[-1] + 24 < len(features)
+
+    result = run_backtest(forecaster, features, origins, horizon=24, processes=1)
+    expected, _ = evaluate_forecaster(forecaster, features, origins, 24)
+    np.testing.assert_allclose(result["RMSE_by_horizon"], expected, rtol=1e-9)
+    assert result["origins"] == len(origins) and len(result["MAE_by_horizon"]) == 24
+
+
+def test_process_pool_gives_the_same_forecasts():
+    forecaster, features = make_forecaster()
+    origins = backtest_origins(features, horizon=12)
+    serial = forecast_all(forecaster, features, origins, horizon=12, processes=1)
+    pooled = forecast_all(forecaster, features, origins, horizon=12, processes=2)
+    np.testing.assert_allclose(serial, pooled, rtol=1e-12)
@@ -0,0 +1,78 @@
+import mongomock
+import pandas as pd
+import pytest
+from pymongo.errors import AutoReconnect
+
+from data_pipeline.bulk_writer import iter_frame_chunks, write_documents, write_frame
+from data_pipeline.feature_engineering import engineer_features
+from tests.helpers import make_raw
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient()["aqi_test"]["bulk"]
+
+
+@pytest.fixture
+def features():
+    df = engineer_features(make_raw(24 * 5).assign(location="karachi"))
+    return df.reset_index(drop=True)
+
+
+class FlakyCollection:
+    """Drops the connection on the first `failures` bulk writes."""
+
+    def __init__(self, collection, failures):
+        self.collection = collection
+        self.failures = failures
+
+    def bulk_write(self, operations, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise AutoReconnect("connection reset")
+        return self.collection.bulk_write(operations, ordered=ordered)
+
+
+def test_chunks_hold_bson_native_values(features):
+    chunks = list(iter_frame_chunks(features, chunk_size=40))
+    assert [len(c) for c in chunks] == [40, 40, len(features) - 80]
+
+    doc = chunks[0][0]
+    assert type(doc["location"]) is str
+    assert type(doc["pm2_5"]) is float
+    assert type(doc["hour"]) is int
+    assert isinstance(doc["timestamp"], pd.Timestamp)
+
+
+def test_inserts_and_reports_throughput(collection, features):
+    stats = write_frame(collection, features, chunk_size=32)
+    assert stats.docs == collection.count_documents({}) == len(features)
+    assert stats.chunks == -(-len(features) // 32)
+    assert stats.docs_per_second > 0
+
+
+def test_upserts_are_idempotent(collection, features):
+    key = ["location", "timestamp"]
+    write_frame(collection, features, key=key, chunk_size=50)
+    write_frame(collection, features.tail(10), key=key)
+    assert collection.count_documents({}) == len(features)
+
+    stored = collection.find_one({"timestamp": features["timestamp"].iloc[-1].to_pydatetime()})
+    assert stored["pm2_5"] == pytest.approx(float(features["pm2_5"].iloc[-1]))
+
+
+def test_retries_transient_errors(collection, features):
+    flaky = FlakyCollection(collection, failures=2)
+    stats = write_frame(flaky, features, chunk_size=1000, backoff=0)
+    assert stats.retries == 2
+    assert collection.count_documents({}) == len(features)
+
+    with pytest.raises(AutoReconnect):
+        write_documents(FlakyCollection(collection, failures=5), [{"a": 1}], retries=2, backoff=0)
+
+
+def test_documents_are_chunked(collection):
+    docs = ({"i": i, "x": float(i)} for i in range(25))
+    stats = write_documents(collection, docs, chunk_size=10)
+    assert (stats.docs, stats.chunks) == (25, 3)
+    assert collection.count_documents({}) == 25
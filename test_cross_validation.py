@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from training.cross_validation import cross_validate, rolling_origin_folds
+
+
+def test_folds_are_expanding_windows_that_tile_the_end():
+    folds = rolling_origin_folds(120, n_folds=5)
+    assert folds == [(20, 40), (40, 60), (60, 80), (80, 100), (100, 120)]
+    assert rolling_origin_folds(100, n_folds=3, test_size=10) == [(70, 80), (80, 90), (90, 100)]
+    with pytest.raises(ValueError):
+        rolling_origin_folds(4, n_folds=5)
+
+
+def test_cross_validate_scores_every_fold_in_time_order():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4)).astype(np.float32)
+    y = X @ np.array([1.0, -2.0, 0.5, 0.0]) + rng.normal(scale=0.1, size=300)
+    models = {"Ridge": Ridge(), "RandomForest": RandomForestRegressor(n_estimators=5, random_state=0)}
+
+    serial = cross_validate(models, X, y, cpus=1)
+    pooled = cross_validate(models, X, y, cpus=2)
+
+    ridge = serial["Ridge"]
+    assert [f["train_rows"] for f in ridge["folds"]] == [50, 100, 150, 200, 250]
+    # Fold 0 matches a plain fit on the first 50 rows
+    expected = Ridge().fit(X[:50], y[:50]).predict(X[50:100])
+    assert ridge["folds"][0]["RMSE"] == pytest.approx(np.sqrt(np.mean((expected - y[50:100]) ** 2)))
+    assert ridge["RMSE"] == pytest.approx(np.mean([f["RMSE"] for f in ridge["folds"]]))
+    for name in models:
+        assert [f["RMSE"] for f in pooled[name]["folds"]] == [f["RMSE"] for f in serial[name]["folds"]]
@@ -0,0 +1,59 @@
+import mongomock
+import numpy as np
+import shap
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.neighbors import KNeighborsRegressor
+
+from training.explain import shap_importance, store_importance, stratified_sample, tree_importance
+
+
+def make_data(rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, 4))
+    y = 3 * X[:, 0] - X[:, 1] + rng.normal(scale=0.1, size=rows)
+    return X, y
+
+
+def test_stratified_sample_covers_every_target_range():
+    y = np.random.default_rng(0).lognormal(size=10_000)
+    rows = stratified_sample(y, 500)
+    assert 490 <= len(rows) <= 510 and np.all(np.diff(rows) > 0)
+    # Every decile of the target contributes about a tenth of the sample
+    deciles = np.searchsorted(np.quantile(y, np.linspace(0.1, 0.9, 9)), y[rows])
+    assert np.bincount(deciles, minlength=10).min() >= 45
+    assert len(stratified_sample(y[:100], 500)) == 100
+
+
+def test_linear_closed_form_matches_shap():
+    X, y = make_data()
+    model = Ridge().fit(X, y)
+    importance, info = shap_importance(model, X, y)
+    masker = shap.maskers.Independent(X, max_samples=len(X))
+    expected = np.abs(shap.LinearExplainer(model, masker).shap_values(X)).mean(axis=0)
+    np.testing.assert_allclose(importance, expected, rtol=1e-6)
+    assert info["method"] == "linear" and info["sample_rows"] == len(X)
+
+
+def test_tree_importance_is_the_same_across_processes():
+    X, y = make_data()
+    model = RandomForestRegressor(n_estimators=10, max_depth=5, random_state=0).fit(X, y)
+    serial = tree_importance(model, X[:60], processes=1)
+    pooled = tree_importance(model, X[:60], processes=3)
+    np.testing.assert_allclose(serial, pooled, rtol=1e-9)
+    assert serial.argmax() == 0
+
+
+def test_other_models_and_the_version_cache():
+    X, y = make_data(rows=150)
+    collection = mongomock.MongoClient()["test"]["model_shap"]
+    entry = {"version": 3, "model_name": "KNN", "feature_columns": ["a", "b", "c", "d"]}
+
+    info = store_importance(collection, entry, KNeighborsRegressor().fit(X, y), X, y, sample_rows=20)
+    assert info["method"] == "permutation" and info["sample_rows"] == 20
+    docs = list(collection.find({"version": 3}))
+    assert [d["feature"] for d in docs] == entry["feature_columns"]
+    assert all(d["sample_rows"] == 20 and d["seconds"] >= 0 for d in docs)
+
+    assert store_importance(collection, entry, None, X, y) is None   # cached: never recomputed
+    assert collection.count_documents({}) == 4
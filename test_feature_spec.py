@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_pipeline.feature_engineering import engineer_features
+from data_pipeline.feature_spec import (
+    FEATURES,
+    TARGET_COLUMN,
+    build_features,
+    lead_targets,
+    required_features,
+)
+from tests.helpers import make_raw
+
+
+def reference_features(df):
+    """The original pandas implementation, shifted on a reindexed hourly axis."""
+    df = df.copy().sort_values("timestamp").dropna().set_index("timestamp", drop=False)
+    hours = pd.date_range(df.index[0], df.index[-1], freq="h") if len(df) else df.index
+    grid = df[["pm2_5", "pm10"]].reindex(hours)
+
+    df["hour"] = df["timestamp"].dt.hour
+    df["day"] = df["timestamp"].dt.day
+    df["month"] = df["timestamp"].dt.month
+    df["day_of_week"] = df["timestamp"].dt.dayofweek
+    for k in (1, 2, 3):
+        df[f"pm2_5_lag{k}"] = grid["pm2_5"].shift(k)
+    for k in (1, 2):
+        df[f"pm10_lag{k}"] = grid["pm10"].shift(k)
+    for k in (6, 12, 24):
+        df[f"pm2_5_lag{k}"] = grid["pm2_5"].shift(k)
+    for k in (6, 12, 24):
+        df[f"pm10_lag{k}"] = grid["pm10"].shift(k)
+    df["pm2_5_roll_mean_3"] = grid["pm2_5"].rolling(3).mean()
+    df["pm2_5_roll_std_3"] = grid["pm2_5"].rolling(3).std()
+    for w in (6, 12, 24):
+        df[f"pm2_5_roll_mean_{w}"] = grid["pm2_5"].rolling(w).mean()
+    for w in (6, 12):
+        df[f"pm2_5_roll_std_{w}"] = grid["pm2_5"].rolling(w).std()
+    df["gap_hours"] = (df["timestamp"].diff() // pd.Timedelta(hours=1) - 1).fillna(0)
+    df["imputed_hours_24"] = 0
+    df["target_pm2_5"] = grid["pm2_5"].shift(-1)
+    return df.dropna().reset_index(drop=True)
+
+
+def assert_frames_close(actual, expected):
+    assert list(actual.columns) == list(expected.columns)
+    for column in expected.columns:
+        if column == "timestamp" or column == "location":
+            assert (actual[column] == expected[column]).all()
+        else:
+            np.testing.assert_allclose(
+                actual[column].astype(float), expected[column].astype(float),
+                rtol=1e-6, atol=1e-5, err_msg=column,
+            )
+
+
+def test_matches_reference_implementation():
+    raw = make_raw(24 * 30)
+    assert_frames_close(engineer_features(raw).reset_index(drop=True), reference_features(raw))
+
+
+def test_lags_follow_the_clock_across_gaps():
+    raw = make_raw(24 * 30)
+    # Incomplete rows and whole missing hours both become gaps
+    raw.loc[[40, 41, 300], "pm10"] = np.nan
+    raw = raw.drop(index=[100, 101, 102, 103, 500])
+
+    features = engineer_features(raw).reset_index(drop=True)
+    assert_frames_close(features, reference_features(raw))
+
+    by_time = raw.set_index("timestamp")["pm2_5"]
+    lagged = by_time.reindex(features["timestamp"] - pd.Timedelta(hours=24)).to_numpy()
+    np.testing.assert_allclose(features["pm2_5_lag24"], lagged)
+    # Under the "null" policy lag1 needs the previous hour, so no kept row follows a gap
+    assert (features["gap_hours"] == 0).all()
+
+
+def test_gap_policies_fill_short_gaps_only():
+    raw = make_raw(24 * 10)
+    short, long = [100], list(range(150, 160))
+    raw = raw.drop(index=short + long)
+
+    strict = engineer_features(raw)
+    for policy in ("ffill", "interpolate"):
+        filled = build_features(raw, gap_policy=policy, gap_limit=3)
+        assert len(filled) > len(strict)
+        # Rows whose window would need the 10-hour hole still drop out
+        hole = raw["timestamp"].iloc[0] + pd.Timedelta(hours=150)
+        near = (filled["timestamp"] > hole) & (filled["timestamp"] < hole + pd.Timedelta(hours=10 + 24))
+        assert not near.any()
+        assert filled["imputed_hours_24"].max() == 1
+
+    ffilled = build_features(raw, gap_policy="ffill").set_index("timestamp")
+    t = raw["timestamp"].iloc[0] + pd.Timedelta(hours=101)
+    assert ffilled.loc[t, "pm2_5_lag1"] == np.float32(raw.loc[99, "pm2_5"])
+    assert ffilled.loc[t, "gap_hours"] == 1
+
+    interpolated = build_features(raw, gap_policy="interpolate").set_index("timestamp")
+    expected = (float(raw.loc[99, "pm2_5"]) + float(raw.loc[101, "pm2_5"])) / 2
+    assert interpolated.loc[t, "pm2_5_lag1"] == pytest.approx(expected)
+
+    with pytest.raises(ValueError):
+        build_features(raw, gap_policy="bogus")
+
+
+def test_multi_location_frames_do_not_leak_across_locations():
+    karachi, lahore = make_raw(24 * 10, seed=1), make_raw(24 * 12, seed=2)
+    karachi["location"], lahore["location"] = "karachi", "lahore"
+    both = pd.concat([karachi, lahore], ignore_index=True).sample(frac=1, random_state=0)
+
+    features = engineer_features(both)
+    for location, raw in (("karachi", karachi), ("lahore", lahore)):
+        expected = reference_features(raw)
+        actual = features[features["location"] == location][expected.columns]
+        assert_frames_close(actual.reset_index(drop=True), expected)
+
+
+def test_computes_only_requested_features():
+    feature_columns = ["pm2_5", "temperature", "hour", "pm2_5_lag1", "pm2_5_roll_mean_3"]
+    assert required_features(feature_columns) == ["hour", "pm2_5_lag1", "pm2_5_roll_mean_3"]
+
+    raw = make_raw(24 * 5)
+    features = engineer_features(raw, feature_columns=feature_columns)
+    derived = [c for c in features.columns if c in FEATURES or c == TARGET_COLUMN]
+    assert derived == ["hour", "pm2_5_lag1", "pm2_5_roll_mean_3", TARGET_COLUMN]
+
+    # A shorter warm-up: only the 3-hour window has to fill
+    assert len(features) == len(raw) - 2 - 1
+
+    full = reference_features(raw)
+    subset = features.set_index("timestamp").loc[full["timestamp"]].reset_index()
+    for column in ("pm2_5_lag1", "pm2_5_roll_mean_3", TARGET_COLUMN):
+        np.testing.assert_allclose(subset[column], full[column], rtol=1e-6)
+
+
+def test_lead_targets_look_up_by_time():
+    karachi, lahore = make_raw(48, seed=1), make_raw(48, seed=2)
+    karachi["location"], lahore["location"] = "karachi", "lahore"
+    karachi = karachi.drop(index=[10])
+    both = pd.concat([lahore, karachi], ignore_index=True).sample(frac=1, random_state=0)
+
+    leads = lead_targets(both, [1, 2, 24])
+    by_key = both.set_index(["location", "timestamp"])["pm2_5"]
+    for i, (location, ts) in enumerate(zip(both["location"], both["timestamp"])):
+        for j, h in enumerate([1, 2, 24]):
+            expected = by_key.get((location, ts + pd.Timedelta(hours=h)), np.nan)
+            np.testing.assert_equal(leads[i, j], np.float64(expected))
+
+
+def test_output_follows_compact_dtype_policy():
+    raw = make_raw(24 * 5).assign(location="karachi")
+    features = engineer_features(raw)
+    assert isinstance(features["location"].dtype, pd.CategoricalDtype)
+    assert features["pm2_5_roll_std_3"].dtype == np.float32
+    assert features["target_pm2_5"].dtype == np.float32
+    assert features["hour"].dtype == np.int8
+    assert features["gap_hours"].dtype == np.int32
+
+    wide = engineer_features(raw, compact=False)
+    assert wide["pm2_5_roll_std_3"].dtype == np.float64
+    np.testing.assert_allclose(features["pm2_5_roll_std_3"], wide["pm2_5_roll_std_3"], rtol=1e-6)
+
+
+@pytest.mark.parametrize("hours", [0, 1, 5, 24])
+def test_short_frames(hours):
+    raw = make_raw(hours)
+    assert engineer_features(raw).empty
@@ -0,0 +1,111 @@
+import mongomock
+import pandas as pd
+import pytest
+
+from data_pipeline.feature_store import MongoFeatureStore, ParquetFeatureStore
+from tests.helpers import make_features, make_raw
+
+
+@pytest.fixture(params=["mongo", "parquet"])
+def store(request, tmp_path):
+    if request.param == "mongo":
+        return MongoFeatureStore(mongomock.MongoClient().db.features)
+    return ParquetFeatureStore(str(tmp_path / "features"))
+
+
+def test_projection_and_time_range(store):
+    features = make_features("karachi")
+    store.write(features)
+
+    start = pd.Timestamp("2025-01-20", tz="UTC")
+    end = pd.Timestamp("2025-02-03", tz="UTC")
+    df = store.read(columns=["timestamp", "pm2_5_lag24"], start=start, end=end)
+
+    expected = features[(features["timestamp"] >= start) & (features["timestamp"] < end)]
+    assert list(df.columns) == ["location", "timestamp", "pm2_5_lag24"]
+    assert len(df) == len(expected) == 14 * 24
+    assert df["timestamp"].is_monotonic_increasing
+    pd.testing.assert_series_equal(
+        df["pm2_5_lag24"].reset_index(drop=True),
+        expected["pm2_5_lag24"].reset_index(drop=True),
+        check_dtype=False,
+    )
+
+
+def test_upsert_and_high_water_mark(store):
+    features = make_features("karachi")
+    store.write(features.iloc[:-5])
+    assert store.high_water_mark("karachi") == features["timestamp"].iloc[-6]
+
+    # Overlapping write: no duplicates, last value wins
+    store.write(features.iloc[-10:])
+    df = store.read(columns=["pm2_5"], locations=["karachi"])
+    assert len(df) == len(features)
+    assert store.high_water_mark("karachi") == features["timestamp"].iloc[-1]
+
+    latest = store.latest_rows("karachi", n=3, columns=["pm2_5"])
+    assert list(latest["timestamp"]) == list(features["timestamp"].iloc[-3:])
+
+
+def test_location_filter(store):
+    store.write(make_features("karachi", seed=0))
+    store.write(make_features("lahore", seed=1))
+
+    df = store.read(columns=["pm2_5"], locations=["lahore"])
+    assert set(df["location"]) == {"lahore"}
+    assert store.high_water_mark("nowhere") is None
+
+
+def test_legacy_rows_go_to_the_default_location():
+    from data_pipeline.ingest_features import adopt_legacy_rows
+
+    collection = mongomock.MongoClient()["aqi_test"]["features"]
+    collection.insert_many([
+        {"timestamp": pd.Timestamp("2024-01-01"), "pm2_5": 1.0},
+        {"timestamp": pd.Timestamp("2024-01-01"), "pm2_5": 2.0, "location": "lahore"},
+    ])
+    adopt_legacy_rows(collection)
+    assert sorted(doc["location"] for doc in collection.find()) == ["karachi", "lahore"]
+
+
+def test_streamed_hourly_ingest_matches_batch_ingest():
+    from data_pipeline.ingest_features import ingest_incremental
+    from data_pipeline.streaming_features import load_engine, save_engine
+
+    client = mongomock.MongoClient()
+    batch, streamed, state = (client["aqi_test"][name] for name in ("batch", "streamed", "feature_state"))
+    raw = make_raw(24 * 6).drop(index=[80, 81])
+
+    # Each hourly run sees a trailing 72-hour window, as fetched from Open-Meteo
+    for end in range(72, len(raw) + 1, 7):
+        window = raw.iloc[max(0, end - 72):end]
+        ingest_incremental(batch, window, "karachi")
+        engine = load_engine(state, "karachi")
+        ingest_incremental(streamed, window, "karachi", engine)
+        save_engine(state, "karachi", engine)
+
+    expected = pd.DataFrame(batch.find({}, {"_id": 0})).sort_values("timestamp", ignore_index=True)
+    actual = pd.DataFrame(streamed.find({}, {"_id": 0})).sort_values("timestamp", ignore_index=True)
+    assert len(actual) == len(expected) > 0
+    assert list(actual.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-5)
+
+
+def test_resumed_engine_backfills_an_empty_store(tmp_path):
+    from data_pipeline.ingest_features import ingest_incremental, ingest_into_store
+    from data_pipeline.streaming_features import load_engine, save_engine
+
+    client = mongomock.MongoClient()
+    features, state = client["aqi_test"]["features"], client["aqi_test"]["feature_state"]
+    raw = make_raw(24 * 8)
+
+    # State saved while ingesting into Mongo, then the backend switches
+    engine = load_engine(state, "karachi")
+    ingest_incremental(features, raw.iloc[:-3], "karachi", engine)
+    save_engine(state, "karachi", engine)
+
+    streamed = ParquetFeatureStore(str(tmp_path / "streamed"))
+    batch = ParquetFeatureStore(str(tmp_path / "batch"))
+    written = ingest_into_store(streamed, raw, "karachi", load_engine(state, "karachi"))
+    assert written == ingest_into_store(batch, raw, "karachi") == len(raw) - 25
+    assert streamed.high_water_mark("karachi") == batch.high_water_mark("karachi")
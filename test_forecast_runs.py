@@ -0,0 +1,139 @@
+from datetime import datetime, timezone
+
+import mongomock
+import pandas as pd
+import pytest
+
+from data_pipeline.ingest_features import write_full
+from inference.forecast_runs import (
+    LEGACY_POINTER_ID,
+    current_run_id,
+    latest_hour,
+    pointer_id,
+    publish_run,
+    read_daily,
+    read_hourly,
+    read_run,
+)
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()["aqi_test"]
+
+
+def hourly(value, hours=72):
+    timestamps = pd.date_range("2025-03-01", periods=hours, freq="h", tz="UTC")
+    return pd.DataFrame({"timestamp": timestamps, "predicted_pm2_5": float(value)})
+
+
+def daily(value):
+    return [{"date": f"2025-03-0{d}", "avg_pm2_5": float(value)} for d in (1, 2, 3)]
+
+
+def test_readers_see_only_the_published_run(db):
+    first = publish_run(db, hourly(10), daily(10), model_version=1)
+    second = publish_run(db, hourly(20), daily(20), model_version=2)
+
+    assert current_run_id(db) == second != first
+    rows = read_hourly(db)
+    assert len(rows) == 72 and {row["predicted_pm2_5"] for row in rows} == {20.0}
+    assert "run_id" not in rows[0] and "_id" not in rows[0]
+    assert [row["date"] for row in read_daily(db)] == ["2025-03-01", "2025-03-02", "2025-03-03"]
+    assert latest_hour(db)["timestamp"] == pd.Timestamp("2025-03-03 23:00").to_pydatetime()
+
+    # Older runs stay addressable by id until they expire
+    assert {row["predicted_pm2_5"] for row in read_hourly(db, first)} == {10.0}
+    assert read_run(db)["model_version"] == 2 and read_run(db)["hours"] == 72
+
+
+def test_unpublished_writes_are_invisible(db):
+    run_id = publish_run(db, hourly(10), daily(10))
+    # A run that dies halfway leaves documents no pointer names
+    db["forecast_hourly"].insert_one({"run_id": "crashed", "timestamp": pd.Timestamp("2025-03-01")})
+    assert current_run_id(db) == run_id
+    assert len(read_hourly(db)) == 72
+
+
+def test_run_indexes_and_ttl(db):
+    # Deployments from before expires_at have run_ttl on created_at
+    db["forecast_hourly"].create_index("created_at", expireAfterSeconds=60, name="run_ttl")
+    publish_run(db, hourly(10), daily(10))
+    indexes = db["forecast_hourly"].index_information()
+    assert indexes["run_timestamp"]["key"] == [("run_id", 1), ("timestamp", 1)]
+    assert indexes["run_ttl"]["key"] == [("expires_at", 1)]
+    assert indexes["run_ttl"]["expireAfterSeconds"] == 0
+    assert "run_ttl" in db["forecast_runs"].index_information()
+
+
+def test_only_superseded_runs_expire(db):
+    first = publish_run(db, hourly(10), daily(10))
+    for name in ("forecast_hourly", "forecast_daily", "forecast_runs"):
+        assert db[name].count_documents({"expires_at": {"$exists": True}}) == 0
+
+    # A crashed run before the next publish is retired along with the previous one
+    db["forecast_hourly"].insert_one({
+        "run_id": "crashed", "created_at": datetime.now(timezone.utc),
+        "timestamp": pd.Timestamp("2025-03-01"),
+    })
+    second = publish_run(db, hourly(20), daily(20))
+
+    for name in ("forecast_hourly", "forecast_daily"):
+        assert db[name].count_documents({"run_id": second, "expires_at": {"$exists": True}}) == 0
+        assert db[name].count_documents({"run_id": first, "expires_at": {"$exists": False}}) == 0
+    assert db["forecast_hourly"].find_one({"run_id": "crashed"})["expires_at"] is not None
+    assert "expires_at" in db["forecast_runs"].find_one({"_id": first})
+    assert "expires_at" not in db["forecast_runs"].find_one({"_id": second})
+    assert "expires_at" not in db["forecast_runs"].find_one({"_id": pointer_id()})
+    assert "expires_at" not in read_hourly(db, first)[0]
+
+
+def test_locations_keep_their_own_pointer(db):
+    karachi = publish_run(db, hourly(10), daily(10), location="karachi")
+    lahore = publish_run(db, hourly(20), daily(20), location="lahore")
+
+    assert current_run_id(db, "karachi") == karachi
+    assert current_run_id(db, "lahore") == lahore
+    assert {row["predicted_pm2_5"] for row in read_hourly(db, location="karachi")} == {10.0}
+    assert "location" not in read_hourly(db, location="lahore")[0]
+    # Publishing lahore retires nothing of karachi's
+    for name in ("forecast_hourly", "forecast_daily", "forecast_runs"):
+        assert db[name].count_documents({"expires_at": {"$exists": True}}) == 0
+
+    newer = publish_run(db, hourly(30), daily(30), location="lahore")
+    assert current_run_id(db, "karachi") == karachi
+    assert db["forecast_hourly"].count_documents({"run_id": lahore, "expires_at": {"$exists": False}}) == 0
+    assert db["forecast_hourly"].count_documents({"expires_at": {"$exists": True}}) == 72
+    assert read_run(db, location="lahore")["run_id"] == newer
+
+
+def test_legacy_pointer_serves_the_default_location(db):
+    db["forecast_hourly"].insert_many(hourly(5).assign(run_id="old", created_at=datetime.now(timezone.utc)).to_dict("records"))
+    db["forecast_runs"].insert_one({"_id": LEGACY_POINTER_ID, "run_id": "old"})
+    assert current_run_id(db) == "old"
+    assert current_run_id(db, "lahore") is None
+
+    # The first keyed publish takes over and retires the unlocated run
+    run_id = publish_run(db, hourly(10), daily(10))
+    assert current_run_id(db) == run_id
+    assert db["forecast_hourly"].count_documents({"run_id": "old", "expires_at": {"$exists": False}}) == 0
+
+
+def test_pre_run_documents_are_still_served(db):
+    db["forecast_hourly"].insert_many(hourly(5).to_dict("records"))
+    assert current_run_id(db) is None
+    assert len(read_hourly(db)) == 72
+
+
+def test_full_reload_swaps_collections(db):
+    collection = db["features"]
+    collection.insert_one({"location": "karachi", "timestamp": pd.Timestamp("2024-01-01"), "pm2_5": 1.0})
+    frame = pd.DataFrame({
+        "location": "karachi",
+        "timestamp": pd.date_range("2025-01-01", periods=5, freq="h"),
+        "pm2_5": 2.0,
+    })
+    assert write_full(collection, frame) == 5
+    assert collection.count_documents({}) == 5
+    assert "features_staging" not in db.list_collection_names()
+    assert "location_timestamp_unique" in collection.index_information()
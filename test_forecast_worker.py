@@ -0,0 +1,80 @@
+import mongomock
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_store import MongoFeatureStore
+from inference.forecast_runs import read_daily, read_hourly
+from inference.forecast_worker import ForecastWorker, NoFeaturesError
+from inference.load_best_model import ModelCache
+from tests.helpers import make_features, publish
+
+FEATURE_COLUMNS = list(DEFAULT_FEATURE_COLUMNS)
+
+
+@pytest.fixture
+def setup(tmp_path):
+    db = mongomock.MongoClient()["aqi_test"]
+    features = make_features("karachi", hours=24 * 20)
+    store = MongoFeatureStore(db["features"])
+    store.write(features.iloc[:-5])
+
+    model = RandomForestRegressor(n_estimators=10, max_depth=6, random_state=0, n_jobs=1)
+    model.fit(features[FEATURE_COLUMNS], features["target_pm2_5"])
+    publish(db["model_registry"], tmp_path, "RandomForest", model, FEATURE_COLUMNS)
+
+    cache = ModelCache(db["model_registry"], base_dir=str(tmp_path))
+    worker = ForecastWorker(db, feature_store=store, cache=cache, location="karachi",
+                            schedule_seconds=3600)
+    return db, features, store, worker
+
+
+def test_run_stores_forecast_and_timing(setup):
+    db, features, store, worker = setup
+    timing = worker.run_once()
+
+    hourly = read_hourly(db)
+    assert len(hourly) == 72
+    assert len(read_daily(db)) >= 3
+    assert {"predicted_pm2_5", "predicted_aqi", "category", "predicted_pm2_5_p90"} <= set(hourly[0])
+
+    assert timing.hours == 72 and timing.model_version == 1
+    assert timing.total_ms == pytest.approx(timing.features_ms + timing.forecast_ms + timing.store_ms)
+    assert list(worker.timings) == [timing]
+
+    # Readers move to the new run; the old one is kept until its TTL
+    second = worker.run_once()
+    assert second.run_id != timing.run_id
+    assert len(read_hourly(db)) == 72
+    assert db["forecast_hourly"].count_documents({}) == 144
+
+
+def test_poll_wakes_on_new_features_and_new_model(setup, tmp_path):
+    db, features, store, worker = setup
+    assert worker.poll() == "features"
+    worker.run_once()
+    assert worker.poll() is None
+
+    store.write(features.iloc[-5:])
+    assert worker.poll() == "features"
+    worker.run_once("features")
+    assert worker.history["timestamp"].iloc[-1] == features["timestamp"].iloc[-1]
+    assert worker.poll() is None
+
+    ridge = Ridge().fit(features[FEATURE_COLUMNS], features["target_pm2_5"])
+    publish(db["model_registry"], tmp_path, "Ridge", ridge, FEATURE_COLUMNS)
+    worker.cache.refresh()
+    assert worker.poll() == "model"
+    assert worker.run_once("model").model_version == 2
+    assert "predicted_pm2_5_p90" not in read_hourly(db)[0]
+
+
+def test_a_location_without_features_skips_the_run(setup):
+    db, features, store, worker = setup
+    worker.location = "lahore"
+    assert worker.poll() is not None
+    assert worker.run_once(worker.poll()) is None
+    assert not worker.timings and db["forecast_runs"].count_documents({}) == 0
+    with pytest.raises(NoFeaturesError):
+        worker._sync_history()
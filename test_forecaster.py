@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import Ridge
+
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from data_pipeline.feature_spec import lead_targets
+from inference.forecaster import DirectForecaster, Forecaster, band_columns, make_forecaster
+from tests.helpers import make_raw
+
+FEATURE_COLUMNS = list(DEFAULT_FEATURE_COLUMNS)
+
+
+@pytest.fixture(scope="module")
+def features():
+    return engineer_features(make_raw(24 * 30))
+
+
+@pytest.fixture
+def last_row(features):
+    return features.tail(1).reset_index(drop=True)
+
+
+class Oracle:
+    """Predicts the true next pm2_5 and records every input row it is given."""
+
+    def __init__(self, raw, start):
+        self.truth = raw.set_index("timestamp")["pm2_5"].astype(float)
+        self.next_hour = start + pd.Timedelta(hours=1)
+        self.inputs = []
+
+    def predict(self, X):
+        self.inputs.append(np.array(X[0], dtype=float))
+        value = self.truth[self.next_hour]
+        self.next_hour += pd.Timedelta(hours=1)
+        return np.array([value])
+
+
+def test_lags_and_windows_advance_like_engineer_features():
+    raw = make_raw(24 * 20)
+    features = engineer_features(raw).reset_index(drop=True)
+    cut = len(features) - 24 * 7
+    history = features.iloc[cut - 30:cut]
+    start = history["timestamp"].iloc[-1]
+
+    # Every pm2_5-derived feature the registry knows about
+    columns = [c for c in features.columns if c.startswith("pm2_5_") or c in ("pm2_5", "hour", "day")]
+    oracle = Oracle(raw, start)
+    Forecaster(oracle, columns).forecast(history, horizon=24 * 7 - 1)
+
+    # Fed the truth, step h must see exactly the row engineer_features built
+    expected = features.iloc[cut - 1:cut - 1 + len(oracle.inputs)][columns].to_numpy(dtype=float)
+    np.testing.assert_allclose(np.array(oracle.inputs), expected, rtol=1e-6, atol=1e-5)
+
+
+def test_one_row_history_is_enough(features, last_row):
+    model = Ridge().fit(features[FEATURE_COLUMNS], features["target_pm2_5"])
+    from_row = Forecaster(model, FEATURE_COLUMNS).forecast(last_row, horizon=12)
+    from_history = Forecaster(model, FEATURE_COLUMNS).forecast(features.tail(30), horizon=12)
+
+    # The first step reads the stored row as is
+    assert from_row["predicted_pm2_5"].iloc[0] == from_history["predicted_pm2_5"].iloc[0]
+    assert from_row["predicted_pm2_5"].notna().all()
+
+
+def test_step_cost_does_not_grow_with_horizon(features):
+    model = Ridge().fit(features[FEATURE_COLUMNS], features["target_pm2_5"])
+    forecaster = Forecaster(model, FEATURE_COLUMNS)
+    assert forecaster.history_hours == 25
+
+    forecast = forecaster.forecast(features.tail(25), horizon=24 * 7)
+    assert len(forecast) == 24 * 7
+    assert np.isfinite(forecast["predicted_pm2_5"]).all()
+
+
+def test_timestamps_and_calendar_advance(features, last_row):
+    model = Ridge().fit(features[FEATURE_COLUMNS], features["target_pm2_5"])
+    forecaster = Forecaster(model, FEATURE_COLUMNS)
+    forecast = forecaster.forecast(last_row, horizon=30)
+
+    start = last_row["timestamp"].iloc[0]
+    assert forecast["timestamp"].iloc[0] == start + np.timedelta64(1, "h")
+    assert forecast["timestamp"].diff().dropna().eq(np.timedelta64(1, "h")).all()
+
+    last = forecast["timestamp"].iloc[-2]
+    x = dict(zip(FEATURE_COLUMNS, forecaster._x[0]))
+    assert x["hour"] == (last + np.timedelta64(1, "h")).hour
+    # The vector now describes the last predicted hour
+    predicted = forecast["predicted_pm2_5"]
+    assert x["pm2_5"] == predicted.iloc[-1]
+    assert x["pm2_5_lag1"] == predicted.iloc[-2]
+    assert x["pm2_5_lag3"] == predicted.iloc[-4]
+    assert x["pm2_5_roll_mean_3"] == pytest.approx(predicted.iloc[-3:].mean())
+
+
+def test_direct_forecaster_predicts_trajectory_in_one_call(features, last_row):
+    horizons = list(range(1, 25))
+    Y = lead_targets(features, horizons)
+    complete = ~np.isnan(Y).any(axis=1)
+    model = Ridge().fit(features[FEATURE_COLUMNS][complete], Y[complete])
+
+    entry = {"strategy": "direct", "feature_columns": FEATURE_COLUMNS, "horizons": horizons}
+    forecaster = make_forecaster(model, entry)
+    assert isinstance(forecaster, DirectForecaster)
+
+    forecast = forecaster.forecast(features.tail(25), horizon=12)
+    expected = model.predict(last_row[FEATURE_COLUMNS])[0][:12]
+    np.testing.assert_allclose(forecast["predicted_pm2_5"], expected, rtol=1e-6)
+    assert forecast["timestamp"].iloc[0] == last_row["timestamp"].iloc[0] + pd.Timedelta(hours=1)
+
+    with pytest.raises(ValueError):
+        forecaster.forecast(last_row, horizon=48)
+
+
+def test_registry_entries_without_strategy_run_recursively(features):
+    model = Ridge().fit(features[FEATURE_COLUMNS], features["target_pm2_5"])
+    assert isinstance(make_forecaster(model, {"feature_columns": FEATURE_COLUMNS}), Forecaster)
+    with pytest.raises(ValueError):
+        make_forecaster(model, {"feature_columns": FEATURE_COLUMNS, "strategy": "bogus"})
+
+
+def test_forest_forecasts_carry_quantile_bands(features, last_row):
+    from sklearn.ensemble import RandomForestRegressor
+
+    model = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0, n_jobs=1)
+    model.fit(features[FEATURE_COLUMNS], features["target_pm2_5"])
+    entry = {"feature_columns": FEATURE_COLUMNS}
+
+    forecast = make_forecaster(model, entry).forecast(features.tail(25), horizon=24)
+    bands = forecast[band_columns()].to_numpy()
+    assert (bands[:, 0] <= bands[:, 1]).all() and (bands[:, 1] <= bands[:, 2]).all()
+    assert (bands[:, 0] < bands[:, 2]).any()
+
+    # The bands ride along; the point forecast is the sklearn one
+    plain = make_forecaster(model, entry, compile=False).forecast(features.tail(25), horizon=24)
+    np.testing.assert_array_equal(forecast["predicted_pm2_5"], plain["predicted_pm2_5"])
+    assert list(plain.columns) == ["timestamp", "predicted_pm2_5"]
+
+    horizons = list(range(1, 13))
+    Y = lead_targets(features, horizons)
+    complete = ~np.isnan(Y).any(axis=1)
+    direct = RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0, n_jobs=1)
+    direct.fit(features[FEATURE_COLUMNS][complete], Y[complete])
+    entry = {"strategy": "direct", "feature_columns": FEATURE_COLUMNS, "horizons": horizons}
+    forecast = make_forecaster(direct, entry).forecast(last_row, horizon=12)
+    assert forecast[band_columns()].notna().all().all()
+    assert len(forecast) == 12
+
+
+def test_forecast_origins_matches_one_at_a_time():
+    raw = make_raw(24 * 20).drop(index=[200, 201, 350])   # gaps in the history
+    features = engineer_features(raw, gap_policy="ffill").reset_index(drop=True)
+    model = Ridge().fit(features[FEATURE_COLUMNS], features["target_pm2_5"])
+    forecaster = Forecaster(model, FEATURE_COLUMNS)
+
+    origins = np.array([0, 10, 199, 220, 360, len(features) - 1])
+    batched = forecaster.forecast_origins(features, origins, horizon=30)
+    for row, origin in zip(batched, origins):
+        one = forecaster.forecast(features.iloc[max(0, origin - 24):origin + 1], horizon=30)
+        np.testing.assert_allclose(row, one["predicted_pm2_5"], rtol=1e-9)
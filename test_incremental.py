@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+import training.incremental as incremental
+from training.incremental import (
+    TARGET_COLUMN,
+    incremental_update,
+    split_validation,
+    stage_params,
+    update_model,
+)
+
+FEATURES = ["a", "b"]
+
+
+def make_frame(rows, start="2024-01-01", seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "timestamp": pd.date_range(start, periods=rows, freq="h", tz="UTC"),
+        "a": rng.normal(size=rows),
+        "b": rng.normal(size=rows),
+    })
+    frame[TARGET_COLUMN] = 2 * frame["a"] - frame["b"] + rng.normal(scale=0.1, size=rows)
+    return frame
+
+
+def test_forest_refresh_keeps_its_size_and_retires_the_oldest_trees():
+    history = make_frame(500)
+    forest = RandomForestRegressor(n_estimators=20, random_state=0).fit(history[FEATURES], history[TARGET_COLUMN])
+    window = make_frame(100, start="2024-02-01", seed=1)
+
+    updated, mode = update_model(forest, window[FEATURES], window[TARGET_COLUMN])
+    assert mode == "forest_refresh"
+    assert len(updated.estimators_) == updated.n_estimators == 20
+    # One new tree (5%), and the first old tree is gone
+    assert updated.estimators_[0] is not forest.estimators_[0]
+    np.testing.assert_array_equal(updated.estimators_[0].tree_.value, forest.estimators_[1].tree_.value)
+    assert len(forest.estimators_) == 20     # the production model is left alone
+
+
+def test_boosting_warm_start_and_stage_cap(monkeypatch):
+    history = make_frame(400)
+    model = HistGradientBoostingRegressor(max_iter=30, early_stopping=False).fit(
+        history[FEATURES], history[TARGET_COLUMN])
+    updated, mode = update_model(model, history[FEATURES][:100], history[TARGET_COLUMN][:100])
+    assert mode == "warm_start" and updated.n_iter_ == 30 + incremental.BOOST_STAGES
+    assert not updated.warm_start and stage_params(model) == {"max_iter": 30}
+
+    monkeypatch.setattr(incremental, "MAX_BOOST_STAGES", 40)
+    assert update_model(model, history[FEATURES], history[TARGET_COLUMN]) == (None, "stage_cap")
+
+
+def test_guard_falls_back_to_a_full_refit():
+    history = make_frame(600)
+    model = Ridge().fit(history[FEATURES][:400], history[TARGET_COLUMN][:400])
+    window = history.iloc[-72:]
+
+    kept, report = incremental_update(model, window, FEATURES, load_history=pytest.fail,
+                                      validation_hours=24, tolerance=1.0)
+    assert not report["fallback"] and report["mode"] == "window_refit" and report["window_rows"] == 48
+
+    # Tolerance below -100% can never be met: the guard must refit on the whole history
+    loaded = []
+    refit, report = incremental_update(
+        model, window, FEATURES, load_history=lambda: loaded.append(1) or history,
+        validation_hours=24, tolerance=-1.5,
+    )
+    assert report["fallback"] and loaded and report["full_rows"] == 600 - 24
+    assert set(report["metrics"]) == {"RMSE", "MAE", "R2"}
+
+
+def test_validation_holds_out_hours_for_every_location():
+    window = pd.concat([
+        make_frame(72).assign(location="karachi"),
+        make_frame(72, seed=1).assign(location="lahore"),
+    ]).sort_values("timestamp", kind="stable")
+    train, valid = split_validation(window, 24)
+    assert len(valid) == 48 and set(valid["location"]) == {"karachi", "lahore"}
+    assert train["timestamp"].max() < valid["timestamp"].min()
+    assert valid["timestamp"].nunique() == 24
+
+    model = Ridge().fit(window[FEATURES], window[TARGET_COLUMN])
+    _, report = incremental_update(model, window, FEATURES, load_history=pytest.fail,
+                                   validation_hours=24, tolerance=1.0)
+    assert report["window_rows"] == 96 and report["validation_rows"] == 48
+
+
+def test_short_window_is_refused():
+    history = make_frame(100)
+    model = Ridge().fit(history[FEATURES], history[TARGET_COLUMN])
+    for rows in (0, 24):
+        with pytest.raises(ValueError, match="validation hours"):
+            incremental_update(model, history.iloc[:rows], FEATURES, load_history=pytest.fail,
+                               validation_hours=24)
+
+
+def test_main_skips_the_update_after_an_outage(monkeypatch, tmp_path, capsys):
+    import joblib
+    import mongomock
+
+    import data_pipeline.bulk_writer
+    import inference.load_best_model
+    import training.load_features
+
+    history = make_frame(100)
+    (tmp_path / "models").mkdir()
+    joblib.dump(Ridge().fit(history[FEATURES], history[TARGET_COLUMN]), tmp_path / "models" / "Ridge.pkl")
+    client = mongomock.MongoClient()
+    registry = client["aqi_project"]["model_registry"]
+    registry.insert_one({"version": 4, "model_name": "Ridge", "is_production": True,
+                         "feature_columns": FEATURES, "model_path": "models/Ridge.pkl"})
+
+    monkeypatch.setattr(data_pipeline.bulk_writer, "mongo_client", lambda: client)
+    monkeypatch.setattr(inference.load_best_model, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(training.load_features, "load_training_frame", lambda *a, **k: history.iloc[:10])
+
+    incremental.main(["--validation-hours", "24"])
+    assert "Skipping the update: 10 rows" in capsys.readouterr().out
+    assert registry.count_documents({}) == 1
@@ -0,0 +1,72 @@
+import os
+import time
+
+import mongomock
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from inference.load_best_model import ModelCache, artifact_checksum, compiled_path
+from inference.tree_engine import CompiledEnsemble
+from tests.helpers import publish
+
+rng = np.random.default_rng(0)
+X = rng.normal(size=(200, 4))
+y = X @ [1.0, -2.0, 0.5, 0.0]
+
+
+@pytest.fixture
+def registry():
+    return mongomock.MongoClient()["aqi_test"]["model_registry"]
+
+
+def test_loads_once_and_compiles_tree_models(registry, tmp_path):
+    forest = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    publish(registry, tmp_path, "RandomForest", forest)
+    cache = ModelCache(registry, base_dir=str(tmp_path))
+
+    loaded = cache.current()
+    assert cache.current() is loaded
+    assert cache.refresh() is False
+
+    assert isinstance(loaded.predictor, CompiledEnsemble)
+    assert isinstance(loaded.predictor.left, np.memmap)
+    assert os.path.isdir(compiled_path(loaded.path, loaded.checksum))
+    np.testing.assert_array_equal(loaded.predictor.predict(X), loaded.model.predict(X))
+
+
+def test_new_version_is_swapped_in(registry, tmp_path):
+    publish(registry, tmp_path, "Ridge", Ridge().fit(X, y))
+    cache = ModelCache(registry, base_dir=str(tmp_path))
+    first = cache.current()
+    assert first.predictor is first.model
+
+    publish(registry, tmp_path, "Ridge2", Ridge(alpha=10).fit(X, y))
+    assert cache.refresh() is True
+    assert cache.current().key == (2, artifact_checksum(tmp_path / "models" / "Ridge2.pkl"))
+    # Whoever still holds the old model keeps a complete one
+    assert first.entry["version"] == 1
+
+
+def test_background_watch_and_bad_artifact(registry, tmp_path):
+    publish(registry, tmp_path, "Ridge", Ridge().fit(X, y))
+    cache = ModelCache(registry, poll_seconds=0.05, base_dir=str(tmp_path)).start()
+    try:
+        assert cache.current().entry["version"] == 1
+
+        # A registered checksum that the file no longer matches is refused
+        publish(registry, tmp_path, "Broken", Ridge().fit(X, y))
+        with open(tmp_path / "models" / "Broken.pkl", "ab") as f:
+            f.write(b"tampered")
+        time.sleep(0.3)
+        assert isinstance(cache.last_error, ValueError)
+        assert cache.current().entry["version"] == 1
+
+        publish(registry, tmp_path, "Ridge3", Ridge(alpha=3).fit(X, y))
+        deadline = time.time() + 5
+        while cache.current().entry["version"] != 3 and time.time() < deadline:
+            time.sleep(0.05)
+        assert cache.current().entry["version"] == 3
+    finally:
+        cache.stop()
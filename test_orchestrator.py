@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+
+import joblib
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from training import memory
+from training.orchestrator import fit_candidates, process_pool, thread_budget
+
+
+def make_models():
+    return {
+        "RandomForest": RandomForestRegressor(n_estimators=10, max_depth=4, random_state=0, n_jobs=-1),
+        "Ridge": Ridge(),
+        "GradientBoosting": GradientBoostingRegressor(n_estimators=10, random_state=0),
+        "HistGradientBoosting": HistGradientBoostingRegressor(max_iter=10, random_state=0),
+    }
+
+
+def test_thread_budget_never_exceeds_the_cpus():
+    budget = thread_budget(make_models(), cpus=8)
+    assert budget == {"RandomForest": 3, "Ridge": 1, "GradientBoosting": 1, "HistGradientBoosting": 3}
+    assert sum(budget.values()) <= 8
+    assert set(thread_budget(make_models(), cpus=1).values()) == {1}
+
+
+def test_pool_matches_sequential_fits(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 5))
+    y = X @ rng.normal(size=5) + rng.normal(scale=0.1, size=400)
+    split = (X[:300], y[:300], X[300:], y[300:])
+
+    os.makedirs(tmp_path / "serial")
+    os.makedirs(tmp_path / "pool")
+    serial = fit_candidates(make_models(), *split, tmp_path / "serial", cpus=1)
+    pooled = fit_candidates(make_models(), *split, tmp_path / "pool", cpus=4)
+
+    assert list(pooled) == list(make_models())
+    for name, fit in pooled.items():
+        assert fit["RMSE"] == serial[name]["RMSE"]
+        assert fit["fit_seconds"] > 0 and fit["peak_memory_mb"] >= 0
+        model = joblib.load(tmp_path / "pool" / f"{name}.pkl")
+        if name == "RandomForest":
+            assert model.n_jobs == -1    # the budget applies to the fit only
+
+
+def test_pools_fork_where_available(monkeypatch):
+    monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["fork", "spawn"])
+    with process_pool(1) as pool:
+        assert pool._mp_context.get_start_method() == "fork"
+    monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    with process_pool(1) as pool:
+        assert pool._mp_context.get_start_method() == multiprocessing.get_start_method()
+
+
+def test_peak_rss_without_a_probe(monkeypatch):
+    monkeypatch.setattr(memory, "current_rss", lambda: None)
+    with memory.PeakRSS() as probe:
+        pass
+    assert probe.growth_mb is None
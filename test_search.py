@@ -0,0 +1,54 @@
+import mongomock
+import numpy as np
+from sklearn.linear_model import Ridge
+from sklearn.tree import DecisionTreeRegressor
+
+from training.search import rung_sizes, successive_halving
+
+SPACES = {
+    "Ridge": {"alpha": [0.1, 1000.0, 10000.0]},
+    "Tree": {"max_depth": [1, 3, 6], "min_samples_leaf": [1, 5]},
+}
+
+
+def make_data(rows=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, 3))
+    y = 3 * X[:, 0] - X[:, 1] + rng.normal(scale=0.1, size=rows)
+    return X, y
+
+
+def search(X, y, trials):
+    models = {"Ridge": Ridge(), "Tree": DecisionTreeRegressor(random_state=0)}
+    return successive_halving(models, X, y, trials=trials, spaces=SPACES, cpus=1,
+                              factor=2, min_rows=150, n_folds=2)
+
+
+def test_rungs_grow_from_fixed_prefixes():
+    assert rung_sizes(1000, min_rows=150, factor=2) == [150, 300, 600, 1000]
+    assert rung_sizes(100, min_rows=150) == [100]
+
+
+def test_halving_picks_the_right_configuration_and_caches_trials():
+    trials = mongomock.MongoClient()["test"]["model_trials"]
+    X, y = make_data()
+
+    first = search(X, y, trials)
+    assert first["Ridge"]["params"] == {"alpha": 0.1}
+    assert first["Tree"]["params"]["max_depth"] == 6
+    # Rungs of 150, 300 and 600 rows: 3 + 2 + 2 Ridge trials, 6 + 3 + 2 tree trials
+    assert (first["Ridge"]["evaluated"], first["Tree"]["evaluated"]) == (7, 11)
+    assert first["Tree"]["rows"] == 600
+    assert trials.count_documents({}) == 18
+
+    again = search(X, y, trials)
+    assert again["Tree"]["params"] == first["Tree"]["params"]
+    assert again["Tree"]["evaluated"] == 0 and again["Tree"]["cached"] == 11
+
+    # A day later the fixed-size rungs are all cached; only the two
+    # finalists run again, on the new full-data rung
+    X_more, y_more = make_data(rows=624)
+    X_more[:600], y_more[:600] = X, y
+    later = search(X_more, y_more, trials)
+    assert later["Tree"]["evaluated"] == 2 and later["Tree"]["cached"] == 11
+    assert later["Tree"]["rows"] == 624
@@ -0,0 +1,119 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.feature_schema import PM2_5_LAGS, PM10_LAGS, ROLL_MEAN_WINDOWS, ROLL_STD_WINDOWS
+from data_pipeline.feature_engineering import engineer_features
+from data_pipeline.streaming_features import (
+    CAPACITY,
+    RESYNC_EVERY,
+    SOURCE_WINDOWS,
+    StreamingFeatureEngine,
+)
+from tests.helpers import make_raw
+
+
+def assert_matches_batch(raw, streamed):
+    batch = engineer_features(raw).drop(columns=["target_pm2_5"])
+    streamed = streamed.set_index("timestamp")
+    batch = batch.set_index("timestamp")
+
+    # engineer_features drops the newest row (no target yet)
+    assert batch.index.isin(streamed.index).all()
+    streamed = streamed.loc[batch.index]
+
+    assert list(streamed.columns) == list(batch.columns)
+    for column in batch.columns:
+        np.testing.assert_allclose(
+            streamed[column].astype(float),
+            batch[column].astype(float),
+            rtol=1e-6, atol=1e-6,
+            err_msg=column,
+        )
+
+
+def test_matches_engineer_features():
+    raw = make_raw(24 * 14)
+    streamed = StreamingFeatureEngine().update_frame(raw)
+    assert_matches_batch(raw, streamed)
+
+
+def test_skips_incomplete_rows_like_dropna():
+    raw = make_raw(24 * 5)
+    raw.loc[[30, 31, 70], "pm10"] = np.nan
+    raw.loc[50, "humidity"] = np.nan
+
+    streamed = StreamingFeatureEngine().update_frame(raw)
+    assert_matches_batch(raw, streamed)
+
+
+def test_missing_hours_are_gaps_not_shifts():
+    raw = make_raw(24 * 6).drop(index=[60, 61, 62, 90])
+    streamed = StreamingFeatureEngine().update_frame(raw)
+    assert_matches_batch(raw, streamed)
+
+    # No row whose 24-hour lookback touches a missing hour is emitted
+    hole = raw["timestamp"].iloc[0] + pd.Timedelta(hours=60)
+    touching = (streamed["timestamp"] >= hole) & (streamed["timestamp"] < hole + pd.Timedelta(hours=27))
+    assert not touching.any()
+
+
+def test_no_rows_until_warm():
+    engine = StreamingFeatureEngine()
+    rows = [engine.update(obs) for obs in make_raw(25).to_dict("records")]
+    assert rows[:24] == [None] * 24
+    assert rows[24] is not None
+
+
+def test_running_sums_stay_accurate_across_resync():
+    raw = make_raw(RESYNC_EVERY * 3 + 17)
+    streamed = StreamingFeatureEngine().update_frame(raw)
+    assert_matches_batch(raw, streamed)
+
+
+@pytest.mark.parametrize("split", [10, 25, 200])
+def test_state_round_trip_resumes_stream(split):
+    raw = make_raw(24 * 10)
+    first, second = raw.iloc[:split], raw.iloc[split:]
+
+    engine = StreamingFeatureEngine()
+    head = engine.update_frame(first)
+
+    state = json.loads(json.dumps(engine.to_state()))
+    resumed = StreamingFeatureEngine.from_state(state)
+    tail = resumed.update_frame(second)
+
+    streamed = pd.concat([head, tail], ignore_index=True)
+    assert_matches_batch(raw, streamed)
+
+
+def test_buffers_follow_the_feature_schema():
+    windows = tuple(sorted(set(ROLL_MEAN_WINDOWS) | set(ROLL_STD_WINDOWS)))
+    assert SOURCE_WINDOWS == {"pm2_5": windows, "pm10": ()}
+    assert CAPACITY == max(PM2_5_LAGS + PM10_LAGS + windows) + 1
+
+
+@pytest.mark.parametrize("split", [0, 30, 100])
+def test_labeled_rows_are_the_batch_rows(split):
+    raw = make_raw(24 * 8).drop(index=[70, 71, 130])
+    raw.loc[150, "pm2_5"] = np.nan
+    first, second = raw.iloc[:split], raw.iloc[split:]
+
+    engine = StreamingFeatureEngine()
+    head = engine.update_frame(first, labeled=True)
+    resumed = StreamingFeatureEngine.from_state(json.loads(json.dumps(engine.to_state())))
+    streamed = pd.concat([head, resumed.update_frame(second, labeled=True)], ignore_index=True)
+
+    batch = engineer_features(raw)
+    assert list(streamed.columns) == list(batch.columns)
+    pd.testing.assert_series_equal(streamed["timestamp"], batch["timestamp"].reset_index(drop=True))
+    np.testing.assert_allclose(streamed["target_pm2_5"], batch["target_pm2_5"].astype(float), rtol=1e-6)
+
+
+def test_state_from_another_schema_is_refused():
+    state = StreamingFeatureEngine().to_state()
+    state["windows"]["pm2_5"] = [3, 6]
+    with pytest.raises(ValueError, match="different feature schema"):
+        StreamingFeatureEngine.from_state(state)
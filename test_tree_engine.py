@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from data_pipeline.feature_engineering import engineer_features
+from inference.forecaster import make_forecaster
+from inference.tree_engine import CompiledEnsemble, compile_model, maybe_compile
+from tests.helpers import make_raw
+
+FEATURE_COLUMNS = list(DEFAULT_FEATURE_COLUMNS)
+
+
+@pytest.fixture(scope="module")
+def data():
+    features = engineer_features(make_raw(24 * 30))
+    return features[FEATURE_COLUMNS].to_numpy(), features["target_pm2_5"].to_numpy()
+
+
+@pytest.mark.parametrize("model", [
+    RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0, n_jobs=1),
+    ExtraTreesRegressor(n_estimators=20, random_state=0, n_jobs=1),
+    GradientBoostingRegressor(n_estimators=50, subsample=0.8, random_state=0),
+    GradientBoostingRegressor(n_estimators=20, init="zero", random_state=0),
+])
+def test_compiled_predictions_are_bit_identical(data, model):
+    X, y = data
+    model.fit(X, y)
+    compiled = compile_model(model)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    np.testing.assert_array_equal(compiled.predict(X[:1]), model.predict(X[:1]))
+
+
+def test_multi_output_forest(data):
+    X, y = data
+    Y = np.column_stack([y, np.roll(y, -1), np.roll(y, -2)])
+    model = RandomForestRegressor(n_estimators=10, random_state=0, n_jobs=1).fit(X, Y)
+    prediction = compile_model(model).predict(X)
+    assert prediction.shape == (len(X), 3)
+    np.testing.assert_array_equal(prediction, model.predict(X))
+
+
+def test_save_and_mmap_load_round_trip(data, tmp_path):
+    X, y = data
+    model = GradientBoostingRegressor(n_estimators=30, random_state=0).fit(X, y)
+    compile_model(model).save(tmp_path / "gb")
+
+    loaded = CompiledEnsemble.load(tmp_path / "gb")
+    assert isinstance(loaded.left, np.memmap)
+    np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+
+
+def test_other_models_are_left_alone(data):
+    X, y = data
+    ridge = Ridge().fit(X, y)
+    assert maybe_compile(ridge) is ridge
+    with pytest.raises(TypeError):
+        compile_model(ridge)
+
+
+def test_forecaster_uses_compiled_trees(data):
+    X, y = data
+    model = RandomForestRegressor(n_estimators=10, random_state=0, n_jobs=1).fit(X, y)
+    entry = {"feature_columns": FEATURE_COLUMNS}
+    assert isinstance(make_forecaster(model, entry).model, CompiledEnsemble)
+    assert make_forecaster(model, entry, compile=False).model is model
+
+
+def test_quantiles_match_per_tree_predictions(data):
+    X, y = data
+    model = RandomForestRegressor(n_estimators=25, random_state=0, n_jobs=1).fit(X, y)
+    point, bands = compile_model(model).predict_quantiles(X[:50], [0.1, 0.5, 0.9])
+
+    per_tree = np.stack([tree.predict(X[:50].astype(np.float32)) for tree in model.estimators_], axis=1)
+    np.testing.assert_array_equal(point, model.predict(X[:50]))
+    np.testing.assert_allclose(bands, np.quantile(per_tree, [0.1, 0.5, 0.9], axis=1).T)
+
+    boosted = GradientBoostingRegressor(n_estimators=5, random_state=0).fit(X, y)
+    with pytest.raises(TypeError):
+        compile_model(boosted).predict_quantiles(X[:5], [0.5])
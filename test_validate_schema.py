@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_pipeline.feature_engineering import engineer_features
+from data_pipeline.validate_schema import validate, validate_frame
+from tests.helpers import make_raw
+
+
+@pytest.fixture
+def features():
+    df = engineer_features(make_raw(24 * 5))
+    df["location"] = "karachi"
+    return df
+
+
+def checks(report):
+    return {(e["column"], e["check"]) for e in report.errors}
+
+
+def test_engineered_features_pass(features):
+    report = validate_frame(features)
+    assert report.ok, report.errors
+    assert report.rows == len(features)
+    assert set(report.null_counts.values()) == {0}
+
+
+def test_reports_columns_nulls_and_ranges(features):
+    features = features.drop(columns=["pressure"])
+    features["extra"] = 1.0
+    features.loc[features.index[3], "humidity"] = 130.0
+    features.loc[features.index[4], "pm2_5"] = -1.0
+    features.loc[features.index[5], "pm10"] = np.nan
+    features["hour"] = features["hour"].astype(float)
+
+    report = validate_frame(features)
+    assert checks(report) == {
+        ("pressure", "required"),
+        ("extra", "unexpected"),
+        ("humidity", "max"),
+        ("pm2_5", "min"),
+        ("pm10", "nulls"),
+        ("hour", "dtype"),
+    }
+    with pytest.raises(ValueError, match="humidity"):
+        report.raise_if_invalid()
+
+
+def test_timestamps_hourly_and_increasing_per_location(features):
+    other = features.copy()
+    other["location"] = "lahore"
+    # Interleaved locations are fine as long as each one moves forward
+    both = pd.concat([features, other]).sort_values("timestamp", kind="stable")
+    assert validate_frame(both).ok
+
+    shuffled = features.iloc[::-1]
+    assert ("timestamp", "monotonic") in checks(validate_frame(shuffled))
+
+    shifted = features.copy()
+    shifted["timestamp"] += pd.Timedelta(minutes=30)
+    assert ("timestamp", "hourly") in checks(validate_frame(shifted))
+
+    gappy = features.drop(features.index[10:13])
+    report = validate_frame(gappy)
+    assert report.ok
+    assert report.warnings[0]["check"] == "gaps"
+
+
+def test_validate_single_document(features):
+    validate(features.iloc[0].to_dict())
+    with pytest.raises(ValueError):
+        validate({"pm2_5": 1.0})
@@ -0,0 +1,43 @@
+"""Data and model helpers shared by the test modules."""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from data_pipeline.feature_engineering import engineer_features
+from inference.load_best_model import artifact_checksum
+from training.register_models import register_model
+
+
+def make_raw(hours, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(hours)
+    pm2_5 = 40 + 15 * np.sin(2 * np.pi * t / 24) + rng.normal(0, 5, hours)
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2025-01-01", periods=hours, freq="h", tz="UTC"),
+        "pm2_5": pm2_5.astype("float32"),
+        "pm10": (pm2_5 * 1.8 + rng.normal(0, 4, hours)).astype("float32"),
+        "temperature": rng.normal(28, 3, hours).astype("float32"),
+        "humidity": rng.uniform(20, 90, hours).astype("float32"),
+        "wind_speed": rng.gamma(2.0, 4.0, hours).astype("float32"),
+        "wind_direction": rng.uniform(0, 360, hours).astype("float32"),
+        "pressure": rng.normal(1008, 2, hours).astype("float32"),
+    })
+    return df
+
+
+def make_features(location, hours=24 * 40, seed=0):
+    df = engineer_features(make_raw(hours, seed=seed))
+    df["location"] = location
+    return df
+
+
+def publish(registry, base_dir, name, model, feature_columns=("a", "b", "c", "d")):
+    os.makedirs(base_dir / "models", exist_ok=True)
+    path = base_dir / "models" / f"{name}.pkl"
+    joblib.dump(model, path)
+    return register_model(
+        registry, name, metrics={}, feature_columns=list(feature_columns),
+        model_path=f"models/{name}.pkl", checksum=artifact_checksum(path),
+    )
@@ -0,0 +1,94 @@
+"""
+Rolling-origin cross-validation for model selection.
+
+Folds are expanding windows over time-ordered rows: fold k trains on
+everything before its test block, the test blocks tile the end of the
+data, and no fold ever trains on rows after the ones it is scored on.
+Because every training set is a prefix, X and y are converted to arrays
+once and each fold is a pair of slices (views, no copies). Worker
+processes inherit those arrays when they start, and folds × candidates
+run as one flat task list on TRAIN_CPUS single-threaded fits.
+"""
+import os
+
+import numpy as np
+from sklearn.base import clone
+
+from training.orchestrator import TRAIN_CPUS, fit_and_score, process_pool
+
+CV_FOLDS = int(os.getenv("CV_FOLDS", "5"))
+FOLD_METRICS = ("RMSE", "MAE", "R2")
+
+
+def rolling_origin_folds(n_rows, n_folds=CV_FOLDS, test_size=None):
+    """
+    (train_stop, test_stop) per fold: train on rows [0, train_stop), test
+    on [train_stop, test_stop). Test blocks default to n_rows // (n_folds + 1)
+    rows, so the first fold trains on as many rows as it tests.
+    """
+    test_size = test_size or n_rows // (n_folds + 1)
+    first_train = n_rows - n_folds * test_size
+    if test_size < 1 or first_train < 1:
+        raise ValueError(f"{n_rows} rows are too few for {n_folds} folds of {test_size} test rows")
+    return [(first_train + k * test_size, first_train + (k + 1) * test_size) for k in range(n_folds)]
+
+
+# -----------------------------
+# Shared fold matrices
+# -----------------------------
+_shared = {}
+
+
+def _share(X, y):
+    _shared["X"], _shared["y"] = X, y
+
+
+def _fit_fold(model, train_stop, test_stop):
+    X, y = _shared["X"], _shared["y"]
+    _, result = fit_and_score(
+        model, 1, X[:train_stop], y[:train_stop], X[train_stop:test_stop], y[train_stop:test_stop],
+    )
+    return result
+
+
+def cross_validate(models, X, y, folds=None, cpus=TRAIN_CPUS):
+    """
+    Score every candidate on every rolling-origin fold. Returns
+    {name: {"RMSE", "RMSE_std", "MAE", "R2", "folds": [per-fold results]}},
+    the means taken over folds.
+    """
+    # Trees train on float32 anyway; the feature store already holds float32
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    folds = folds or rolling_origin_folds(len(X))
+
+    # Largest training sets first so the pool does not end on a long straggler
+    tasks = sorted(
+        ((name, k) for name in models for k in range(len(folds))),
+        key=lambda task: -folds[task[1]][0],
+    )
+    if cpus <= 1:
+        _share(X, y)
+        scores = [_fit_fold(clone(models[name]), *folds[k]) for name, k in tasks]
+    else:
+        with process_pool(cpus, initializer=_share, initargs=(X, y)) as pool:
+            futures = [pool.submit(_fit_fold, clone(models[name]), *folds[k]) for name, k in tasks]
+            scores = [future.result() for future in futures]
+
+    by_task = dict(zip(tasks, scores))
+    results = {}
+    for name in models:
+        fold_results = []
+        for k, (train_stop, test_stop) in enumerate(folds):
+            fold_results.append({
+                "fold": k,
+                "train_rows": train_stop,
+                "test_rows": test_stop - train_stop,
+                **by_task[name, k],
+            })
+        results[name] = {
+            **{metric: float(np.mean([f[metric] for f in fold_results])) for metric in FOLD_METRICS},
+            "RMSE_std": float(np.std([f["RMSE"] for f in fold_results])),
+            "folds": fold_results,
+        }
+    return results
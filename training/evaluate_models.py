@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+
+from data_pipeline.feature_spec import lead_targets
+from inference.forecaster import HISTORY_HOURS
+
+
+def horizon_rmse(y_true, y_pred):
+    """RMSE per horizon (column), ignoring hours with no observed truth."""
+    errors = (np.asarray(y_pred) - np.asarray(y_true)) ** 2
+    with np.errstate(invalid="ignore"):
+        return np.sqrt(np.nanmean(errors, axis=0))
+
+
+def horizon_mae(y_true, y_pred):
+    """MAE per horizon (column), ignoring hours with no observed truth."""
+    errors = np.abs(np.asarray(y_pred) - np.asarray(y_true))
+    with np.errstate(invalid="ignore"):
+        return np.nanmean(errors, axis=0)
+
+
+def evaluation_origins(features, n_origins, horizon):
+    """
+    Evenly spaced forecast origins (positions) in a one-location frame
+    sorted by timestamp, leaving room for the history and the horizon.
+    """
+    first, last = HISTORY_HOURS - 1, len(features) - horizon - 1
+    if last < first:
+        return np.array([], dtype=int)
+    return np.unique(np.linspace(first, last, num=n_origins).astype(int))
+
+
+def evaluate_forecaster(forecaster, features, origins, horizon):
+    """
+    Forecast from each origin row of a one-location frame sorted by
+    timestamp. Returns (rmse per horizon, mean seconds per forecast).
+    """
+    truth = lead_targets(features, range(1, horizon + 1))[origins]
+    predictions = np.empty((len(origins), horizon))
+
+    start = time.perf_counter()
+    for i, origin in enumerate(origins):
+        rows = features.iloc[origin + 1 - HISTORY_HOURS:origin + 1]
+        predictions[i] = forecaster.forecast(rows, horizon)["predicted_pm2_5"].to_numpy()
+    seconds = (time.perf_counter() - start) / max(len(origins), 1)
+
+    return horizon_rmse(truth, predictions), seconds
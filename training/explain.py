@@ -0,0 +1,183 @@
+"""
+SHAP feature importance (mean |SHAP| per feature) for a registered model.
+
+- Linear models (Ridge and friends) use the closed form: a feature's
+  SHAP value is coef * (x - E[x]), no explainer needed.
+- Tree ensembles use shap.TreeExplainer on a stratified sample of
+  SHAP_SAMPLE_ROWS rows, split across SHAP_PROCESSES worker processes.
+  Exact TreeSHAP on a 400-tree, depth-15 forest costs ~0.2 s per row.
+- Anything else goes through shap's permutation explainer on the sample.
+
+Results are stored in model_shap per registry version, together with the
+method, sample size and seconds taken; a version that already has them
+is never recomputed.
+
+    python -m training.explain     # the production version, if not stored yet
+"""
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import shap
+from sklearn.ensemble import (
+    ExtraTreesRegressor,
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+    RandomForestRegressor,
+)
+from sklearn.tree import DecisionTreeRegressor
+
+from data_pipeline.bulk_writer import write_documents
+from training.orchestrator import process_pool
+
+SHAP_SAMPLE_ROWS = int(os.getenv("SHAP_SAMPLE_ROWS", "1000"))
+SHAP_PROCESSES = int(os.getenv("SHAP_PROCESSES", str(os.cpu_count() or 1)))
+# Target quantile bins the sample is drawn from
+SHAP_STRATA = 10
+# Background rows for the permutation explainer
+BACKGROUND_ROWS = 100
+
+TREE_MODELS = (
+    RandomForestRegressor,
+    ExtraTreesRegressor,
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+    DecisionTreeRegressor,
+)
+
+
+def stratified_sample(y, n, strata=SHAP_STRATA, seed=0):
+    """
+    Sorted positions of about n rows, drawn from every target quantile bin
+    in proportion to its size, so pollution episodes are represented.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) <= n:
+        return np.arange(len(y))
+    bins = pd.qcut(y, strata, labels=False, duplicates="drop")
+    rng = np.random.default_rng(seed)
+    picked = []
+    for b in np.unique(bins[~np.isnan(bins)]):
+        rows = np.flatnonzero(bins == b)
+        take = min(len(rows), max(1, round(n * len(rows) / len(y))))
+        picked.append(rng.choice(rows, size=take, replace=False))
+    return np.sort(np.concatenate(picked))
+
+
+def linear_importance(model, X, background):
+    """Mean |SHAP| of a linear model in closed form."""
+    coef = np.ravel(model.coef_)
+    return np.abs((X - background.mean(axis=0)) * coef).mean(axis=0)
+
+
+# -----------------------------
+# Tree explainer, rows split across processes
+# -----------------------------
+_worker = {}
+
+
+def _init_worker(explainer):
+    _worker["explainer"] = explainer
+
+
+def _abs_shap_sum(X):
+    values = _worker["explainer"].shap_values(X, check_additivity=False)
+    return np.abs(np.asarray(values)).sum(axis=0)
+
+
+def tree_importance(model, X, processes=SHAP_PROCESSES):
+    """Mean |SHAP| from TreeExplainer, the rows split across processes."""
+    explainer = shap.TreeExplainer(model)
+    chunks = [chunk for chunk in np.array_split(X, max(processes, 1)) if len(chunk)]
+    if processes <= 1 or len(chunks) == 1:
+        _init_worker(explainer)
+        sums = [_abs_shap_sum(chunk) for chunk in chunks]
+    else:
+        with process_pool(
+            len(chunks), initializer=_init_worker, initargs=(explainer,),
+        ) as pool:
+            sums = list(pool.map(_abs_shap_sum, chunks))
+    return np.sum(sums, axis=0) / len(X)
+
+
+def permutation_importance(model, X, background):
+    masker = shap.maskers.Independent(background, max_samples=BACKGROUND_ROWS)
+    explanation = shap.PermutationExplainer(model.predict, masker)(X)
+    return np.abs(explanation.values).mean(axis=0)
+
+
+def shap_importance(model, X, y, sample_rows=SHAP_SAMPLE_ROWS, processes=SHAP_PROCESSES):
+    """(mean |SHAP| per column of X, {"method", "sample_rows", "seconds"})."""
+    X = np.asarray(X, dtype=np.float64)
+    start = time.perf_counter()
+
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        # Exact and cheap: every row, no sampling
+        method, rows = "linear", X
+        importance = linear_importance(model, X, X)
+    else:
+        rows = X[stratified_sample(y, sample_rows)]
+        if isinstance(model, TREE_MODELS):
+            method = "tree"
+            importance = tree_importance(model, rows, processes)
+        else:
+            method = "permutation"
+            background = X[np.random.default_rng(0).choice(len(X), min(len(X), BACKGROUND_ROWS), replace=False)]
+            importance = permutation_importance(model, rows, background)
+
+    info = {"method": method, "sample_rows": len(rows), "seconds": time.perf_counter() - start}
+    return importance, info
+
+
+def store_importance(collection, entry, model, X, y, **kwargs):
+    """
+    Compute and store SHAP importance for a registry entry unless its
+    version already has it. Returns the stored info, or None when cached.
+    """
+    version = entry["version"]
+    if collection.count_documents({"version": version}, limit=1):
+        return None
+
+    importance, info = shap_importance(model, X, y, **kwargs)
+    now = datetime.now(timezone.utc)
+    collection.create_index("version")
+    write_documents(collection, [
+        {
+            "version": version,
+            "model_name": entry["model_name"],
+            "feature": feature,
+            "importance": float(value),
+            **info,
+            "created_at": now,
+        }
+        for feature, value in zip(entry["feature_columns"], importance)
+    ])
+    return info
+
+
+# -----------------------------
+# Command line
+# -----------------------------
+def main():
+    from data_pipeline.bulk_writer import mongo_client
+    from data_pipeline.feature_spec import TARGET_COLUMN
+    from inference.load_best_model import model_cache
+    from training.load_features import load_training_frame
+
+    loaded = model_cache().current()
+    entry = loaded.entry
+    df = load_training_frame(entry["feature_columns"], TARGET_COLUMN).dropna(subset=[TARGET_COLUMN])
+
+    collection = mongo_client()["aqi_project"]["model_shap"]
+    info = store_importance(collection, entry, loaded.model, df[entry["feature_columns"]], df[TARGET_COLUMN])
+    if info is None:
+        print(f"SHAP for version {entry['version']} already stored")
+    else:
+        print(f"✅ SHAP for version {entry['version']} stored "
+              f"({info['method']}, {info['sample_rows']} rows, {info['seconds']:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Incremental daily retraining: refresh the production model from the
+newest RETRAIN_WINDOW_HOURS of features instead of refitting every
+candidate on the whole history.
+
+- Forests grow REFRESH_FRACTION of their size in new trees on the window
+  and retire as many of their oldest ones, so the forest keeps its size
+  and turns over every few weeks.
+- Boosting adds BOOST_STAGES stages fitted on the window (warm start).
+  Past MAX_BOOST_STAGES the model is refit from scratch instead.
+- Anything else (Ridge) is refit on the window alone.
+
+The newest VALIDATION_HOURS (by timestamp, for every location) are held out: when the updated model does
+more than RETRAIN_TOLERANCE worse on them than the current one, the
+update is thrown away and the model is refit on the full history. Either
+way the result is registered as a new production version. A window too
+short to hold out VALIDATION_HOURS and still train on something (after a
+data outage) skips the update; production stays as it is.
+
+    python -m training.incremental [--window-hours 336] [--tolerance 0.05]
+"""
+import argparse
+import copy
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import (
+    ExtraTreesRegressor,
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+    RandomForestRegressor,
+)
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from data_pipeline.feature_spec import TARGET_COLUMN
+
+RETRAIN_WINDOW_HOURS = int(os.getenv("RETRAIN_WINDOW_HOURS", str(24 * 14)))
+VALIDATION_HOURS = int(os.getenv("RETRAIN_VALIDATION_HOURS", "24"))
+RETRAIN_TOLERANCE = float(os.getenv("RETRAIN_TOLERANCE", "0.05"))
+REFRESH_FRACTION = float(os.getenv("FOREST_REFRESH_FRACTION", "0.05"))
+BOOST_STAGES = int(os.getenv("BOOST_STAGES", "20"))
+MAX_BOOST_STAGES = int(os.getenv("MAX_BOOST_STAGES", "2000"))
+
+FORESTS = (RandomForestRegressor, ExtraTreesRegressor)
+# Parameter holding the number of boosting stages
+_STAGES = {GradientBoostingRegressor: "n_estimators", HistGradientBoostingRegressor: "max_iter"}
+
+
+def stage_params(model):
+    """The boosting stage count to restore on a full refit ({} for other models)."""
+    name = _STAGES.get(type(model))
+    return {name: model.get_params()[name]} if name else {}
+
+
+def update_model(model, X, y):
+    """
+    Copy of model updated from the new rows X, y. Returns (model, mode),
+    or (None, mode) when the model cannot take another update.
+    """
+    if isinstance(model, FORESTS):
+        # Fitted trees are never modified: share them, only the list is new
+        model = copy.copy(model)
+        model.estimators_ = list(model.estimators_)
+        n_trees = len(model.estimators_)
+        n_new = max(1, round(n_trees * REFRESH_FRACTION))
+        model.set_params(warm_start=True, n_estimators=n_trees + n_new)
+        model.fit(X, y)
+        # New trees are appended; drop the oldest to keep the size
+        model.estimators_ = model.estimators_[n_new:]
+        model.set_params(warm_start=False, n_estimators=n_trees)
+        return model, "forest_refresh"
+
+    if type(model) in _STAGES:
+        model = copy.deepcopy(model)
+        name = _STAGES[type(model)]
+        stages = model.n_estimators_ if name == "n_estimators" else model.n_iter_
+        if stages + BOOST_STAGES > MAX_BOOST_STAGES:
+            return None, "stage_cap"
+        model.set_params(warm_start=True, **{name: stages + BOOST_STAGES})
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+        return model, "warm_start"
+
+    return clone(model).fit(X, y), "window_refit"
+
+
+def _scores(model, X, y):
+    preds = model.predict(X)
+    return {
+        "RMSE": float(np.sqrt(mean_squared_error(y, preds))),
+        "MAE": float(mean_absolute_error(y, preds)),
+        "R2": float(r2_score(y, preds)),
+    }
+
+
+def split_validation(window, validation_hours=VALIDATION_HOURS):
+    """
+    (train, valid): valid is every row in the newest validation_hours of
+    window, whatever the number of locations per hour.
+    """
+    cutoff = window["timestamp"].max() - pd.Timedelta(hours=validation_hours)
+    newest = window["timestamp"] > cutoff
+    return window[~newest], window[newest]
+
+
+def incremental_update(model, window, feature_columns, load_history, full_params=None,
+                       validation_hours=VALIDATION_HOURS, tolerance=RETRAIN_TOLERANCE):
+    """
+    Update model from the newest rows (window), with
+    the guard described above. load_history() returns the full training
+    frame and is only called on fallback; full_params are set on the
+    clone refit then. Returns (model, report).
+    """
+    train, valid = split_validation(window, validation_hours)
+    if train.empty or valid.empty:
+        raise ValueError(
+            f"{len(window)} rows in the window, none older than the {validation_hours} validation hours"
+        )
+    X_valid, y_valid = valid[feature_columns], valid[TARGET_COLUMN]
+    previous = _scores(model, X_valid, y_valid)
+
+    updated, mode = update_model(model, train[feature_columns], train[TARGET_COLUMN])
+    scores = _scores(updated, X_valid, y_valid) if updated is not None else None
+    report = {
+        "mode": mode,
+        "window_rows": len(train),
+        "validation_rows": len(valid),
+        "previous_RMSE": previous["RMSE"],
+        "updated_RMSE": scores["RMSE"] if scores else None,
+        "fallback": False,
+    }
+    if scores is not None and scores["RMSE"] <= previous["RMSE"] * (1 + tolerance):
+        report["metrics"] = scores
+        return updated, report
+
+    # Degraded (or capped): refit from scratch on everything before the validation rows
+    history = load_history()
+    history = history[history["timestamp"] < valid["timestamp"].min()]
+    refit = clone(model).set_params(**(full_params or {}))
+    if "warm_start" in refit.get_params():
+        refit.set_params(warm_start=False)
+    refit.fit(history[feature_columns], history[TARGET_COLUMN])
+
+    report.update(fallback=True, full_rows=len(history), metrics=_scores(refit, X_valid, y_valid))
+    return refit, report
+
+
+def _save_atomically(model, path):
+    """Dump next to path and rename, so the model cache never reads half a file."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".pkl.tmp")
+    os.close(fd)
+    try:
+        joblib.dump(model, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+# -----------------------------
+# Command line
+# -----------------------------
+def main(argv=None):
+    from data_pipeline.bulk_writer import mongo_client
+    from inference.load_best_model import BASE_DIR, artifact_checksum
+    from training.load_features import load_training_frame
+    from training.register_models import register_model
+
+    parser = argparse.ArgumentParser(description="Refresh the production model from the newest features")
+    parser.add_argument("--window-hours", type=int, default=RETRAIN_WINDOW_HOURS)
+    parser.add_argument("--validation-hours", type=int, default=VALIDATION_HOURS)
+    parser.add_argument("--tolerance", type=float, default=RETRAIN_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    db = mongo_client()["aqi_project"]
+    registry = db["model_registry"]
+    entry = registry.find_one({"is_production": True})
+    if entry is None:
+        raise RuntimeError("No production model to update; run training.train_models first")
+    if entry.get("strategy", "recursive") != "recursive":
+        raise RuntimeError(f"Incremental updates cover recursive models, production is {entry['strategy']}")
+
+    feature_columns = entry["feature_columns"]
+    model = joblib.load(os.path.join(BASE_DIR, entry["model_path"]))
+    full_params = entry.get("full_refit_params") or stage_params(model)
+
+    start = pd.Timestamp.now(tz="UTC").floor("h") - pd.Timedelta(hours=args.window_hours)
+    window = load_training_frame(feature_columns, TARGET_COLUMN, start=start).dropna(subset=[TARGET_COLUMN])
+    train, _ = split_validation(window, args.validation_hours)
+    if train.empty:
+        print(f"Skipping the update: {len(window)} rows with a target in the last {args.window_hours}h, "
+              f"none older than the {args.validation_hours} validation hours; "
+              f"production stays at version {entry['version']}")
+        return
+
+    def load_history():
+        return load_training_frame(feature_columns, TARGET_COLUMN).dropna(subset=[TARGET_COLUMN])
+
+    model, report = incremental_update(
+        model, window, feature_columns, load_history, full_params,
+        validation_hours=args.validation_hours, tolerance=args.tolerance,
+    )
+    status = "fell back to a full refit" if report["fallback"] else report["mode"]
+    print(f"{entry['model_name']}: validation RMSE {report['previous_RMSE']:.3f} -> {report['metrics']['RMSE']:.3f} ({status})")
+
+    # A new file per version, so earlier versions stay loadable
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M")
+    model_path = f"models/{entry['model_name']}-{stamp}.pkl"
+    _save_atomically(model, os.path.join(BASE_DIR, model_path))
+
+    version = register_model(
+        registry,
+        model_name=entry["model_name"],
+        # Scored on the held-out newest hours, not a test split like train_models
+        metrics={**report["metrics"], "validation_hours": args.validation_hours},
+        feature_columns=feature_columns,
+        model_path=model_path,
+        checksum=artifact_checksum(os.path.join(BASE_DIR, model_path)),
+        hyperparameters=entry.get("hyperparameters", {}),
+        full_refit_params=full_params,
+        update_mode="full_refit" if report["fallback"] else report["mode"],
+        parent_version=entry["version"],
+        trained_until=train["timestamp"].max().to_pydatetime(),
+    )
+    db["model_metrics"].insert_one({
+        "timestamp": datetime.now(timezone.utc),
+        "incremental": {**report, "version": version, "parent_version": entry["version"]},
+    })
+    print(f"✅ Model Registry Updated — Version {version} is now PRODUCTION")
+
+
+if __name__ == "__main__":
+    main()
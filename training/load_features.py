@@ -0,0 +1,13 @@
+from data_pipeline.feature_store import FEATURE_STORE_BACKEND, get_feature_store
+
+
+def load_training_frame(feature_columns, target_column, start=None, end=None,
+                        locations=None, backend=FEATURE_STORE_BACKEND):
+    """
+    Load only the model inputs, the target and the (location, timestamp)
+    key from the feature store, sorted by timestamp.
+    """
+    store = get_feature_store(backend)
+    columns = list(dict.fromkeys(["timestamp", *feature_columns, target_column]))
+    df = store.read(columns=columns, start=start, end=end, locations=locations)
+    return df.sort_values("timestamp", kind="stable", ignore_index=True)
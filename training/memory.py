@@ -0,0 +1,79 @@
+"""
+Resident memory of this process, for the training cost reports and the
+benchmarks.
+
+Linux reads /proc/self/statm; elsewhere psutil is used when installed,
+then resource.getrusage. getrusage only knows the peak since the process
+started, so growth under it counts only what goes past that peak. Where
+none is available (Windows without psutil) the sizes are None.
+"""
+import os
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # optional
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_STATM = "/proc/self/statm"
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None when it cannot be read."""
+    if os.path.exists(_STATM):
+        with open(_STATM) as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes everywhere but macOS, which reports bytes
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    return None
+
+
+class PeakRSS:
+    """
+    Sample RSS on a background thread while the block runs.
+
+    Unlike tracemalloc this also sees memory allocated outside Python
+    (NumPy/Arrow buffers, BSON decoding), which is what we want to compare.
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.baseline = None
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.peak = current_rss()
+        if self.baseline is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, current_rss())
+
+    @property
+    def growth_mb(self):
+        """Peak growth over the block in MB, or None when RSS cannot be read."""
+        if self.baseline is None:
+            return None
+        return (self.peak - self.baseline) / 1e6
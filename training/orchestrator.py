@@ -0,0 +1,115 @@
+"""
+Fit the candidate models concurrently under a CPU budget.
+
+Single-threaded estimators (Ridge, GradientBoosting) get one core each;
+multi-threaded ones (forests through n_jobs, histogram boosting through
+OpenMP) share the rest. threadpoolctl caps BLAS / OpenMP inside every fit,
+so the fits running together never ask for more than TRAIN_CPUS threads;
+a candidate whose share is not free yet waits for one to finish.
+
+Training pools fork where the platform can: train_models is a script, and
+spawned (or forkserver) workers would import and run it again.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import joblib
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from threadpoolctl import threadpool_limits
+
+from training.memory import PeakRSS
+
+TRAIN_CPUS = int(os.getenv("TRAIN_CPUS", str(os.cpu_count() or 1)))
+
+
+def process_pool(max_workers, **kwargs):
+    """ProcessPoolExecutor whose workers fork from this process when the platform allows it."""
+    if "fork" in multiprocessing.get_all_start_methods():
+        kwargs["mp_context"] = multiprocessing.get_context("fork")
+    return ProcessPoolExecutor(max_workers=max_workers, **kwargs)
+
+
+def _multithreaded(model):
+    return "n_jobs" in model.get_params() or isinstance(model, HistGradientBoostingRegressor)
+
+
+def thread_budget(models, cpus=TRAIN_CPUS):
+    """Threads per candidate: one per serial estimator, an even share of the rest for the others."""
+    parallel = [name for name, model in models.items() if _multithreaded(model)]
+    share = max(1, (cpus - (len(models) - len(parallel))) // max(len(parallel), 1))
+    return {name: share if name in parallel else 1 for name in models}
+
+
+def fit_and_score(model, threads, X_train, y_train, X_test, y_test):
+    """Fit and score one model within `threads` threads; returns (model, its metrics and costs)."""
+    threaded = "n_jobs" in model.get_params()
+    if threaded:
+        n_jobs = model.n_jobs
+        model.set_params(n_jobs=threads)
+
+    with threadpool_limits(limits=threads), PeakRSS() as memory:
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        preds = model.predict(X_test)
+        predict_seconds = time.perf_counter() - start
+
+    # Inference decides its own parallelism; keep the configured n_jobs
+    if threaded:
+        model.set_params(n_jobs=n_jobs)
+
+    return model, {
+        "RMSE": float(np.sqrt(mean_squared_error(y_test, preds))),
+        "MAE": float(mean_absolute_error(y_test, preds)),
+        "R2": float(r2_score(y_test, preds)),
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "peak_memory_mb": memory.growth_mb,
+        "threads": threads,
+    }
+
+
+def fit_candidate(model, threads, X_train, y_train, X_test, y_test, path):
+    """fit_and_score, then save the fitted model to path; returns the metrics and costs."""
+    model, result = fit_and_score(model, threads, X_train, y_train, X_test, y_test)
+    joblib.dump(model, path)
+    return result
+
+
+def fit_candidates(models, X_train, y_train, X_test, y_test, model_dir, cpus=TRAIN_CPUS):
+    """
+    Fit every candidate, saved as model_dir/<name>.pkl. Returns
+    {name: fit_candidate result} in the order of models.
+    """
+    threads = thread_budget(models, cpus)
+    paths = {name: os.path.join(model_dir, f"{name}.pkl") for name in models}
+
+    if cpus <= 1 or len(models) == 1:
+        return {
+            name: fit_candidate(model, threads[name], X_train, y_train, X_test, y_test, paths[name])
+            for name, model in models.items()
+        }
+
+    # Widest candidates first, so they are not left waiting behind serial ones
+    pending = sorted(models, key=lambda name: -threads[name])
+    results, running, free = {}, {}, cpus
+    with process_pool(min(len(models), cpus)) as pool:
+        while pending or running:
+            while pending and (threads[pending[0]] <= free or not running):
+                name = pending.pop(0)
+                free -= threads[name]
+                future = pool.submit(fit_candidate, models[name], threads[name],
+                                     X_train, y_train, X_test, y_test, paths[name])
+                running[future] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                free += threads[name]
+                results[name] = future.result()
+    return {name: results[name] for name in models}
@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+
+
+def register_model(registry_collection, model_name, metrics, feature_columns, model_path,
+                   strategy="recursive", production=True, **extra):
+    """
+    Add the next model version to the registry. strategy records how
+    inference has to run it ("recursive" or "direct", see
+    inference.forecaster.make_forecaster); extra fields are stored as is.
+    """
+    latest_model = registry_collection.find_one(sort=[("version", -1)])
+    next_version = 1 if not latest_model else latest_model["version"] + 1
+
+    if production:
+        registry_collection.update_many({}, {"$set": {"is_production": False}})
+
+    registry_collection.insert_one({
+        "model_name": model_name,
+        "version": next_version,
+        "strategy": strategy,
+        "metrics": metrics,
+        "feature_columns": feature_columns,
+        "model_path": model_path,
+        "is_production": production,
+        "created_at": datetime.now(timezone.utc),
+        **extra,
+    })
+    return next_version
@@ -0,0 +1,171 @@
+"""
+Successive-halving hyperparameter search with a persistent trial cache.
+
+Every candidate has a small grid around its hand-picked defaults. Each
+rung scores the surviving configurations by rolling-origin CV on a
+time-ordered prefix of the data; only the best 1/HALVING_FACTOR of each
+candidate's configurations (never fewer than two) go on to the next,
+larger prefix. The last rung uses every row and picks the winner. All
+trials of a rung run in one cross_validate call, so they share its
+process pool.
+
+A trial is keyed by a fingerprint of the rows it was scored on, the
+candidate, its parameters, the folds and the scikit-learn version, and
+its scores are kept in model_trials. Rung prefixes start at the oldest
+row and have fixed sizes, so tomorrow's data leaves them unchanged: a
+daily retrain only evaluates the finalists on the full-data rung (and
+configurations it has never seen).
+"""
+import hashlib
+import json
+import math
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import sklearn
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid
+
+from data_pipeline.bulk_writer import write_documents
+from training.cross_validation import cross_validate, rolling_origin_folds
+from training.orchestrator import TRAIN_CPUS
+
+HALVING_FACTOR = int(os.getenv("HALVING_FACTOR", "3"))
+# Rows in the first rung: four weeks of hourly data
+SEARCH_MIN_ROWS = int(os.getenv("SEARCH_MIN_ROWS", str(24 * 28)))
+SEARCH_FOLDS = int(os.getenv("SEARCH_FOLDS", "3"))
+
+# Grids around the defaults in train_models (each default is one of the points)
+SEARCH_SPACES = {
+    "RandomForest": {
+        "n_estimators": [200, 400],
+        "max_depth": [10, 15, None],
+        "min_samples_leaf": [1, 2, 4],
+    },
+    "Ridge": {
+        "alpha": [0.1, 1.0, 10.0, 100.0],
+    },
+    "GradientBoosting": {
+        "n_estimators": [300, 500],
+        "learning_rate": [0.03, 0.1],
+        "max_depth": [3, 4, 5],
+    },
+    "HistGradientBoosting": {
+        "learning_rate": [0.05, 0.1],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [10, 20, 40],
+    },
+}
+
+
+def rung_sizes(n_rows, min_rows=SEARCH_MIN_ROWS, factor=HALVING_FACTOR):
+    """Prefix length per rung: min_rows growing by factor, then all n_rows."""
+    sizes = []
+    rows = min_rows
+    while rows < n_rows:
+        sizes.append(rows)
+        rows *= factor
+    return sizes + [n_rows]
+
+
+def data_fingerprint(X, y):
+    """sha256 of the exact values a trial is scored on."""
+    digest = hashlib.sha256()
+    for array in (X, y):
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype}{array.shape}".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def trial_key(fingerprint, name, params, folds):
+    payload = json.dumps(
+        {"data": fingerprint, "model": name, "params": params, "folds": folds,
+         "sklearn": sklearn.__version__},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _cached_trials(trials, keys):
+    if trials is None:
+        return {}
+    return {doc["trial"]: doc for doc in trials.find({"trial": {"$in": list(keys)}}, {"_id": 0})}
+
+
+def _store_trials(trials, docs):
+    if trials is not None and docs:
+        trials.create_index("trial", unique=True)
+        write_documents(trials, docs, key=("trial",))
+
+
+def successive_halving(models, X, y, trials=None, spaces=SEARCH_SPACES, cpus=TRAIN_CPUS,
+                       factor=HALVING_FACTOR, min_rows=SEARCH_MIN_ROWS, n_folds=SEARCH_FOLDS):
+    """
+    Search every candidate's grid; trials is the model_trials collection
+    (None: no cache). Returns per candidate {"params", "RMSE", "rows",
+    "evaluated", "cached"}, where RMSE is the winner's mean CV RMSE on the
+    full data.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+
+    survivors = {name: list(ParameterGrid(spaces.get(name, {}))) for name in models}
+    best = {name: {"params": {}, "RMSE": None, "rows": 0, "evaluated": 0, "cached": 0} for name in models}
+
+    sizes = rung_sizes(len(X), min_rows, factor)
+    for rung, rows in enumerate(sizes):
+        searching = [name for name, grid in survivors.items() if len(grid) > 1]
+        if not searching:
+            break
+        final = rung == len(sizes) - 1
+
+        folds = rolling_origin_folds(rows, n_folds)
+        fingerprint = data_fingerprint(X[:rows], y[:rows])
+        keys = {
+            trial_key(fingerprint, name, params, folds): (name, params)
+            for name in searching for params in survivors[name]
+        }
+        cached = _cached_trials(trials, keys)
+        todo = {
+            key: clone(models[name]).set_params(**params)
+            for key, (name, params) in keys.items() if key not in cached
+        }
+        fresh = cross_validate(todo, X[:rows], y[:rows], folds, cpus) if todo else {}
+
+        now = datetime.now(timezone.utc)
+        new_docs = []
+        scores = {}
+        for key, (name, params) in keys.items():
+            if key in cached:
+                scores[key] = cached[key]["RMSE"]
+                best[name]["cached"] += 1
+                continue
+            cv = fresh[key]
+            scores[key] = cv["RMSE"]
+            best[name]["evaluated"] += 1
+            new_docs.append({
+                "trial": key, "model_name": name, "params": params, "rows": rows,
+                "folds": [list(fold) for fold in folds], "created_at": now,
+                **{metric: cv[metric] for metric in ("RMSE", "RMSE_std", "MAE", "R2")},
+                "fit_seconds": float(sum(f["fit_seconds"] for f in cv["folds"])),
+            })
+        _store_trials(trials, new_docs)
+
+        # Keep the best 1/factor of each candidate's configurations; at least
+        # two reach the full data, where the newest rows get their say
+        for name in searching:
+            ranked = sorted(
+                ((scores[key], params) for key, (n, params) in keys.items() if n == name),
+                key=lambda item: item[0],
+            )
+            keep = 1 if final else max(2, math.ceil(len(ranked) / factor))
+            survivors[name] = [params for _, params in ranked[:keep]]
+            best[name].update(params=ranked[0][1], RMSE=ranked[0][0], rows=rows)
+
+    # Candidates with a single configuration were never searched
+    for name, grid in survivors.items():
+        if best[name]["rows"] == 0 and grid:
+            best[name]["params"] = grid[0]
+    return best
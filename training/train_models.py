@@ -202,15 +202,30 @@ import os
 import pandas as pd
 import joblib
 import numpy as np
-import shap
 from datetime import datetime, timezone
-from pymongo import MongoClient
 from dotenv import load_dotenv
 
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import (
+    GradientBoostingRegressor,
+    HistGradientBoostingRegressor,
+    RandomForestRegressor,
+)
 from sklearn.linear_model import Ridge
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+from config.feature_schema import DEFAULT_FEATURE_COLUMNS
+from config.locations import DEFAULT_LOCATION
+from data_pipeline.bulk_writer import mongo_client
+from data_pipeline.feature_spec import lead_targets
+from inference.forecaster import HORIZON, DirectForecaster, Forecaster
+from inference.load_best_model import artifact_checksum
+from training.cross_validation import cross_validate
+from training.evaluate_models import evaluate_forecaster, evaluation_origins
+from training.explain import store_importance
+from training.load_features import load_training_frame
+from training.orchestrator import fit_candidates
+from training.register_models import register_model
+from training.search import successive_halving
 
 # =========================================================
 # Load Environment
@@ -218,37 +233,41 @@ from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI)
+client = mongo_client(MONGO_URI)
 db = client["aqi_project"]
 
-features_collection = db["features"]
 metrics_collection = db["model_metrics"]
 registry_collection = db["model_registry"]
 shap_collection = db["model_shap"]
-
-# =========================================================
-# Load Data
-# =========================================================
-df = pd.DataFrame(list(features_collection.find()))
-df.drop(columns=["_id"], inplace=True)
-df = df.sort_values("timestamp")
+trials_collection = db["model_trials"]
 
 # =========================================================
 # Feature Selection
 # =========================================================
-feature_columns = [
-    "pm2_5", "pm10",
-    "temperature", "humidity", "wind_speed", "pressure",
-    "hour", "day_of_week",
-    "pm2_5_lag1", "pm2_5_lag3", "pm2_5_lag6",
-    "pm2_5_lag12", "pm2_5_lag24",
-    "pm2_5_roll_mean_3", "pm2_5_roll_mean_6",
-    "pm2_5_roll_mean_12", "pm2_5_roll_mean_24",
-    "pm2_5_roll_std_3", "pm2_5_roll_std_6",
-]
+feature_columns = list(DEFAULT_FEATURE_COLUMNS)
 
 target_column = "target_pm2_5"
 
+# Forecast strategies to train, comma separated; the first one listed is
+# promoted to production. "recursive" chains next-hour predictions,
+# "direct" trains one multi-output model for hours 1..72.
+FORECAST_STRATEGIES = [
+    s.strip() for s in os.getenv("FORECAST_STRATEGIES", "recursive").split(",") if s.strip()
+]
+DIRECT_HORIZONS = list(range(1, HORIZON + 1))
+
+# Forecast origins in the test period used to compare strategies per horizon
+EVAL_ORIGINS = 48
+REPORT_HORIZONS = (1, 6, 12, 24, 48, 72)
+
+# Set HYPERPARAM_SEARCH=0 to train the hand-picked configurations as they are
+HYPERPARAM_SEARCH = os.getenv("HYPERPARAM_SEARCH", "1") == "1"
+
+# =========================================================
+# Load Data (only the columns the models use)
+# =========================================================
+df = load_training_frame(feature_columns, target_column)
+
 X = df[feature_columns]
 y = df[target_column]
 
@@ -282,49 +301,140 @@ models = {
         min_samples_leaf=2,
         subsample=0.8,
         random_state=42
-    )
+    ),
+    # Binned boosting: the same kind of model as GradientBoosting, a fraction of the fit time
+    "HistGradientBoosting": HistGradientBoostingRegressor(
+        max_iter=500,
+        learning_rate=0.05,
+        max_leaf_nodes=31,
+        min_samples_leaf=20,
+        early_stopping=False,
+        random_state=42
+    ),
 }
 
-results = {}
-best_model_name = None
-best_model_object = None
-best_rmse = float("inf")
+# =========================================================
+# Hyperparameter Search
+# =========================================================
+# Successive halving on the training period only; seen trials come from model_trials
+search_results = {}
+if HYPERPARAM_SEARCH:
+    search_results = successive_halving(models, X_train, y_train, trials=trials_collection)
+    for name, found in search_results.items():
+        models[name].set_params(**found["params"])
+        print(f"Search {name}: {found['params']} "
+              f"({found['evaluated']} trials run, {found['cached']} from cache)")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+os.makedirs(MODEL_DIR, exist_ok=True)
+
+# =========================================================
+# Rolling-Origin Cross-Validation
+# =========================================================
+# Selection rests on CV_FOLDS expanding-window folds rather than the one split
+cv_results = cross_validate(models, X, y)
+for name, cv in cv_results.items():
+    print(f"CV {name}: RMSE {cv['RMSE']:.3f} ± {cv['RMSE_std']:.3f} over {len(cv['folds'])} folds")
 
 # =========================================================
 # Train & Evaluate
 # =========================================================
-for name, model in models.items():
-    model.fit(X_train, y_train)
-    preds = model.predict(X_test)
-
-    rmse = np.sqrt(mean_squared_error(y_test, preds))
-    mae = mean_absolute_error(y_test, preds)
-    r2 = r2_score(y_test, preds)
-
-    results[name] = {
-        "RMSE": float(rmse),
-        "MAE": float(mae),
-        "R2": float(r2)
+# Concurrently, within TRAIN_CPUS threads in total (see training.orchestrator)
+fitted = fit_candidates(models, X_train, y_train, X_test, y_test, MODEL_DIR)
+
+results = {}
+training_costs = {}
+for name, fit in fitted.items():
+    results[name] = {metric: fit[metric] for metric in ("RMSE", "MAE", "R2")}
+    results[name].update({f"CV_{metric}": cv_results[name][metric] for metric in ("RMSE", "MAE", "R2")})
+    training_costs[name] = {
+        key: fit[key] for key in ("fit_seconds", "predict_seconds", "peak_memory_mb", "threads")
     }
 
     print(f"\nModel: {name}")
-    print("RMSE:", rmse)
-    print("MAE:", mae)
-    print("R2:", r2)
+    print("RMSE:", fit["RMSE"])
+    print("MAE:", fit["MAE"])
+    print("R2:", fit["R2"])
+    memory = "n/a" if fit["peak_memory_mb"] is None else f"+{fit['peak_memory_mb']:.0f} MB"
+    print(f"Fit {fit['fit_seconds']:.1f}s, predict {fit['predict_seconds']:.2f}s, "
+          f"peak {memory} on {fit['threads']} thread(s)")
+
+best_model_name = min(results, key=lambda name: results[name]["CV_RMSE"])
+best_model_object = joblib.load(os.path.join(MODEL_DIR, f"{best_model_name}.pkl"))
 
-    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    MODEL_DIR = os.path.join(BASE_DIR, "models")
-    os.makedirs(MODEL_DIR, exist_ok=True)
+print("\n✅ Best Model:", best_model_name)
 
-    model_path = os.path.join(MODEL_DIR, f"{name}.pkl")
-    joblib.dump(model, model_path)
+# =========================================================
+# Direct Multi-Horizon Models
+# =========================================================
+horizon_results = {}
+direct_results = {}
+best_direct_name = None
+
+if "direct" in FORECAST_STRATEGIES:
+    # Target j is pm2_5 observed DIRECT_HORIZONS[j] hours after the row
+    Y = lead_targets(df, DIRECT_HORIZONS)
+    complete = ~np.isnan(Y).any(axis=1)
+
+    # Purge training rows whose targets reach into the test period
+    split = len(X_train)
+    test_start = df["timestamp"].iloc[split]
+    reach_end = df["timestamp"] + pd.Timedelta(hours=DIRECT_HORIZONS[-1])
+    train_rows = complete & (np.arange(len(df)) < split) & (reach_end < test_start).to_numpy()
+    test_rows = complete & (np.arange(len(df)) >= split)
+
+    # Natively multi-output: one fit, one predict for the whole trajectory
+    direct_models = {
+        "RandomForest": RandomForestRegressor(
+            n_estimators=200,
+            max_depth=15,
+            min_samples_leaf=2,
+            random_state=42,
+            n_jobs=-1
+        ),
+        "Ridge": Ridge(),
+    }
 
-    if rmse < best_rmse:
-        best_rmse = rmse
-        best_model_name = name
-        best_model_object = model
+    best_direct_rmse = float("inf")
+    for name, model in direct_models.items():
+        model.fit(X[train_rows], Y[train_rows])
+        preds = model.predict(X[test_rows])
+        per_horizon = np.sqrt(((preds - Y[test_rows]) ** 2).mean(axis=0))
+
+        direct_results[name] = {
+            "RMSE": float(per_horizon.mean()),
+            "RMSE_by_horizon": [float(v) for v in per_horizon],
+        }
+        print(f"\nDirect model: {name}")
+        print("Mean RMSE over horizons:", per_horizon.mean())
+
+        joblib.dump(model, os.path.join(MODEL_DIR, f"Direct_{name}.pkl"))
+        if per_horizon.mean() < best_direct_rmse:
+            best_direct_rmse = per_horizon.mean()
+            best_direct_name = name
+
+    print("\n✅ Best Direct Model:", best_direct_name)
+
+    # Recursive vs direct from the same origins of one location's test period
+    test_df = df.iloc[split:]
+    test_df = test_df[test_df["location"] == DEFAULT_LOCATION].reset_index(drop=True)
+    origins = evaluation_origins(test_df, EVAL_ORIGINS, HORIZON)
+    forecasters = {
+        "recursive": Forecaster(best_model_object, feature_columns),
+        "direct": DirectForecaster(direct_models[best_direct_name], feature_columns, DIRECT_HORIZONS),
+    }
 
-print("\n✅ Best Model:", best_model_name)
+    print(f"\nPer-horizon RMSE over {len(origins)} origins:")
+    print("strategy    ms/forecast  " + "  ".join(f"h={h:<4}" for h in REPORT_HORIZONS))
+    for strategy, forecaster in forecasters.items():
+        rmse_by_horizon, seconds = evaluate_forecaster(forecaster, test_df, origins, HORIZON)
+        horizon_results[strategy] = {
+            "ms_per_forecast": seconds * 1e3,
+            "RMSE_by_horizon": [float(v) for v in rmse_by_horizon],
+        }
+        cells = "  ".join(f"{rmse_by_horizon[h - 1]:<6.2f}" for h in REPORT_HORIZONS)
+        print(f"{strategy:<11} {seconds * 1e3:>11.2f}  {cells}")
 
 # =========================================================
 # Save Metrics
@@ -332,58 +442,66 @@ print("\n✅ Best Model:", best_model_name)
 metrics_collection.insert_one({
     "timestamp": datetime.now(timezone.utc),
     "results": results,
-    "best_model": best_model_name
+    "best_model": best_model_name,
+    "direct_results": direct_results,
+    "best_direct_model": best_direct_name,
+    "horizon_results": horizon_results,
+    "training_costs": training_costs,
+    "cv_results": cv_results,
+    "search": search_results,
 })
 
 # =========================================================
 # MODEL REGISTRY
 # =========================================================
-latest_model = registry_collection.find_one(sort=[("version", -1)])
-next_version = 1 if not latest_model else latest_model["version"] + 1
-
-registry_collection.update_many({}, {"$set": {"is_production": False}})
-
-registry_collection.insert_one({
-    "model_name": best_model_name,
-    "version": next_version,
-    "metrics": results[best_model_name],
-    "feature_columns": feature_columns,
-    "model_path": f"models/{best_model_name}.pkl",
-    "is_production": True,
-    "created_at": datetime.now(timezone.utc)
-})
+candidates = {
+    "recursive": dict(
+        model_name=best_model_name,
+        metrics=results[best_model_name],
+        model_path=f"models/{best_model_name}.pkl",
+        checksum=artifact_checksum(os.path.join(MODEL_DIR, f"{best_model_name}.pkl")),
+        hyperparameters=search_results.get(best_model_name, {}).get("params", {}),
+    ),
+}
+if best_direct_name is not None:
+    candidates["direct"] = dict(
+        model_name=best_direct_name,
+        metrics=direct_results[best_direct_name],
+        model_path=f"models/Direct_{best_direct_name}.pkl",
+        checksum=artifact_checksum(os.path.join(MODEL_DIR, f"Direct_{best_direct_name}.pkl")),
+        horizons=DIRECT_HORIZONS,
+    )
 
-print(f"✅ Model Registry Updated — Version {next_version} is now PRODUCTION")
+# Register the production strategy last so it ends up the only production version
+versions = {}
+for strategy in reversed(FORECAST_STRATEGIES):
+    production = strategy == FORECAST_STRATEGIES[0]
+    next_version = register_model(
+        registry_collection,
+        feature_columns=feature_columns,
+        strategy=strategy,
+        production=production,
+        **candidates[strategy],
+    )
+    versions[strategy] = next_version
+    status = "is now PRODUCTION" if production else "registered"
+    print(f"✅ Model Registry Updated — Version {next_version} ({strategy}) {status}")
 
 # =========================================================
 # SHAP ANALYSIS
 # =========================================================
-print("Computing SHAP feature importance...")
-
-print("Computing SHAP feature importance...")
-
-# Use TreeExplainer explicitly for tree models
-explainer = shap.TreeExplainer(best_model_object)
-
-# Disable strict additivity check (common fix)
-shap_values = explainer.shap_values(X_train, check_additivity=False)
-
-# Convert to numpy array (GradientBoosting returns 2D)
-shap_values = np.array(shap_values)
-
-# Mean absolute importance
-feature_importance = np.abs(shap_values).mean(axis=0)
-
-
-shap_results = []
-for feature, importance in zip(feature_columns, feature_importance):
-    shap_results.append({
-        "feature": feature,
-        "importance": float(importance)
-    })
-
-shap_collection.delete_many({})
-shap_collection.insert_many(shap_results)
+# Model-aware, on a stratified sample, stored per registry version (see training.explain)
+if "recursive" in versions:
+    print("Computing SHAP feature importance...")
+    shap_info = store_importance(
+        shap_collection,
+        {"version": versions["recursive"], "model_name": best_model_name, "feature_columns": feature_columns},
+        best_model_object, X_train, y_train,
+    )
+    if shap_info is None:
+        print("✅ SHAP feature importance already stored for this version")
+    else:
+        print(f"✅ SHAP feature importance stored in MongoDB ({shap_info['method']}, "
+              f"{shap_info['sample_rows']} rows, {shap_info['seconds']:.1f}s)")
 
-print("✅ SHAP feature importance stored in MongoDB")
 print("✅ Training pipeline completed successfully")